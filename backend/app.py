@@ -1,13 +1,18 @@
-from flask import Flask, jsonify, request, session
+from flask import Flask, Response, jsonify, request, session, stream_with_context
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import declared_attr
 from werkzeug.security import generate_password_hash, check_password_hash
-import requests
 import numpy as np
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import os
 import secrets
+import json
+import time
+import hashlib
+import threading
+import math
 # Load environment variables from .env file (optional)
 try:
     from dotenv import load_dotenv
@@ -56,6 +61,9 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///smart_plant.db'
     print('✅ Using SQLite database (local development)')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Monthly range partitioning of sensor_readings (Postgres only, see partitions.py)
+SENSOR_READINGS_PARTITIONED = os.environ.get('SENSOR_READINGS_PARTITIONED', '').lower() in ('1', 'true', 'yes') \
+    and app.config['SQLALCHEMY_DATABASE_URI'].startswith(('postgresql://', 'postgres://'))
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 # For localhost cross-port, use 'None' with Secure=False (development only)
 # Browsers treat localhost as same-site, but explicit setting helps
@@ -109,12 +117,137 @@ class Plant(db.Model):
 
 class SensorReading(db.Model):
     __tablename__ = 'sensor_readings'
-    id = db.Column(db.Integer, primary_key=True)
+    if SENSOR_READINGS_PARTITIONED:
+        # Postgres requires the partition key in the primary key, hence (id, timestamp)
+        __table_args__ = {'postgresql_partition_by': 'RANGE (timestamp)'}
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     plant_id = db.Column(db.Integer, db.ForeignKey('plants.id'), nullable=False)
     light = db.Column(db.Float, nullable=False)
     moisture = db.Column(db.Float, nullable=False)
     temperature = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False,
+                          primary_key=SENSOR_READINGS_PARTITIONED)
+
+# Composite index for "latest N readings for a plant" lookups
+# (filter_by(plant_id=...).order_by(timestamp.desc()).first()/limit(n)) - keeps them
+# an index range scan instead of a scan that grows with the table.
+# Existing databases: run `python migrate_indexes.py` (CONCURRENTLY on Postgres).
+SENSOR_READINGS_PLANT_TIME_INDEX = db.Index(
+    'ix_sensor_readings_plant_id_timestamp',
+    SensorReading.plant_id,
+    SensorReading.timestamp.desc()
+)
+
+# MAX(id) per plant (history ETags) as a single index lookup; readings backfilled
+# with old timestamps still get a new id, so this notices them where timestamps don't
+SENSOR_READINGS_PLANT_ID_INDEX = db.Index(
+    'ix_sensor_readings_plant_id_id',
+    SensorReading.plant_id,
+    SensorReading.id
+)
+
+class SensorRollupMixin:
+    """Per-plant, per-bucket aggregates of sensor readings, maintained by update_sensor_rollups()"""
+    @declared_attr
+    def plant_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('plants.id', ondelete='CASCADE'), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)  # UTC, aligned to BUCKET_SECONDS
+    count = db.Column(db.Integer, nullable=False)
+    light_min = db.Column(db.Float, nullable=False)
+    light_max = db.Column(db.Float, nullable=False)
+    light_avg = db.Column(db.Float, nullable=False)
+    moisture_min = db.Column(db.Float, nullable=False)
+    moisture_max = db.Column(db.Float, nullable=False)
+    moisture_avg = db.Column(db.Float, nullable=False)
+    temperature_min = db.Column(db.Float, nullable=False)
+    temperature_max = db.Column(db.Float, nullable=False)
+    temperature_avg = db.Column(db.Float, nullable=False)
+
+class SensorRollupHourly(SensorRollupMixin, db.Model):
+    __tablename__ = 'sensor_rollups_hourly'
+    BUCKET_SECONDS = 3600
+
+class SensorRollupDaily(SensorRollupMixin, db.Model):
+    __tablename__ = 'sensor_rollups_daily'
+    BUCKET_SECONDS = 86400
+
+# Coarsest first - history queries use the coarsest rollup that fits the requested bucket
+ROLLUP_MODELS = (SensorRollupDaily, SensorRollupHourly)
+
+class RollupWatermark(db.Model):
+    """Highest sensor_readings.id already folded into the rollup tables"""
+    __tablename__ = 'rollup_watermarks'
+    name = db.Column(db.String(50), primary_key=True)
+    last_reading_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+SENSOR_ROLLUP_WATERMARK = 'sensor_rollups'
+
+class PlantHealthSnapshot(db.Model):
+    """Latest health result per plant, written by score_plant_health_fleet() (score_fleet.py)"""
+    __tablename__ = 'plant_health_snapshots'
+    plant_id = db.Column(db.Integer, db.ForeignKey('plants.id', ondelete='CASCADE'), primary_key=True)
+    reading_id = db.Column(db.Integer)  # sensor_readings.id of the newest reading used (None = no readings)
+    score = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    model_type = db.Column(db.String(50), nullable=False)
+    result = db.Column(db.JSON, nullable=False)  # /api/plant-health response body
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Latest-reading cache - serves dashboard polls of the current value from memory.
+# Filled write-through by the ingest endpoints and, on Postgres, by a LISTEN/NOTIFY
+# listener for rows the Raspberry Pi writes directly (see start_background_services).
+from reading_cache import LatestReadingCache, reading_snapshot
+LATEST_READING_CACHE_SIZE = int(os.environ.get('LATEST_READING_CACHE_SIZE', 10000))
+# Without change notifications (SQLite, or listener reconnecting) entries expire after this many seconds
+LATEST_READING_CACHE_TTL = float(os.environ.get('LATEST_READING_CACHE_TTL', 10))
+latest_readings = LatestReadingCache(max_size=LATEST_READING_CACHE_SIZE, ttl=LATEST_READING_CACHE_TTL)
+
+def get_latest_reading(plant_id):
+    """Latest reading snapshot for a plant (cache first), or None if it has no readings"""
+    snapshot = latest_readings.get(plant_id)
+    if snapshot is not LatestReadingCache.MISSING:
+        return snapshot
+    reading = SensorReading.query.filter_by(plant_id=plant_id)\
+        .order_by(SensorReading.timestamp.desc()).first()
+    snapshot = reading_snapshot(reading) if reading else None
+    latest_readings.update(plant_id, snapshot)
+    return snapshot
+
+def record_new_reading(reading, from_notification=False):
+    """
+    Hook called for every newly stored reading.
+
+    Updates the latest-reading cache and feeds the live stream. With Postgres
+    notifications active, stream events come only from the listener (every row is
+    notified exactly once); otherwise the stream poller is woken up.
+    """
+    snapshot = reading_snapshot(reading)
+    latest_readings.update(snapshot['plant_id'], snapshot)
+    if from_notification:
+        sensor_stream.publish(snapshot)
+    elif not sensor_stream.notifications_active:
+        sensor_stream.wake()
+    return snapshot
+
+def fetch_new_readings(cursors):
+    """Readings newer than each plant's cursor ({plant_id: last_id}), for the stream poller"""
+    with app.app_context():
+        readings = SensorReading.query.filter(db.or_(*[
+            db.and_(SensorReading.plant_id == plant_id, SensorReading.id > last_id)
+            for plant_id, last_id in cursors.items()
+        ])).order_by(SensorReading.id).limit(STREAM_BACKLOG_LIMIT).all()
+        snapshots = [reading_snapshot(reading) for reading in readings]
+        db.session.remove()
+        return snapshots
+
+# Live sensor stream (GET /api/sensor-data/stream)
+from sensor_stream import SensorStreamHub
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+STREAM_MAX_SECONDS = float(os.environ.get('STREAM_MAX_SECONDS', 300))  # Clients reconnect and resume after this
+STREAM_POLL_SECONDS = float(os.environ.get('STREAM_POLL_SECONDS', 2))
+STREAM_BACKLOG_LIMIT = 500
+sensor_stream = SensorStreamHub(fetch_new_readings, poll_interval=STREAM_POLL_SECONDS)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -147,6 +280,8 @@ except Exception as e:
         def predict(self, features):
             # Simple fallback - return 72 hours
             return 72.0
+        def predict_batch(self, X):
+            return np.full(len(X), 72.0)
         is_trained = False
     ml_model = FallbackModel()
 
@@ -168,35 +303,132 @@ except Exception as e:
 NWS_USER_AGENT = os.environ.get('NWS_USER_AGENT', 'SmartPlantAssistant-tyler.i.hughes@vanderbilt.edu')
 NWS_HEADERS = {'User-Agent': NWS_USER_AGENT}
 
+# Every outbound call (weather.gov, Nominatim) goes through one pooled keep-alive client
+from http_client import HttpClient
+from circuit_breaker import CircuitBreaker
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))  # Keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))  # On connection errors, 429 and 5xx
+# A read timeout already cost the caller its full timeout; retrying it would multiply that
+HTTP_READ_RETRIES = int(os.environ.get('HTTP_READ_RETRIES', 0))
+# Per-upstream circuit breakers: trip on error rate or slow-call rate over a rolling window
+BREAKER_WINDOW_SECONDS = float(os.environ.get('BREAKER_WINDOW_SECONDS', 60))
+BREAKER_MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', 5))
+BREAKER_ERROR_RATE = float(os.environ.get('BREAKER_ERROR_RATE', 0.5))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', 5))
+BREAKER_SLOW_CALL_RATE = float(os.environ.get('BREAKER_SLOW_CALL_RATE', 0.5))
+BREAKER_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', 30))
+
+def _make_breaker(host):
+    return CircuitBreaker(host, window_seconds=BREAKER_WINDOW_SECONDS, min_calls=BREAKER_MIN_CALLS,
+                          error_rate_threshold=BREAKER_ERROR_RATE, slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+                          slow_rate_threshold=BREAKER_SLOW_CALL_RATE, open_seconds=BREAKER_OPEN_SECONDS)
+
+http_client = HttpClient(pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=HTTP_MAX_RETRIES,
+                         read_retries=HTTP_READ_RETRIES, headers={'User-Agent': NWS_USER_AGENT}, breaker_factory=_make_breaker)
+
+# NWS grid point metadata (forecast URL, observation stations) barely ever changes
+from weather_cache import GridPointCache, StaleWhileRevalidateCache
+GRID_POINT_CACHE_TTL = float(os.environ.get('GRID_POINT_CACHE_TTL', 30 * 86400))
+# SQLite file that keeps grid points across restarts ('' = memory only)
+GRID_POINT_CACHE_PATH = os.environ.get(
+    'GRID_POINT_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_cache.db'))
+grid_points = GridPointCache(ttl=GRID_POINT_CACHE_TTL, path=GRID_POINT_CACHE_PATH or None)
+
+# Forecasts (per grid cell) and latest observations (per station) are shared by every
+# user in the cell: served from memory, refreshed in the background once older than
+# the TTL, and refetched synchronously only when older than WEATHER_CACHE_MAX_STALE
+FORECAST_CACHE_TTL = float(os.environ.get('FORECAST_CACHE_TTL', 900))
+OBSERVATION_CACHE_TTL = float(os.environ.get('OBSERVATION_CACHE_TTL', 600))
+WEATHER_CACHE_MAX_STALE = float(os.environ.get('WEATHER_CACHE_MAX_STALE', 6 * 3600))
+forecasts = StaleWhileRevalidateCache('forecasts', FORECAST_CACHE_TTL, WEATHER_CACHE_MAX_STALE)
+observations = StaleWhileRevalidateCache('observations', OBSERVATION_CACHE_TTL, WEATHER_CACHE_MAX_STALE)
+
+# The forecast and observation branches of /api/weather run concurrently under one deadline
+from concurrent.futures import ThreadPoolExecutor
+WEATHER_FETCH_WORKERS = int(os.environ.get('WEATHER_FETCH_WORKERS', 8))
+WEATHER_DEADLINE_SECONDS = float(os.environ.get('WEATHER_DEADLINE_SECONDS', 8))
+weather_executor = ThreadPoolExecutor(max_workers=WEATHER_FETCH_WORKERS, thread_name_prefix='weather-fetch')
+
+# All weather reads (/api/weather, /api/plant-health, /api/predict) go through one service
+from weather_service import WeatherService
+# Health scoring and predictions reuse a grid cell's snapshot this long without any fetch
+WEATHER_SNAPSHOT_MAX_AGE = float(os.environ.get('WEATHER_SNAPSHOT_MAX_AGE', 1800))
+DEFAULT_WEATHER_SNAPSHOT = {'temperature': 72, 'humidity': 60, 'precipitation': 0, 'windSpeed': 5.0}
+weather_service = WeatherService(http_client, NWS_HEADERS, grid_points, forecasts, observations,
+                                 weather_executor, WEATHER_DEADLINE_SECONDS)
+
+# Grid cells of recently active users are refreshed shortly before their cache entries expire
+from weather_prefetch import WeatherPrefetcher
+WEATHER_PREFETCH_INTERVAL_SECONDS = float(os.environ.get('WEATHER_PREFETCH_INTERVAL_SECONDS', 60))  # 0 = off
+WEATHER_PREFETCH_ACTIVE_SECONDS = float(os.environ.get('WEATHER_PREFETCH_ACTIVE_SECONDS', 3600))
+WEATHER_PREFETCH_LEAD_SECONDS = float(os.environ.get('WEATHER_PREFETCH_LEAD_SECONDS', 120))
+WEATHER_PREFETCH_CONCURRENCY = int(os.environ.get('WEATHER_PREFETCH_CONCURRENCY', 2))
+WEATHER_PREFETCH_JITTER_SECONDS = float(os.environ.get('WEATHER_PREFETCH_JITTER_SECONDS', 30))
+weather_prefetcher = WeatherPrefetcher(weather_service,
+                                       interval_seconds=WEATHER_PREFETCH_INTERVAL_SECONDS,
+                                       active_seconds=WEATHER_PREFETCH_ACTIVE_SECONDS,
+                                       lead_seconds=WEATHER_PREFETCH_LEAD_SECONDS,
+                                       max_concurrency=WEATHER_PREFETCH_CONCURRENCY,
+                                       jitter_seconds=WEATHER_PREFETCH_JITTER_SECONDS)
+
+def get_weather_snapshot(lat, lon, track_activity=True):
+    """
+    Normalized weather for scoring/predictions, never raising.
+
+    Args:
+        track_activity: Count the location as active for weather prefetching
+                        (batch jobs pass False)
+
+    Returns:
+        dict: {temperature, humidity, precipitation, windSpeed}; defaults fill anything
+              unavailable (no location, NWS down)
+    """
+    if lat is None or lon is None:
+        return dict(DEFAULT_WEATHER_SNAPSHOT)
+    if track_activity:
+        weather_prefetcher.touch(lat, lon)
+    try:
+        snapshot = weather_service.snapshot(lat, lon, WEATHER_SNAPSHOT_MAX_AGE)
+    except Exception as e:
+        print(f'Error fetching weather snapshot: {e}')
+        return dict(DEFAULT_WEATHER_SNAPSHOT)
+    return {key: DEFAULT_WEATHER_SNAPSHOT[key] if value is None else value for key, value in snapshot.items()}
+
+# Place names resolve through the offline gazetteer and a result cache before Nominatim
+from geocoding import Geocoder, GeocodingCache, load_gazetteer
+GEOCODE_CACHE_TTL = float(os.environ.get('GEOCODE_CACHE_TTL', 90 * 86400))
+GEOCODE_NEGATIVE_CACHE_TTL = float(os.environ.get('GEOCODE_NEGATIVE_CACHE_TTL', 86400))  # "Not found" results
+# SQLite file for geocoding results (empty = memory only)
+GEOCODE_CACHE_PATH = os.environ.get(
+    'GEOCODE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geocode_cache.db'))
+# Bundled city list resolved without any network call (empty = disabled)
+GAZETTEER_PATH = os.environ.get(
+    'GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv'))
+NOMINATIM_MIN_INTERVAL = float(os.environ.get('NOMINATIM_MIN_INTERVAL', 1.0))  # Nominatim policy: max 1 req/s
+
+gazetteer = {}
+if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+    try:
+        gazetteer = load_gazetteer(GAZETTEER_PATH)
+    except Exception as e:
+        print(f"⚠️  Could not load gazetteer {GAZETTEER_PATH}: {e}")
+
+geocoder = Geocoder(
+    http_client=http_client,
+    headers={'User-Agent': NWS_USER_AGENT},  # Respectful use of free service
+    cache=GeocodingCache(ttl=GEOCODE_CACHE_TTL, negative_ttl=GEOCODE_NEGATIVE_CACHE_TTL,
+                         path=GEOCODE_CACHE_PATH or None),
+    gazetteer=gazetteer,
+    min_interval=NOMINATIM_MIN_INTERVAL
+)
+
 # Authentication Routes
 def geocode_location(location_name):
-    """Convert a place name to latitude/longitude using Nominatim (OpenStreetMap)"""
+    """Convert a place name to latitude/longitude (gazetteer, cache, then Nominatim/OpenStreetMap)"""
     try:
         if not location_name or not location_name.strip():
             return None, None
-        
-        # Use Nominatim geocoding service (free, no API key needed)
-        geocode_url = 'https://nominatim.openstreetmap.org/search'
-        params = {
-            'q': location_name,
-            'format': 'json',
-            'limit': 1
-        }
-        headers = {
-            'User-Agent': NWS_USER_AGENT  # Respectful use of free service
-        }
-        
-        response = requests.get(geocode_url, params=params, headers=headers, timeout=10)
-        
-        if response.ok:
-            data = response.json()
-            if data and len(data) > 0:
-                result = data[0]
-                lat = float(result.get('lat', 0))
-                lon = float(result.get('lon', 0))
-                return lat, lon
-        
-        return None, None
+        return geocoder.geocode(location_name)
     except Exception as e:
         print(f'Geocoding error: {e}')
         return None, None
@@ -528,8 +760,14 @@ def delete_plant(plant_id):
     if not plant:
         return jsonify({'error': 'Plant not found'}), 404
 
+    for model in ROLLUP_MODELS:
+        model.query.filter_by(plant_id=plant_id).delete()
+    PlantHealthSnapshot.query.filter_by(plant_id=plant_id).delete()
     db.session.delete(plant)
     db.session.commit()
+    latest_readings.invalidate(plant_id)
+    from reading_archive import delete_plant_archive
+    delete_plant_archive(ARCHIVE_DIR, plant_id)
     return jsonify({'message': 'Plant deleted successfully'})
 
 # Sensor Data Routes
@@ -545,18 +783,17 @@ def get_sensor_data():
         if not plant:
             return jsonify({'error': 'Plant not found'}), 404
         
-        # Get latest reading from Neon database
-        latest_reading = SensorReading.query.filter_by(plant_id=plant_id)\
-            .order_by(SensorReading.timestamp.desc()).first()
+        # Get latest reading (in-memory cache, falls back to Neon database)
+        latest_reading = get_latest_reading(plant_id)
         
         if latest_reading:
             return jsonify({
                 'plant_id': plant_id,
                 'plant_name': plant.name,
-                'light': latest_reading.light,
-                'moisture': latest_reading.moisture,
-                'temperature': latest_reading.temperature,
-                'timestamp': latest_reading.timestamp.isoformat(),
+                'light': latest_reading['light'],
+                'moisture': latest_reading['moisture'],
+                'temperature': latest_reading['temperature'],
+                'timestamp': latest_reading['timestamp'].isoformat(),
                 'is_simulated': False  # Real sensor data from Neon
             })
         else:
@@ -580,17 +817,16 @@ def get_sensor_data():
         
         # Return first plant's data by default
         plant = plants[0]
-        latest_reading = SensorReading.query.filter_by(plant_id=plant.id)\
-            .order_by(SensorReading.timestamp.desc()).first()
+        latest_reading = get_latest_reading(plant.id)
         
         if latest_reading:
             return jsonify({
                 'plant_id': plant.id,
                 'plant_name': plant.name,
-                'light': latest_reading.light,
-                'moisture': latest_reading.moisture,
-                'temperature': latest_reading.temperature,
-                'timestamp': latest_reading.timestamp.isoformat(),
+                'light': latest_reading['light'],
+                'moisture': latest_reading['moisture'],
+                'temperature': latest_reading['temperature'],
+                'timestamp': latest_reading['timestamp'].isoformat(),
                 'is_simulated': False  # Real sensor data from Neon
             })
         else:
@@ -635,6 +871,7 @@ def update_sensor_data():
         )
         db.session.add(reading)
         db.session.commit()
+        record_new_reading(reading)
         
         return jsonify({
             'status': 'success',
@@ -651,12 +888,596 @@ def update_sensor_data():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Upper bound on readings accepted by one batch request
+MAX_BATCH_READINGS = int(os.environ.get('MAX_BATCH_READINGS', 1000))
+
+def _batch_plant_ref(item):
+    """
+    How a batch item identifies its plant: ('sensor_id', str) or ('plant_id', int).
+
+    Raises:
+        ValueError: If neither is given or the value is not a scalar
+    """
+    sensor_id = item.get('sensor_id')
+    plant_id = item.get('plant_id')
+    if sensor_id:
+        if not isinstance(sensor_id, (str, int)) or isinstance(sensor_id, bool):
+            raise ValueError('sensor_id must be a string')
+        return 'sensor_id', str(sensor_id)
+    if plant_id:
+        if not isinstance(plant_id, (str, int)) or isinstance(plant_id, bool):
+            raise ValueError('plant_id must be an integer')
+        try:
+            return 'plant_id', int(plant_id)  # "1" is accepted, as by POST /api/sensor-data
+        except ValueError:
+            raise ValueError('plant_id must be an integer')
+    raise ValueError('sensor_id or plant_id required')
+
+def _reading_value(item, key):
+    """A finite float sensor value from a batch item (missing = 0)"""
+    value = float(item.get(key, 0))
+    if not math.isfinite(value):
+        raise ValueError(f'{key} must be a finite number')
+    return value
+
+def _parse_reading_timestamp(value):
+    """Parse an optional ISO-8601 reading timestamp into a naive UTC datetime"""
+    if value is None:
+        return datetime.utcnow()
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@app.route('/api/sensor-data/batch', methods=['POST'])
+@login_required
+def update_sensor_data_batch():
+    """
+    Ingest many sensor readings in one request.
+
+    Accepts either a JSON array of readings or {"readings": [...]}. Each reading
+    identifies its plant by sensor_id or plant_id (same rules as POST /api/sensor-data)
+    and may carry an ISO-8601 timestamp. All plants are resolved with a single query
+    and all valid readings are written with one multi-row insert and one commit.
+
+    Returns per-item results in request order:
+        {'index': i, 'status': 'success', 'id': ..., 'plant_id': ...}
+        {'index': i, 'status': 'error', 'error': '...'}
+    """
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('readings') if isinstance(data, dict) else data
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'readings must be a non-empty array'}), 400
+        if len(items) > MAX_BATCH_READINGS:
+            return jsonify({'error': f'Too many readings (max {MAX_BATCH_READINGS} per request)'}), 413
+
+        results = [None] * len(items)
+        refs = [None] * len(items)
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'status': 'error', 'error': 'Reading must be an object'}
+                continue
+            try:
+                refs[index] = _batch_plant_ref(item)
+            except ValueError as e:
+                results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+
+        # Resolve every referenced plant with one query
+        sensor_ids = {ref[1] for ref in refs if ref and ref[0] == 'sensor_id'}
+        plant_ids = {ref[1] for ref in refs if ref and ref[0] == 'plant_id'}
+        by_sensor_id = {}
+        by_plant_id = {}
+        if sensor_ids or plant_ids:
+            plants = Plant.query.filter(
+                Plant.user_id == current_user.id,
+                db.or_(Plant.sensor_id.in_(sensor_ids), Plant.id.in_(plant_ids))
+            ).all()
+            by_sensor_id = {plant.sensor_id: plant for plant in plants}
+            by_plant_id = {plant.id: plant for plant in plants}
+
+        rows = []
+        row_indexes = []
+        for index, item in enumerate(items):
+            if refs[index] is None:
+                continue  # Already rejected above
+
+            kind, value = refs[index]
+            plant = (by_sensor_id if kind == 'sensor_id' else by_plant_id).get(value)
+            if not plant:
+                results[index] = {'index': index, 'status': 'error', 'error': 'Plant not found'}
+                continue
+
+            try:
+                rows.append({
+                    'plant_id': plant.id,
+                    'light': _reading_value(item, 'light'),
+                    'moisture': _reading_value(item, 'moisture'),
+                    'temperature': _reading_value(item, 'temperature'),
+                    'timestamp': _parse_reading_timestamp(item.get('timestamp'))
+                })
+                row_indexes.append(index)
+            except (TypeError, ValueError) as e:
+                results[index] = {'index': index, 'status': 'error', 'error': f'Invalid reading: {e}'}
+
+        if rows:
+            # Single executemany/multi-row INSERT ... RETURNING for the whole batch
+            inserted_ids = db.session.scalars(
+                db.insert(SensorReading).returning(SensorReading.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.session.commit()
+
+            for index, row, reading_id in zip(row_indexes, rows, inserted_ids):
+                record_new_reading(dict(row, id=reading_id))
+                results[index] = {
+                    'index': index,
+                    'status': 'success',
+                    'id': reading_id,
+                    'plant_id': row['plant_id'],
+                    'timestamp': row['timestamp'].isoformat()
+                }
+
+        accepted = len(rows)
+        return jsonify({
+            'status': 'success' if accepted == len(items) else ('partial' if accepted else 'error'),
+            'accepted': accepted,
+            'rejected': len(items) - accepted,
+            'results': results
+        }), 200 if accepted else 400
+    except Exception as e:
+        db.session.rollback()
+        print(f'Batch sensor data error: {e}')
+        import traceback
+        traceback.print_exc()
+        # Database errors would echo the SQL statement; keep the details in the server log
+        return jsonify({'error': 'Could not store readings'}), 500
+
+def _sse_reading_event(snapshot, plant_name):
+    """Format a reading snapshot as an SSE 'reading' event"""
+    data = json.dumps({
+        'id': snapshot['id'],
+        'plant_id': snapshot['plant_id'],
+        'plant_name': plant_name,
+        'light': snapshot['light'],
+        'moisture': snapshot['moisture'],
+        'temperature': snapshot['temperature'],
+        'timestamp': snapshot['timestamp'].isoformat(),
+        'is_simulated': False
+    })
+    return f"id: {snapshot['id']}\nevent: reading\ndata: {data}\n\n"
+
+@app.route('/api/sensor-data/stream', methods=['GET'])
+@login_required
+def stream_sensor_data():
+    """
+    Server-Sent Events stream of new readings for one plant.
+
+    Sends the latest reading on connect, then one 'reading' event (id = reading id)
+    per new reading, and a comment heartbeat when idle. Clients reconnecting with a
+    Last-Event-ID header (EventSource does this automatically) first receive every
+    reading they missed. Connections are closed after STREAM_MAX_SECONDS so worker
+    threads are recycled; EventSource reconnects and resumes transparently.
+    """
+    plant_id = request.args.get('plant_id', type=int)
+    if not plant_id:
+        return jsonify({'error': 'plant_id required'}), 400
+
+    plant = Plant.query.filter_by(id=plant_id, user_id=current_user.id).first()
+    if not plant:
+        return jsonify({'error': 'Plant not found'}), 404
+    plant_name = plant.name
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    if last_event_id is None:
+        # New client: start from the latest reading, never from 0 - a cursor of 0 would
+        # make the poller replay the plant's whole history to every subscriber
+        latest = get_latest_reading(plant_id)
+        start_id = latest['id'] if latest else 0
+    else:
+        start_id = last_event_id
+
+    # Subscribe before reading the backlog so nothing written in between is lost
+    subscription = sensor_stream.subscribe(plant_id, start_id)
+    try:
+        if last_event_id is not None:
+            backlog = [reading_snapshot(r) for r in SensorReading.query
+                       .filter(SensorReading.plant_id == plant_id, SensorReading.id > last_event_id)
+                       .order_by(SensorReading.id).limit(STREAM_BACKLOG_LIMIT).all()]
+        else:
+            # Re-read in case a reading arrived before the subscription existed
+            latest = get_latest_reading(plant_id) or latest
+            backlog = [latest] if latest else []
+    except Exception:
+        sensor_stream.unsubscribe(subscription)
+        raise
+
+    # stream_with_context keeps the app context (and with it the scoped session) alive
+    # for the whole stream; return the connection to the pool now - generate() only
+    # uses the locals above and never touches db.session
+    db.session.remove()
+
+    def generate():
+        sent_id = last_event_id or 0
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        try:
+            yield 'retry: 3000\n\n'
+            for snapshot in backlog:
+                sent_id = max(sent_id, snapshot['id'])
+                yield _sse_reading_event(snapshot, plant_name)
+            while time.monotonic() < deadline:
+                snapshot = subscription.next(timeout=STREAM_HEARTBEAT_SECONDS)
+                if snapshot is None:
+                    if subscription.closed:
+                        break
+                    yield ': heartbeat\n\n'
+                    continue
+                if snapshot['id'] <= sent_id:
+                    continue  # Already sent as part of the backlog
+                sent_id = snapshot['id']
+                yield _sse_reading_event(snapshot, plant_name)
+        finally:
+            sensor_stream.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering (nginx)
+    })
+
+# Time-bucketed history (downsampling for long chart ranges)
+BUCKET_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MAX_HISTORY_BUCKETS = int(os.environ.get('MAX_HISTORY_BUCKETS', 5000))
+
+def _parse_bucket(bucket):
+    """Parse a bucket size like '1m', '15m', '1h', '1d' into seconds"""
+    bucket = (bucket or '').strip().lower()
+    if len(bucket) < 2 or bucket[-1] not in BUCKET_UNITS or not bucket[:-1].isdigit():
+        raise ValueError(f'Invalid bucket: {bucket!r} (use e.g. 1m, 15m, 1h, 1d)')
+    seconds = int(bucket[:-1]) * BUCKET_UNITS[bucket[-1]]
+    if seconds <= 0:
+        raise ValueError('bucket must be positive')
+    return seconds
+
+def _epoch_seconds(column):
+    """SQL expression for a DateTime column as integer Unix seconds (UTC)"""
+    if db.engine.dialect.name == 'postgresql':
+        return db.cast(db.func.floor(db.extract('epoch', column)), db.BigInteger)
+    return db.cast(db.func.strftime('%s', column), db.Integer)
+
+def _raw_bucket_partials(plant_id, start, end, bucket_seconds, after_id=None):
+    """Per-bucket [count, mins, maxs, sums] from raw readings, grouped in SQL"""
+    bucket_expr = (_epoch_seconds(SensorReading.timestamp) // bucket_seconds).label('bucket')
+    query = db.session.query(
+        bucket_expr,
+        db.func.count(SensorReading.id),
+        db.func.min(SensorReading.light), db.func.min(SensorReading.moisture), db.func.min(SensorReading.temperature),
+        db.func.max(SensorReading.light), db.func.max(SensorReading.moisture), db.func.max(SensorReading.temperature),
+        db.func.sum(SensorReading.light), db.func.sum(SensorReading.moisture), db.func.sum(SensorReading.temperature)
+    ).filter(
+        SensorReading.plant_id == plant_id,
+        SensorReading.timestamp >= start,
+        SensorReading.timestamp < end
+    )
+    if after_id is not None:
+        query = query.filter(SensorReading.id > after_id)
+    return {int(row[0]) * bucket_seconds: [int(row[1]), list(row[2:5]), list(row[5:8]), list(row[8:11])]
+            for row in query.group_by(bucket_expr).all()}
+
+def _rollup_bucket_partials(model, plant_id, start, end, bucket_seconds):
+    """Per-bucket [count, mins, maxs, sums] re-aggregated from a rollup table in SQL"""
+    bucket_expr = (_epoch_seconds(model.bucket_start) // bucket_seconds).label('bucket')
+    query = db.session.query(
+        bucket_expr,
+        db.func.sum(model.count),
+        db.func.min(model.light_min), db.func.min(model.moisture_min), db.func.min(model.temperature_min),
+        db.func.max(model.light_max), db.func.max(model.moisture_max), db.func.max(model.temperature_max),
+        db.func.sum(model.light_avg * model.count), db.func.sum(model.moisture_avg * model.count),
+        db.func.sum(model.temperature_avg * model.count)
+    ).filter(
+        model.plant_id == plant_id,
+        model.bucket_start >= start,
+        model.bucket_start < end
+    )
+    return {int(row[0]) * bucket_seconds: [int(row[1]), list(row[2:5]), list(row[5:8]), list(row[8:11])]
+            for row in query.group_by(bucket_expr).all()}
+
+def _archived_bucket_partials(plant_id, start, end, bucket_seconds):
+    """Per-bucket [count, mins, maxs, sums] of archived readings in the range (NumPy)"""
+    from reading_archive import load_archived_readings
+    from rollups import aggregate_readings
+    if not _range_reaches_archive(plant_id, start):
+        return {}
+    archived = load_archived_readings(ARCHIVE_DIR, plant_id, start, end)
+    values = np.column_stack([archived['light'], archived['moisture'], archived['temperature']])
+    aggregate = aggregate_readings(np.full(len(archived['id']), plant_id),
+                                   archived['timestamp'].astype('datetime64[s]').astype(np.int64),
+                                   values, bucket_seconds)
+    return {int(aggregate['bucket_start'][i]): [int(aggregate['count'][i]), aggregate['min'][i].tolist(),
+                                                aggregate['max'][i].tolist(),
+                                                (aggregate['avg'][i] * aggregate['count'][i]).tolist()]
+            for i in range(len(aggregate['count']))}
+
+def _merge_bucket_partials(partials, extra):
+    """Fold one {bucket_start: [count, mins, maxs, sums]} map into another"""
+    for bucket_start, (count, mins, maxs, sums) in extra.items():
+        if bucket_start not in partials:
+            partials[bucket_start] = [count, mins, maxs, sums]
+            continue
+        merged = partials[bucket_start]
+        merged[0] += count
+        merged[1] = [min(a, b) for a, b in zip(merged[1], mins)]
+        merged[2] = [max(a, b) for a, b in zip(merged[2], maxs)]
+        merged[3] = [a + b for a, b in zip(merged[3], sums)]
+
+def downsample_readings(plant_id, start, end, bucket_seconds):
+    """
+    Per-bucket min/max/mean/count of each sensor value.
+
+    Buckets are aligned to multiples of bucket_seconds since the Unix epoch, so
+    the payload size depends on (end - start) / bucket rather than on how many
+    raw readings fall in the range. `start` and `end` should be bucket-aligned.
+
+    When the bucket is a whole number of hours or days, the coarsest fitting rollup
+    table is re-aggregated instead of the raw readings, and only raw readings newer
+    than the rollup watermark are added on top - results match the raw computation.
+
+    Returns:
+        list: One dict per non-empty bucket, oldest first
+    """
+    rollup_model = next((model for model in ROLLUP_MODELS if bucket_seconds % model.BUCKET_SECONDS == 0), None)
+    watermark = db.session.get(RollupWatermark, SENSOR_ROLLUP_WATERMARK) if rollup_model else None
+
+    if watermark is None:
+        # Rollups also cover archived readings; without them the archive is read directly
+        partials = _raw_bucket_partials(plant_id, start, end, bucket_seconds)
+        _merge_bucket_partials(partials, _archived_bucket_partials(plant_id, start, end, bucket_seconds))
+    else:
+        partials = _rollup_bucket_partials(rollup_model, plant_id, start, end, bucket_seconds)
+        _merge_bucket_partials(partials, _raw_bucket_partials(
+            plant_id, start, end, bucket_seconds, after_id=watermark.last_reading_id))
+
+    return [_bucket_row(bucket_start, *partials[bucket_start]) for bucket_start in sorted(partials)]
+
+def _bucket_row(bucket_start, count, mins, maxs, sums):
+    """Shape one bucket like a history row (means as the plotted value) plus min/max/count"""
+    row = {
+        'timestamp': datetime.fromtimestamp(bucket_start, timezone.utc).replace(tzinfo=None).isoformat(),
+        'count': count
+    }
+    for i, field in enumerate(('light', 'moisture', 'temperature')):
+        row[field] = float(sums[i]) / count
+        row[f'{field}_min'] = float(mins[i])
+        row[f'{field}_max'] = float(maxs[i])
+    return row
+
+# Rollup maintenance
+ROLLUP_BATCH_SIZE = int(os.environ.get('ROLLUP_BATCH_SIZE', 50000))
+ROLLUP_INTERVAL_SECONDS = float(os.environ.get('ROLLUP_INTERVAL_SECONDS', 300))  # 0 disables the background job
+
+def _merge_into_rollup(model, fresh):
+    """Merge a fresh aggregate (see rollups.py) into a rollup table"""
+    from rollups import from_epoch_seconds, merge_aggregates, to_epoch_seconds
+    keys = [(int(p), from_epoch_seconds(b)) for p, b in zip(fresh['plant_id'], fresh['bucket_start'])]
+    existing = {(row.plant_id, row.bucket_start): row for row in model.query.filter(
+        model.plant_id.in_({plant_id for plant_id, _ in keys}),
+        model.bucket_start.in_({bucket_start for _, bucket_start in keys})
+    ).all()}
+    stored = [existing[key] for key in keys if key in existing]
+    if stored:
+        fresh = merge_aggregates(fresh, {
+            'plant_id': np.array([row.plant_id for row in stored], dtype=np.int64),
+            'bucket_start': to_epoch_seconds([row.bucket_start for row in stored]),
+            'count': np.array([row.count for row in stored], dtype=np.int64),
+            'min': np.array([[row.light_min, row.moisture_min, row.temperature_min] for row in stored]),
+            'max': np.array([[row.light_max, row.moisture_max, row.temperature_max] for row in stored]),
+            'avg': np.array([[row.light_avg, row.moisture_avg, row.temperature_avg] for row in stored])
+        })
+
+    for i in range(len(fresh['plant_id'])):
+        key = (int(fresh['plant_id'][i]), from_epoch_seconds(fresh['bucket_start'][i]))
+        row = existing.get(key)
+        if row is None:
+            row = model(plant_id=key[0], bucket_start=key[1])
+            db.session.add(row)
+        row.count = int(fresh['count'][i])
+        row.light_min, row.moisture_min, row.temperature_min = (float(v) for v in fresh['min'][i])
+        row.light_max, row.moisture_max, row.temperature_max = (float(v) for v in fresh['max'][i])
+        row.light_avg, row.moisture_avg, row.temperature_avg = (float(v) for v in fresh['avg'][i])
+
+_rollup_lock = threading.Lock()  # The background job and archival must not fold the same rows twice
+
+def update_sensor_rollups(batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Fold raw readings added since the last run into the hourly and daily rollups.
+
+    Reads only rows with id above the stored watermark, aggregates each batch with
+    NumPy, merges it into the existing rollup rows and advances the watermark in
+    the same transaction. Must run inside an app context.
+
+    Returns:
+        int: Number of raw readings processed
+    """
+    from rollups import aggregate_readings, to_epoch_seconds
+    processed = 0
+    with _rollup_lock:
+        while True:
+            watermark = RollupWatermark.query.filter_by(name=SENSOR_ROLLUP_WATERMARK).with_for_update().first()
+            if watermark is None:
+                watermark = RollupWatermark(name=SENSOR_ROLLUP_WATERMARK, last_reading_id=0)
+                db.session.add(watermark)
+                db.session.flush()
+
+            rows = db.session.query(
+                SensorReading.id, SensorReading.plant_id, SensorReading.timestamp,
+                SensorReading.light, SensorReading.moisture, SensorReading.temperature
+            ).filter(SensorReading.id > watermark.last_reading_id)\
+                .order_by(SensorReading.id).limit(batch_size).all()
+            if not rows:
+                db.session.commit()
+                return processed
+
+            ids, plant_ids, timestamps, light, moisture, temperature = zip(*rows)
+            epochs = to_epoch_seconds(timestamps)
+            values = np.column_stack([light, moisture, temperature]).astype(np.float64)
+            for model in ROLLUP_MODELS:
+                _merge_into_rollup(model, aggregate_readings(plant_ids, epochs, values, model.BUCKET_SECONDS))
+
+            watermark.last_reading_id = max(ids)
+            db.session.commit()
+            processed += len(rows)
+
+# Retention: raw readings older than this move to per-plant monthly archive files
+SENSOR_RETENTION_DAYS = int(os.environ.get('SENSOR_RETENTION_DAYS', 0))  # 0 keeps raw readings forever
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', 86400))
+
+def archive_old_readings(retention_days=SENSOR_RETENTION_DAYS, archive_dir=ARCHIVE_DIR, batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Move raw readings older than the retention window into archive files.
+
+    The rollups are brought up to date first and only rows they already cover are
+    archived, so bucketed history is unaffected. The newest reading of every plant
+    is always kept, so the dashboard still shows a last known value. Files are
+    written before the rows are deleted; a batch interrupted in between is simply
+    archived again (append_to_archive skips ids it already has).
+
+    Args:
+        retention_days: Days of raw readings to keep in sensor_readings
+        archive_dir: Directory for the .npz files (see reading_archive.py)
+        batch_size: Rows moved per transaction
+
+    Returns:
+        int: Number of readings archived
+    """
+    from reading_archive import append_to_archive
+    if not retention_days or retention_days <= 0:
+        return 0
+
+    update_sensor_rollups()
+    watermark = db.session.get(RollupWatermark, SENSOR_ROLLUP_WATERMARK)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    newest_per_plant = db.select(db.func.max(SensorReading.id)).group_by(SensorReading.plant_id)
+    if SENSOR_READINGS_PARTITIONED:
+        return _archive_expired_partitions(cutoff, archive_dir, watermark, newest_per_plant, batch_size)
+
+    archived = 0
+    while True:
+        rows = db.session.query(
+            SensorReading.id, SensorReading.plant_id, SensorReading.timestamp,
+            SensorReading.light, SensorReading.moisture, SensorReading.temperature
+        ).filter(
+            SensorReading.timestamp < cutoff,
+            SensorReading.id <= watermark.last_reading_id,
+            SensorReading.id.not_in(newest_per_plant)
+        ).order_by(SensorReading.plant_id, SensorReading.timestamp, SensorReading.id).limit(batch_size).all()
+        if not rows:
+            return archived
+
+        months = {}
+        for row in rows:
+            months.setdefault((row.plant_id, row.timestamp.year, row.timestamp.month), []).append(row)
+        for (plant_id, year, month), month_rows in months.items():
+            ids, _, timestamps, light, moisture, temperature = zip(*month_rows)
+            append_to_archive(archive_dir, plant_id, year, month, ids, timestamps, light, moisture, temperature)
+
+        ids = [row.id for row in rows]
+        for i in range(0, len(ids), 1000):
+            SensorReading.query.filter(SensorReading.id.in_(ids[i:i + 1000])).delete(synchronize_session=False)
+        db.session.commit()
+        archived += len(rows)
+
+
+def _archive_expired_partitions(cutoff, archive_dir, watermark, newest_per_plant, batch_size):
+    """
+    Partitioned variant of archive_old_readings(): archive whole expired months and
+    drop their partitions instead of deleting rows (retention is month-granular).
+    """
+    from partitions import drop_partition, expired_partitions
+    from reading_archive import append_to_archive
+    archived = 0
+    for name in expired_partitions(db.session.connection(), cutoff):
+        partition = db.table(name, *(db.column(c) for c in
+                                     ('id', 'plant_id', 'timestamp', 'light', 'moisture', 'temperature')))
+        if (db.session.execute(db.select(db.func.max(partition.c.id))).scalar() or 0) > watermark.last_reading_id:
+            print(f'[ARCHIVE] Skipping {name}: it has readings the rollups do not cover yet')
+            continue
+
+        # Each plant's newest reading stays hot (re-inserted by drop_partition), so like
+        # the plain path it is not archived as well
+        keep_ids = set(db.session.execute(db.select(partition.c.id)
+                                        .where(partition.c.id.in_(newest_per_plant))).scalars())
+        last_id = 0
+        while True:
+            rows = db.session.execute(db.select(partition).where(partition.c.id > last_id)
+                                      .order_by(partition.c.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            rows = [row for row in rows if row.id not in keep_ids]
+            plants = {}
+            for row in rows:
+                plants.setdefault(row.plant_id, []).append(row)
+            for plant_id, plant_rows in plants.items():
+                ids, _, timestamps, light, moisture, temperature = zip(*plant_rows)
+                append_to_archive(archive_dir, plant_id, timestamps[0].year, timestamps[0].month,
+                                  ids, timestamps, light, moisture, temperature)
+            archived += len(rows)
+
+        drop_partition(db.session.connection(), name, keep_ids)
+        db.session.commit()
+        print(f'[ARCHIVE] Dropped partition {name}')
+    db.session.commit()
+    return archived
+
+
+def _range_reaches_archive(plant_id, start):
+    """True if readings from `start` on may live in the archive (older than the oldest retained one)"""
+    if start is None:
+        return False
+    oldest = db.session.query(db.func.min(SensorReading.timestamp)).filter(SensorReading.plant_id == plant_id).scalar()
+    return oldest is None or start < oldest
+
 @app.route('/api/sensor-data/history', methods=['GET'])
 @login_required
 def get_sensor_history():
-    """Get sensor reading history"""
+    """
+    Get sensor reading history (oldest first).
+
+    Query params:
+        plant_id: Plant to fetch (required)
+        limit: Maximum rows to return (default 20)
+        since_id: Only return readings with id > since_id (incremental fetch)
+        since: Only return readings with timestamp > since (ISO-8601)
+        start, end: Time range (ISO-8601, end defaults to now)
+        bucket: Downsample the range into buckets (e.g. 1m, 1h, 1d); requires start.
+                Each row then holds the bucket start, count, and mean (as light/
+                moisture/temperature) plus *_min/*_max of every sensor value.
+
+    Without a cursor the newest `limit` readings are returned. With a cursor the
+    oldest `limit` readings after it are returned, so a client that fell behind
+    can page forward without gaps.
+
+    Responses carry a strong ETag derived from the plant's highest reading id (plus
+    the rollup watermark for bucketed responses) and a Last-Modified from its newest
+    reading; a matching If-None-Match / If-Modified-Since gets 304 Not Modified
+    without querying the history at all. The ETag uses ids rather than timestamps,
+    so readings backfilled with old timestamps (batch uploads, spool replays from
+    the Pi) change it; If-Modified-Since cannot see those and, as in RFC 9110, is
+    only used when the request has no If-None-Match.
+    """
     plant_id = request.args.get('plant_id', type=int)
     limit = request.args.get('limit', 20, type=int)
+    since_id = request.args.get('since_id', type=int)
+    since = request.args.get('since')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    bucket = request.args.get('bucket')
     
     if not plant_id:
         return jsonify({'error': 'plant_id required'}), 400
@@ -665,15 +1486,95 @@ def get_sensor_history():
     if not plant:
         return jsonify({'error': 'Plant not found'}), 404
     
-    readings = SensorReading.query.filter_by(plant_id=plant_id)\
-        .order_by(SensorReading.timestamp.desc()).limit(limit).all()
+    try:
+        since = _parse_reading_timestamp(since) if since else None
+        start = _parse_reading_timestamp(start) if start else None
+        end = _parse_reading_timestamp(end) if end else None
+    except ValueError:
+        return jsonify({'error': 'since, start and end must be ISO-8601 timestamps'}), 400
     
-    return jsonify([{
-        'light': r.light,
-        'moisture': r.moisture,
-        'temperature': r.temperature,
-        'timestamp': r.timestamp.isoformat()
-    } for r in reversed(readings)])
+    bucket_seconds = None
+    if bucket:
+        try:
+            bucket_seconds = _parse_bucket(bucket)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if start is None:
+            return jsonify({'error': 'start is required when bucket is given'}), 400
+        end = end or datetime.utcnow()
+        if end <= start:
+            return jsonify({'error': 'end must be after start'}), 400
+        # Widen the range to whole buckets so edge buckets are complete
+        from rollups import from_epoch_seconds, to_epoch_seconds
+        start_epoch, end_epoch = (int(t) for t in to_epoch_seconds([start, end]))
+        start = from_epoch_seconds(start_epoch // bucket_seconds * bucket_seconds)
+        end = from_epoch_seconds(-(-end_epoch // bucket_seconds) * bucket_seconds)
+        if (end - start).total_seconds() / bucket_seconds > MAX_HISTORY_BUCKETS:
+            return jsonify({'error': f'Too many buckets (max {MAX_HISTORY_BUCKETS}); use a larger bucket'}), 400
+    
+    # Validator: highest reading id of the plant (one lookup in ix_sensor_readings_plant_id_id).
+    # Bucketed responses also depend on how far the rollups have been folded
+    max_id = db.session.query(db.func.max(SensorReading.id)).filter(SensorReading.plant_id == plant_id).scalar()
+    version = f'{max_id or 0}'
+    if bucket_seconds:
+        watermark = db.session.get(RollupWatermark, SENSOR_ROLLUP_WATERMARK)
+        version += f'.{watermark.last_reading_id if watermark else 0}'
+    params_digest = hashlib.sha1(f'{limit}|{since_id}|{since}|{start}|{end}|{bucket_seconds}'.encode()).hexdigest()[:12]
+    etag = f'{plant_id}-{version}-{params_digest}'
+    latest = get_latest_reading(plant_id)  # Cache, or one indexed lookup
+    last_modified = latest['timestamp'].replace(tzinfo=timezone.utc, microsecond=0) if latest else None
+    
+    not_modified = False
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified:
+        not_modified = last_modified <= request.if_modified_since
+    
+    if not_modified:
+        response = Response(status=304)
+    elif bucket_seconds:
+        response = jsonify(downsample_readings(plant_id, start, end, bucket_seconds))
+    else:
+        query = SensorReading.query.filter_by(plant_id=plant_id)
+        if start is not None:
+            query = query.filter(SensorReading.timestamp >= start)
+        if end is not None:
+            query = query.filter(SensorReading.timestamp < end)
+        if since_id is not None:
+            readings = query.filter(SensorReading.id > since_id)\
+                .order_by(SensorReading.id).limit(limit).all()
+        elif since is not None:
+            readings = query.filter(SensorReading.timestamp > since)\
+                .order_by(SensorReading.timestamp).limit(limit).all()
+        else:
+            readings = list(reversed(query.order_by(SensorReading.timestamp.desc()).limit(limit).all()))
+        readings = [reading_snapshot(r) for r in readings]
+        
+        # Time-ranged queries reaching past the retention window also read the archive
+        lower = max(t for t in (since, start) if t is not None) if since or start else None
+        if since_id is None and (since is not None or len(readings) < limit) \
+                and _range_reaches_archive(plant_id, lower):
+            from reading_archive import iter_archived_readings
+            hot_ids = {r['id'] for r in readings}  # Older archives may repeat a plant's kept newest reading
+            archived = [r for r in iter_archived_readings(ARCHIVE_DIR, plant_id, lower, end)
+                        if r['id'] not in hot_ids and (since is None or r['timestamp'] > since)]
+            readings = sorted(archived + readings, key=lambda r: (r['timestamp'], r['id']))
+            readings = readings[:limit] if since is not None else readings[-limit:]
+        
+        response = jsonify([{
+            'id': r['id'],
+            'light': r['light'],
+            'moisture': r['moisture'],
+            'temperature': r['temperature'],
+            'timestamp': r['timestamp'].isoformat()
+        } for r in readings])
+    
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Let browsers cache but always revalidate (cheap 304s for idle polls)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @app.route('/api/weather', methods=['GET'])
@@ -694,78 +1595,8 @@ def get_weather():
         lat = float(lat)
         lon = float(lon)
         
-        grid_url = f'https://api.weather.gov/points/{lat},{lon}'
-        grid_response = requests.get(grid_url, headers=NWS_HEADERS, timeout=10)
-        
-        if not grid_response.ok:
-            raise Exception('Failed to get grid point')
-        
-        grid_data = grid_response.json()
-        forecast_url = grid_data['properties']['forecast']
-        
-        forecast_response = requests.get(forecast_url, headers=NWS_HEADERS, timeout=10)
-        if not forecast_response.ok:
-            raise Exception('Failed to get forecast')
-        
-        forecast_data = forecast_response.json()
-        current_period = forecast_data['properties']['periods'][0]
-        
-        observation_data = None
-        try:
-            observation_url = grid_data['properties']['observationStations']
-            stations_response = requests.get(observation_url, headers=NWS_HEADERS, timeout=10)
-            
-            if stations_response.ok:
-                stations_data = stations_response.json()
-                if stations_data.get('features') and len(stations_data['features']) > 0:
-                    station_id = stations_data['features'][0]['properties']['stationIdentifier']
-                    obs_response = requests.get(
-                        f'https://api.weather.gov/stations/{station_id}/observations/latest',
-                        headers=NWS_HEADERS,
-                        timeout=10
-                    )
-                    if obs_response.ok:
-                        observation_data = obs_response.json()
-        except Exception as e:
-            print(f'Could not fetch observations: {e}')
-        
-        temp = current_period['temperature']  # This is already in Fahrenheit from forecast
-        humidity = current_period.get('relativeHumidity', {}).get('value')  # Try forecast first
-        
-        # Get more accurate data from observations if available
-        if observation_data and observation_data.get('properties'):
-            props = observation_data['properties']
-            if props.get('temperature') and props['temperature'].get('value'):
-                # NWS observation temperature is in Celsius, convert to Fahrenheit
-                temp_celsius = props['temperature']['value']
-                if temp_celsius is not None:
-                    temp = (temp_celsius * 9/5) + 32
-            # Prefer observation humidity if available
-            if props.get('relativeHumidity') and props['relativeHumidity'].get('value') is not None:
-                humidity = props['relativeHumidity']['value']
-        
-        # If humidity is not available, return None (don't use fake fallback)
-        # Frontend will handle missing humidity gracefully
-        
-        # Get wind speed - ALWAYS use forecast wind speed (not observation)
-        # The forecast wind speed is in format like "5 to 10 mph" or "8 mph"
-        forecast_wind_str = current_period.get('windSpeed', '5 mph')
-        wind_speed = _parse_wind_speed(forecast_wind_str)
-        
-        print(f'[WEATHER] Using forecast wind: "{forecast_wind_str}" -> {wind_speed} mph')
-        
-        # Ignore observation wind speed - it can be inaccurate or from a different time
-        
-        weather = {
-            'temperature': round(temp, 1),
-            'humidity': round(humidity, 1),
-            'precipitation': current_period.get('probabilityOfPrecipitation', {}).get('value', 0),
-            'windSpeed': round(wind_speed, 1),
-            'forecast': current_period.get('shortForecast', 'Unknown'),
-            'description': current_period.get('detailedForecast', ''),
-            'timestamp': datetime.now().isoformat()
-        }
-        
+        weather_prefetcher.touch(lat, lon)
+        weather = weather_service.current_weather(lat, lon)
         return jsonify(weather)
         
     except Exception as e:
@@ -776,34 +1607,6 @@ def get_weather():
             'message': 'Weather data temporarily unavailable.'
         }), 503
 
-def _parse_wind_speed(wind_string):
-    """Parse wind speed from NWS format (e.g., '5 to 10 mph', '5-10 mph', 'Calm', '8 mph')"""
-    try:
-        import re
-        # Handle "Calm" or empty
-        if not wind_string or wind_string.lower() in ['calm', 'none', '']:
-            return 0.0
-        
-        # Convert to string if not already
-        wind_str = str(wind_string).strip()
-        
-        # Extract numbers from string like "5 to 10 mph", "5-10 mph", or "8 mph"
-        numbers = re.findall(r'\d+(?:\.\d+)?', wind_str)
-        if numbers:
-            # If range like "5 to 10" or "5-10", take the average
-            if len(numbers) >= 2:
-                avg = (float(numbers[0]) + float(numbers[1])) / 2
-                print(f'Parsed wind range {wind_str} -> average: {avg} mph')
-                return avg
-            else:
-                value = float(numbers[0])
-                print(f'Parsed wind speed {wind_str} -> {value} mph')
-                return value
-    except Exception as e:
-        print(f'Error parsing wind speed: {e}, string: {wind_string}')
-    print(f'Using default wind speed 5.0 mph for: {wind_string}')
-    return 5.0  # Default reasonable wind speed
-
 @app.route('/api/predict', methods=['POST'])
 @login_required
 def predict_watering():
@@ -811,7 +1614,16 @@ def predict_watering():
     try:
         data = request.json
         sensor = data.get('sensor', {})
-        weather = data.get('weather', {})
+        # Prefer the server's shared weather snapshot; client-sent values are the fallback
+        weather = dict(data.get('weather') or {})
+        if current_user.latitude is not None and current_user.longitude is not None:
+            weather_prefetcher.touch(current_user.latitude, current_user.longitude)
+            try:
+                weather.update(weather_service.snapshot(current_user.latitude, current_user.longitude,
+                                                        WEATHER_SNAPSHOT_MAX_AGE))
+            except Exception as e:
+                print(f'Using client weather for prediction: {e}')
+        weather = {key: value for key, value in weather.items() if value is not None}
         
         # Extract features for prediction model
         # If moisture data is available, use it; otherwise use weather-only
@@ -894,7 +1706,9 @@ def get_watering_frequency_recommendation(frequency_days):
     else:
         return f'Water every {round(frequency_days)} days'
 
-def calculate_plant_health_score(plant_id):
+from health_rules import health_results, oldest_first, score_readings, stack_readings
+
+def calculate_plant_health_score(plant_id, recent_readings=None):
     """
     Calculate plant health score (0-100) based on sensor readings
     
@@ -925,265 +1739,212 @@ def calculate_plant_health_score(plant_id):
        - Rapid decline = 5 points
     
     Total Health Score = Moisture + Temperature + Light + Trend
-    """
-    # Get recent readings
-    recent_readings = SensorReading.query.filter_by(plant_id=plant_id)\
-        .order_by(SensorReading.timestamp.desc()).limit(5).all()
-    
-    if not recent_readings:
-        return {
-            'score': 50,  # Default if no data
-            'status': 'Unknown',
-            'details': {
-                'moisture_score': 0,
-                'temperature_score': 0,
-                'light_score': 0,
-                'trend_score': 10
-            },
-            'factors': ['No sensor data available']
-        }
-    
-    latest = recent_readings[0]
-    
-    # 1. Moisture Score (0-30 points)
-    moisture = latest.moisture
-    if 40 <= moisture <= 70:
-        moisture_score = 30
-        moisture_status = 'optimal'
-    elif 30 <= moisture < 40 or 70 < moisture <= 80:
-        moisture_score = 20
-        moisture_status = 'good'
-    elif 20 <= moisture < 30 or 80 < moisture <= 90:
-        moisture_score = 10
-        moisture_status = 'fair'
-    else:
-        moisture_score = 0
-        moisture_status = 'poor'
     
-    # 2. Temperature Score (0-25 points)
-    temp = latest.temperature
-    if 65 <= temp <= 80:
-        temp_score = 25
-        temp_status = 'optimal'
-    elif 60 <= temp < 65 or 80 < temp <= 85:
-        temp_score = 18
-        temp_status = 'good'
-    elif 55 <= temp < 60 or 85 < temp <= 90:
-        temp_score = 10
-        temp_status = 'fair'
-    else:
-        temp_score = 0
-        temp_status = 'poor'
+    The bands are implemented as lookup tables in health_rules.py, which also
+    scores whole batches (see compute_plant_health).
     
-    # 3. Light Score (0-25 points)
-    light = latest.light
-    if 300 <= light <= 800:
-        light_score = 25
-        light_status = 'optimal'
-    elif 200 <= light < 300 or 800 < light <= 1000:
-        light_score = 18
-        light_status = 'good'
-    elif 100 <= light < 200 or 1000 < light <= 1500:
-        light_score = 10
-        light_status = 'fair'
-    else:
-        light_score = 0
-        light_status = 'poor'
-    
-    # 4. Trend Score (0-20 points) - Analyze recent trend
-    trend_score = 20
-    if len(recent_readings) >= 3:
-        # Calculate average change rates
-        moisture_changes = []
-        temp_changes = []
-        
-        for i in range(len(recent_readings) - 1):
-            prev = recent_readings[i + 1]
-            curr = recent_readings[i]
-            
-            # Moisture declining is bad
-            moisture_changes.append(curr.moisture - prev.moisture)
-            # Temperature stability is good
-            temp_changes.append(abs(curr.temperature - prev.temperature))
-        
-        avg_moisture_change = sum(moisture_changes) / len(moisture_changes)
-        avg_temp_stability = 10 - (sum(temp_changes) / len(temp_changes))
-        
-        # Moisture declining rapidly
-        if avg_moisture_change < -5:
-            trend_score -= 10
-        elif avg_moisture_change < -2:
-            trend_score -= 5
-        
-        # Temperature unstable
-        if avg_temp_stability < 5:
-            trend_score -= 5
-        
-        trend_score = max(0, min(20, trend_score))
-    
-    # Calculate total score
-    total_score = moisture_score + temp_score + light_score + trend_score
-    total_score = max(0, min(100, total_score))
-    
-    # Determine status
-    if total_score >= 80:
-        status = 'Excellent'
-    elif total_score >= 65:
-        status = 'Good'
-    elif total_score >= 50:
-        status = 'Fair'
-    elif total_score >= 30:
-        status = 'Poor'
-    else:
-        status = 'Critical'
-    
-    # Generate factors/feedback
-    factors = []
-    if moisture_status == 'poor':
-        factors.append('Soil moisture is too ' + ('low' if moisture < 20 else 'high'))
-    elif moisture_status == 'fair':
-        factors.append('Soil moisture is suboptimal')
-    
-    if temp_status == 'poor':
-        factors.append('Temperature is too ' + ('low' if temp < 55 else 'high'))
-    elif temp_status == 'fair':
-        factors.append('Temperature is outside optimal range')
-    
-    if light_status == 'poor':
-        factors.append('Light levels are too ' + ('low' if light < 100 else 'high'))
-    elif light_status == 'fair':
-        factors.append('Light levels are suboptimal')
-    
-    if trend_score < 15:
-        factors.append('Recent readings show declining conditions')
-    
-    if not factors:
-        factors.append('All conditions are optimal')
+    Args:
+        recent_readings: The plant's last HEALTH_READING_WINDOW readings, newest first
+                         (anything with moisture/temperature/light attributes); queried
+                         when None
+    """
+    # Get recent readings
+    if recent_readings is None:
+        recent_readings = SensorReading.query.filter_by(plant_id=plant_id)\
+            .order_by(SensorReading.timestamp.desc()).limit(HEALTH_READING_WINDOW).all()
     
-    return {
-        'score': round(total_score, 1),
-        'status': status,
-        'details': {
-            'moisture_score': round(moisture_score, 1),
-            'temperature_score': round(temp_score, 1),
-            'light_score': round(light_score, 1),
-            'trend_score': round(trend_score, 1)
-        },
-        'factors': factors,
-        'current_values': {
-            'moisture': round(moisture, 1),
-            'temperature': round(temp, 1),
-            'light': round(light, 1)
-        }
-    }
+    readings, counts = stack_readings([recent_readings], HEALTH_READING_WINDOW)
+    return health_results(score_readings(readings, counts))[0]
+
+HEALTH_READING_WINDOW = 5  # Readings used for current values and trends
+HEALTH_SCORING_BATCH_SIZE = int(os.environ.get('HEALTH_SCORING_BATCH_SIZE', 1000))  # Plants per transaction
+HEALTH_SCORING_INTERVAL_SECONDS = float(os.environ.get('HEALTH_SCORING_INTERVAL_SECONDS', 0))  # 0 = score_fleet.py only
+# /api/plant-health serves a stored snapshot up to this old (seconds) while no newer reading exists;
+# weather and plant age still change without new readings
+HEALTH_SNAPSHOT_MAX_AGE = float(os.environ.get('HEALTH_SNAPSHOT_MAX_AGE', WEATHER_SNAPSHOT_MAX_AGE))
+health_request_counts = {'served': 0, 'recomputed': 0}  # /api/plant-health snapshot hits vs recomputes
+health_request_counts_lock = threading.Lock()
+
+def count_health_request(outcome):
+    with health_request_counts_lock:
+        health_request_counts[outcome] += 1
+
+def snapshot_is_current(snapshot, latest_reading_id):
+    """True if a PlantHealthSnapshot covers the plant's latest reading and is recent enough"""
+    if (datetime.utcnow() - snapshot.computed_at).total_seconds() >= HEALTH_SNAPSHOT_MAX_AGE:
+        return False
+    if latest_reading_id is None:
+        return snapshot.reading_id is None
+    return snapshot.reading_id is not None and snapshot.reading_id >= latest_reading_id
+
+def fetch_recent_readings(plant_ids, limit=HEALTH_READING_WINDOW):
+    """
+    The last `limit` readings of each plant.
+
+    On Postgres this is one round trip: a JOIN LATERAL runs ORDER BY timestamp DESC
+    LIMIT n per plant, answered from the (plant_id, timestamp) index, so only
+    `limit` rows per plant are read no matter how long its history is (a window
+    function over the batch would scan it all). SQLite has no LATERAL; it runs the
+    same indexed query once per plant, which costs no network round trips there.
+
+    Returns:
+        dict: plant_id -> list of rows (id, plant_id, light, moisture, temperature,
+              timestamp), newest first; plants without readings map to []
+    """
+    columns = (SensorReading.id, SensorReading.plant_id, SensorReading.light, SensorReading.moisture,
+               SensorReading.temperature, SensorReading.timestamp)
+    newest_first = (SensorReading.timestamp.desc(), SensorReading.id.desc())
+    readings = {plant_id: [] for plant_id in plant_ids}
+    if not readings:
+        return readings
+
+    if db.engine.dialect.name != 'postgresql':
+        for plant_id in readings:
+            readings[plant_id] = db.session.query(*columns).filter(SensorReading.plant_id == plant_id)\
+                .order_by(*newest_first).limit(limit).all()
+        return readings
+
+    recent = db.select(*columns).where(SensorReading.plant_id == Plant.id)\
+        .order_by(*newest_first).limit(limit).lateral('recent')
+    rows = db.session.execute(
+        db.select(recent).select_from(Plant).join(recent, db.true())
+        .where(Plant.id.in_(list(readings)))
+        .order_by(recent.c.plant_id, recent.c.timestamp.desc(), recent.c.id.desc())
+    ).all()
+    for row in rows:
+        readings[row.plant_id].append(row)
+    return readings
+
+def compute_plant_health(plants, readings_by_plant, weather_rows):
+    """
+    /api/plant-health results for many plants, with one model call for all of them.
+
+    Args:
+        plants: Plant objects
+        readings_by_plant: plant_id -> recent readings, newest first (see fetch_recent_readings)
+        weather_rows: Weather snapshot dict per plant (see get_weather_snapshot)
+
+    Returns:
+        list: One response dict per plant, in order
+    """
+    # One readings array (newest first) feeds both the rule-based scorer and the classifier
+    readings, counts = stack_readings([readings_by_plant[plant.id] for plant in plants], HEALTH_READING_WINDOW)
+    rule_based = health_results(score_readings(readings, counts))
+    if health_classifier is None:
+        return [dict(result, model_type='Rule-Based') for result in rule_based]
+
+    try:
+        weather = np.array([[row.get('temperature', np.nan), row.get('humidity', np.nan), row.get('precipitation', np.nan)]
+                            for row in weather_rows], dtype=float)
+        now = datetime.now()
+        age_days = np.array([(now - plant.created_at).days if plant.created_at else 30 for plant in plants], dtype=float)
+
+        # The classifier gets each plant's readings oldest first, as get_plant_health always passed them
+        features = health_classifier.extract_features_batch(oldest_first(readings, counts), weather,
+                                                            {'age_days': age_days}, counts)
+        ml_results = health_classifier.predict_batch(features)
+    except Exception as e:
+        print(f'Error using ML health model: {e}')
+        return [dict(result, model_type='Rule-Based (ML failed)') for result in rule_based]
+
+    return [{
+        'score': float(ml_result['score_estimate']),
+        'status': str(ml_result['category']),
+        'confidence': float(ml_result['confidence']),
+        'probabilities': {str(category): float(p) for category, p in ml_result['probabilities'].items()},
+        'model_type': 'ML (Random Forest)' if health_classifier.is_trained else 'Rule-Based',
+        'details': rule.get('details', {}),
+        'factors': rule.get('factors', []),
+        'current_values': rule.get('current_values', {})
+    } for ml_result, rule in zip(ml_results, rule_based)]
+
+def save_health_snapshots(plants, readings_by_plant, results):
+    """Replace the plants' plant_health_snapshots rows (caller commits)"""
+    PlantHealthSnapshot.query.filter(PlantHealthSnapshot.plant_id.in_([plant.id for plant in plants])).delete()
+    computed_at = datetime.utcnow()
+    db.session.add_all([PlantHealthSnapshot(
+        plant_id=plant.id,
+        reading_id=readings_by_plant[plant.id][0].id if readings_by_plant[plant.id] else None,
+        score=result['score'],
+        status=result['status'],
+        model_type=result['model_type'],
+        result=result,
+        computed_at=computed_at
+    ) for plant, result in zip(plants, results)])
+
+def score_plant_health_fleet(batch_size=HEALTH_SCORING_BATCH_SIZE):
+    """
+    Recompute plant_health_snapshots for every plant.
+
+    Per batch of plants: one JOIN LATERAL query for the recent readings (an indexed LIMIT per plant),
+    weather looked up once per owner location (the weather service shares it per grid
+    cell), one feature matrix and one model call.
+
+    Returns:
+        int: Number of plants scored
+    """
+    scored = 0
+    last_plant_id = 0
+    weather_by_location = {}
+    while True:
+        rows = db.session.query(Plant, User.latitude, User.longitude)\
+            .join(User, Plant.user_id == User.id)\
+            .filter(Plant.id > last_plant_id).order_by(Plant.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        plants = [plant for plant, _, _ in rows]
+        weather_rows = []
+        for _, lat, lon in rows:
+            if (lat, lon) not in weather_by_location:
+                weather_by_location[(lat, lon)] = get_weather_snapshot(lat, lon, track_activity=False)
+            weather_rows.append(weather_by_location[(lat, lon)])
+
+        readings_by_plant = fetch_recent_readings([plant.id for plant in plants])
+        results = compute_plant_health(plants, readings_by_plant, weather_rows)
+        save_health_snapshots(plants, readings_by_plant, results)
+        db.session.commit()
+
+        scored += len(plants)
+        last_plant_id = plants[-1].id
+        db.session.expunge_all()
+    return scored
 
 @app.route('/api/plant-health/<int:plant_id>', methods=['GET'])
 @login_required
 def get_plant_health(plant_id):
-    """Get plant health score for a specific plant using ML model if available"""
+    """
+    Get plant health score for a specific plant using ML model if available.
+    
+    Served from the plant's stored snapshot while no newer reading has arrived (the
+    latest reading id comes from the in-memory cache) and the snapshot is younger
+    than HEALTH_SNAPSHOT_MAX_AGE; otherwise recomputed (one indexed LIMIT query for
+    the plant's recent readings) and stored.
+    """
     plant = Plant.query.filter_by(id=plant_id, user_id=current_user.id).first()
     if not plant:
         return jsonify({'error': 'Plant not found'}), 404
     
-    # Try ML model first if available
-    if health_classifier is not None:
-        try:
-            # Get recent sensor readings
-            recent_readings = SensorReading.query.filter_by(plant_id=plant_id)\
-                .order_by(SensorReading.timestamp.desc()).limit(5).all()
-            
-            # Format sensor readings for ML model (oldest first)
-            sensor_readings = []
-            for reading in reversed(recent_readings):
-                sensor_readings.append({
-                    'moisture': reading.moisture,
-                    'temperature': reading.temperature,
-                    'light': reading.light,
-                    'timestamp': reading.timestamp
-                })
-            
-            # Get current weather data (use user's location)
-            weather_data = {}
-            if current_user.latitude and current_user.longitude:
-                try:
-                    # Fetch weather from NWS API
-                    grid_url = f'https://api.weather.gov/points/{current_user.latitude},{current_user.longitude}'
-                    grid_response = requests.get(grid_url, headers=NWS_HEADERS, timeout=10)
-                    
-                    if grid_response.ok:
-                        grid_data = grid_response.json()
-                        forecast_url = grid_data['properties']['forecast']
-                        forecast_response = requests.get(forecast_url, headers=NWS_HEADERS, timeout=10)
-                        
-                        if forecast_response.ok:
-                            forecast_data = forecast_response.json()
-                            periods = forecast_data.get('properties', {}).get('periods', [])
-                            if periods:
-                                current = periods[0]
-                                weather_data = {
-                                    'temperature': current.get('temperature', 72),
-                                    'humidity': current.get('relativeHumidity', {}).get('value', 60),
-                                    'precipitation': current.get('probabilityOfPrecipitation', {}).get('value', 0)
-                                }
-                except Exception as e:
-                    print(f'Error fetching weather for health model: {e}')
-                    # Use defaults
-                    weather_data = {'temperature': 72, 'humidity': 60, 'precipitation': 0}
-            else:
-                # Use defaults if no location
-                weather_data = {'temperature': 72, 'humidity': 60, 'precipitation': 0}
-            
-            # Prepare plant data (currently minimal, will expand when plant data is available)
-            plant_data = {
-                'age_days': (datetime.now() - plant.created_at).days if plant.created_at else 30,
-                # TODO: Add more plant-specific data when available:
-                # 'plant_type': plant.plant_type,
-                # 'optimal_moisture_min': plant.optimal_moisture_min,
-                # 'optimal_moisture_max': plant.optimal_moisture_max,
-                # 'optimal_temp_min': plant.optimal_temp_min,
-                # 'optimal_temp_max': plant.optimal_temp_max,
-                # 'optimal_light_min': plant.optimal_light_min,
-                # 'optimal_light_max': plant.optimal_light_max,
-                # 'watering_frequency_days': plant.watering_frequency_days,
-                # 'days_since_last_watering': plant.days_since_last_watering,
-                # 'care_level': plant.care_level,
-                # 'native_climate': plant.native_climate,
-            }
-            
-            # Predict using ML model
-            ml_result = health_classifier.predict({
-                'sensor_readings': sensor_readings,
-                'weather_data': weather_data,
-                'plant_data': plant_data  # Pass plant data (will use defaults for missing fields)
-            })
-            
-            # Get rule-based score for details
-            rule_based = calculate_plant_health_score(plant_id)
-            
-            # Combine ML prediction with rule-based details
-            return jsonify({
-                'score': ml_result['score_estimate'],
-                'status': ml_result['category'],
-                'confidence': ml_result['confidence'],
-                'probabilities': ml_result['probabilities'],
-                'model_type': 'ML (Random Forest)' if health_classifier.is_trained else 'Rule-Based',
-                'details': rule_based.get('details', {}),
-                'factors': rule_based.get('factors', []),
-                'current_values': rule_based.get('current_values', {})
-            })
-        except Exception as e:
-            print(f'Error using ML health model: {e}')
-            import traceback
-            traceback.print_exc()
-            # Fallback to rule-based
-            health = calculate_plant_health_score(plant_id)
-            health['model_type'] = 'Rule-Based (ML failed)'
-            return jsonify(health)
-    else:
-        # Use rule-based calculation
-        health = calculate_plant_health_score(plant_id)
-        health['model_type'] = 'Rule-Based'
-        return jsonify(health)
+    latest = get_latest_reading(plant_id)
+    latest_id = latest['id'] if latest else None
+    snapshot = db.session.get(PlantHealthSnapshot, plant_id)
+    if snapshot is not None and snapshot_is_current(snapshot, latest_id):
+        count_health_request('served')
+        return jsonify(snapshot.result)
+    
+    # Stale or missing: recompute through the same path as the fleet job
+    count_health_request('recomputed')
+    readings_by_plant = fetch_recent_readings([plant_id])
+    weather = get_weather_snapshot(current_user.latitude, current_user.longitude)
+    result = compute_plant_health([plant], readings_by_plant, [weather])[0]
+    try:
+        save_health_snapshots([plant], readings_by_plant, [result])
+        db.session.commit()
+    except Exception as e:
+        # A concurrent poll may have stored it first; the response doesn't depend on it
+        db.session.rollback()
+        print(f'Could not store health snapshot for plant {plant_id}: {e}')
+    return jsonify(result)
 
 @app.route('/api/chat', methods=['POST'])
 @login_required
@@ -1413,13 +2174,155 @@ def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+@app.route('/api/metrics', methods=['GET'])
+@login_required
+def get_metrics():
+    """Operational metrics: outbound HTTP per host and in-process caches"""
+    return jsonify({
+        'http': http_client.metrics(),
+        'circuit_breakers': http_client.breaker_states(),
+        'caches': {
+            'latest_readings': latest_readings.stats(),
+            'grid_points': grid_points.stats(),
+            'geocoding': geocoder.stats(),
+            'forecasts': forecasts.stats(),
+            'observations': observations.stats(),
+            'weather_snapshots': weather_service.stats()
+        },
+        'weather_prefetch': weather_prefetcher.stats(),
+        'health_snapshots': dict(health_request_counts),
+        'sensor_stream': {
+            'subscribers': sensor_stream.subscriber_count(),
+            'notifications_active': sensor_stream.notifications_active
+        },
+        'timestamp': datetime.now().isoformat()
+    })
+
 # Initialize database
 def init_db():
     """Initialize database tables"""
     with app.app_context():
         db.create_all()
+        if SENSOR_READINGS_PARTITIONED:
+            try:
+                ensure_sensor_partitions()
+            except Exception as e:
+                print(f'Error creating sensor_readings partitions: {e}')
+
+def ensure_sensor_partitions():
+    """Create upcoming monthly sensor_readings partitions (must run inside an app context)"""
+    from partitions import ensure_partitions, is_partitioned
+    with db.engine.begin() as conn:
+        if not is_partitioned(conn):
+            print('⚠️  SENSOR_READINGS_PARTITIONED is set but sensor_readings is a plain table')
+            print('   Run `python partitions.py migrate` to convert it')
+            return []
+        created = ensure_partitions(conn)
+    if created:
+        print(f'[PARTITIONS] Created {", ".join(created)}')
+    return created
+
+def _rollup_loop():
+    """Keep the rollup tables current (runs in a daemon thread)"""
+    while True:
+        with app.app_context():
+            try:
+                processed = update_sensor_rollups()
+                if processed:
+                    print(f'[ROLLUPS] Folded {processed} new reading(s) into rollups')
+            except Exception as e:
+                db.session.rollback()
+                print(f'Error updating sensor rollups: {e}')
+        time.sleep(ROLLUP_INTERVAL_SECONDS)
+
+def _archive_loop():
+    """Apply the raw reading retention policy periodically (runs in a daemon thread)"""
+    while True:
+        with app.app_context():
+            try:
+                archived = archive_old_readings()
+                if archived:
+                    print(f'[ARCHIVE] Moved {archived} reading(s) older than {SENSOR_RETENTION_DAYS} days to {ARCHIVE_DIR}')
+            except Exception as e:
+                db.session.rollback()
+                print(f'Error archiving sensor readings: {e}')
+        time.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+def _health_scoring_loop():
+    """Refresh plant_health_snapshots periodically (runs in a daemon thread)"""
+    while True:
+        with app.app_context():
+            try:
+                started = time.perf_counter()
+                scored = score_plant_health_fleet()
+                print(f'[HEALTH] Scored {scored} plant(s) in {time.perf_counter() - started:.1f}s')
+            except Exception as e:
+                db.session.rollback()
+                print(f'Error scoring plant health: {e}')
+        time.sleep(HEALTH_SCORING_INTERVAL_SECONDS)
+
+def _partition_loop():
+    """Keep future monthly partitions in place (runs in a daemon thread)"""
+    while True:
+        time.sleep(86400)
+        with app.app_context():
+            try:
+                ensure_sensor_partitions()
+            except Exception as e:
+                print(f'Error creating sensor_readings partitions: {e}')
+
+def start_background_services():
+    """Start background threads (only when running the server, not on import)"""
+    if SENSOR_READINGS_PARTITIONED:
+        threading.Thread(target=_partition_loop, name='sensor-partitions', daemon=True).start()
+    if ROLLUP_INTERVAL_SECONDS > 0:
+        threading.Thread(target=_rollup_loop, name='sensor-rollups', daemon=True).start()
+    if SENSOR_RETENTION_DAYS > 0:
+        threading.Thread(target=_archive_loop, name='sensor-archive', daemon=True).start()
+    if WEATHER_PREFETCH_INTERVAL_SECONDS > 0:
+        weather_prefetcher.start()
+    if HEALTH_SCORING_INTERVAL_SECONDS > 0:
+        threading.Thread(target=_health_scoring_loop, name='health-scoring', daemon=True).start()
+
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            # Rows written directly by the Raspberry Pi reach the cache via LISTEN/NOTIFY
+            try:
+                from reading_listener import ReadingListener, install_notify_trigger
+                install_notify_trigger(db.engine)
+
+                def on_connect():
+                    # Notifications keep the cache exact - no expiry needed
+                    latest_readings.clear()
+                    latest_readings.ttl = None
+                    sensor_stream.notifications_active = True
+
+                def on_disconnect():
+                    # Notifications may be missed until reconnected - fall back to expiry
+                    # and let the stream poller take over
+                    latest_readings.clear()
+                    latest_readings.ttl = LATEST_READING_CACHE_TTL
+                    sensor_stream.notifications_active = False
+                    sensor_stream.wake()
+
+                ReadingListener(
+                    app.config['SQLALCHEMY_DATABASE_URI'],
+                    on_reading=lambda payload: record_new_reading(payload, from_notification=True),
+                    on_connect=on_connect,
+                    on_disconnect=on_disconnect
+                ).start()
+            except Exception as e:
+                print(f'⚠️  Warning: Could not start sensor reading listener: {e}')
+                print(f'   Latest-reading cache entries will expire after {LATEST_READING_CACHE_TTL:g}s')
 
 if __name__ == '__main__':
     init_db()
+    debug = True
+    use_reloader = debug  # app.run() enables the Werkzeug reloader in debug mode
+    # The reloader runs this module twice: a watcher parent and the child that serves
+    # requests (WERKZEUG_RUN_MAIN=true). Start the threads only in the serving process,
+    # otherwise every loop, the listener and weather prefetching would run twice
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
     port = int(os.environ.get('PORT', 5001))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    app.run(debug=debug, use_reloader=use_reloader, host='0.0.0.0', port=port)
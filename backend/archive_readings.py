@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Apply the raw sensor reading retention policy.
+
+Moves readings older than the retention window out of sensor_readings into
+compressed per-plant, per-month archive files (see reading_archive.py), after
+bringing the hourly/daily rollups up to date. The server does this once per
+ARCHIVE_INTERVAL_SECONDS when SENSOR_RETENTION_DAYS is set; this script runs it
+by hand or from cron.
+
+Usage:
+    python archive_readings.py                      # uses SENSOR_RETENTION_DAYS
+    python archive_readings.py --days 90
+    python archive_readings.py --days 90 --archive-dir /mnt/archive
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    from app import app, db, archive_old_readings, SensorReading, SENSOR_RETENTION_DAYS, ARCHIVE_DIR
+
+    parser = argparse.ArgumentParser(description='Archive sensor readings older than the retention window')
+    parser.add_argument('--days', type=int, default=SENSOR_RETENTION_DAYS,
+                        help='Days of raw readings to keep (default: SENSOR_RETENTION_DAYS)')
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help='Where archive files are written')
+    args = parser.parse_args()
+
+    if args.days <= 0:
+        print("❌ No retention window: set SENSOR_RETENTION_DAYS or pass --days")
+        return 1
+
+    print("=" * 70)
+    print("SENSOR READING ARCHIVAL")
+    print("=" * 70)
+
+    with app.app_context():
+        db.create_all()
+        before = SensorReading.query.count()
+        started = time.perf_counter()
+        archived = archive_old_readings(args.days, args.archive_dir)
+        print(f"Database: {db.engine.dialect.name}")
+        print(f"Retention: {args.days} days, archive: {args.archive_dir}")
+        print(f"✅ Archived {archived:,} of {before:,} reading(s) in {time.perf_counter() - started:.1f}s")
+
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark of scikit-learn forest inference against the flattened FlatForest.
+
+Loads watering_model.pkl and health_model.pkl (or, when a model has not been
+trained yet, fits a stand-in forest with the same hyperparameters on random
+data) and times:
+
+    sklearn:  model.predict() / model.predict_proba(), as the app used to call them
+    flat:     FlatForest.predict() / .predict_proba() (forest_eval.py)
+
+for a single row (one HTTP request) and for batches, and checks that both give
+identical outputs.
+
+Usage:
+    python benchmark_forest_eval.py
+    python benchmark_forest_eval.py --batch-sizes 1,100,10000 --repeats 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark flattened forest inference')
+    parser.add_argument('--batch-sizes', default='1,10,100,1000,10000',
+                        help='Comma-separated numbers of rows per call')
+    parser.add_argument('--repeats', type=int, default=100, help='Calls per single-row measurement')
+    return parser.parse_args()
+
+
+def load_forests():
+    """(name, fitted forest, n_features) for the watering and health models."""
+    from ml_model import WateringPredictionModel
+    from health_model import PlantHealthClassifier
+
+    rng = np.random.default_rng(42)
+    forests = []
+
+    watering = WateringPredictionModel()
+    if not watering.is_trained:
+        print("   watering_model.pkl not trained - using a stand-in forest on random data")
+        X = rng.uniform([20, 55, 30, 0], [80, 90, 90, 60], size=(500, 4))
+        watering.model.fit(X, rng.uniform(6, 168, len(X)))
+    forests.append(('watering (regressor)', watering.model))
+
+    health = PlantHealthClassifier()
+    if not health.is_trained:
+        print("   health_model.pkl not trained - using a stand-in forest on random data")
+        X = rng.normal(size=(2000, 22))
+        y = np.array(health.CATEGORIES)[np.digitize(X[:, 0] + 0.5 * X[:, 1], [-1.0, -0.3, 0.3, 1.0])]
+        health.model.fit(X, y)
+    forests.append(('health (classifier)', health.model))
+    return forests
+
+
+def time_call(fn, X, repeats):
+    """Median latency (ms) of fn(X)."""
+    fn(X)  # Warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    args = parse_args()
+    batch_sizes = sorted(int(size) for size in args.batch_sizes.split(','))
+
+    from forest_eval import FlatForest
+
+    print("=" * 70)
+    print("FOREST INFERENCE BENCHMARK")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    for name, forest in load_forests():
+        flat = FlatForest.from_sklearn(forest)
+        is_classifier = flat.classes is not None
+        sklearn_fn = forest.predict_proba if is_classifier else forest.predict
+        flat_fn = flat.predict_proba if is_classifier else flat.predict
+
+        print(f"\n{name}: {flat.n_trees} trees, {len(flat.feature):,} nodes, "
+              f"max depth {flat.max_depth}, n_jobs={forest.n_jobs}")
+        print(f"{'rows':>8} {'sklearn ms':>11} {'flat ms':>9} {'speedup':>8} {'identical':>10}")
+        for size in batch_sizes:
+            X = rng.normal(size=(size, flat.n_features)) * 20 + 50
+            identical = np.array_equal(sklearn_fn(X), flat_fn(X))
+            repeats = max(3, args.repeats // max(1, size // 100))
+            sklearn_ms = time_call(sklearn_fn, X, repeats)
+            flat_ms = time_call(flat_fn, X, repeats)
+            print(f"{size:>8,} {sklearn_ms:>11.3f} {flat_ms:>9.3f} {sklearn_ms / flat_ms:>7.1f}x "
+                  f"{'yes' if identical else 'NO':>10}")
+
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark for latest-reading lookups as sensor_readings grows.
+
+Fills a scratch database with synthetic readings in steps (10k -> 10M rows by
+default) and times the exact queries the dashboard runs:
+
+    latest:   filter_by(plant_id=...).order_by(timestamp.desc()).first()
+    recent5:  same query with .limit(5)   (health scoring)
+    recent20: same query with .limit(20)  (history chart)
+
+Each size is measured with and without ix_sensor_readings_plant_id_timestamp, so the
+output shows latency staying flat with the index and growing linearly without it.
+
+Usage:
+    python benchmark_latest_reading.py
+    python benchmark_latest_reading.py --sizes 10000,100000,1000000 --plants 200
+    python benchmark_latest_reading.py --database-url postgresql://...   # scratch DB only!
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark latest-reading queries')
+    parser.add_argument('--sizes', default='10000,100000,1000000,10000000',
+                        help='Comma-separated table sizes to measure')
+    parser.add_argument('--plants', type=int, default=100, help='Number of plants to spread readings over')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per measurement')
+    parser.add_argument('--database-url', default=None,
+                        help='Scratch database to use (default: temporary SQLite file). '
+                             'All sensor_readings rows in it are deleted first.')
+    return parser.parse_args()
+
+
+def insert_readings(db, SensorReading, start, count, n_plants, chunk_size=50000):
+    """Append `count` synthetic readings (10 s apart, round-robin over plants)."""
+    table = SensorReading.__table__
+    base_time = datetime(2024, 1, 1)
+    rng = np.random.default_rng(start)
+    written = 0
+    while written < count:
+        n = min(chunk_size, count - written)
+        offsets = np.arange(start + written, start + written + n)
+        light = rng.uniform(50, 1500, n)
+        moisture = rng.uniform(10, 90, n)
+        temperature = rng.uniform(55, 90, n)
+        rows = [{
+            'plant_id': int(offset % n_plants) + 1,
+            'light': float(light[i]),
+            'moisture': float(moisture[i]),
+            'temperature': float(temperature[i]),
+            'timestamp': base_time + timedelta(seconds=10 * int(offset // n_plants))
+        } for i, offset in enumerate(offsets)]
+        db.session.execute(table.insert(), rows)
+        db.session.commit()
+        written += n
+
+
+def time_queries(db, SensorReading, n_plants, n_queries):
+    """Median latency (ms) of each dashboard query over random plants."""
+    rng = np.random.default_rng(0)
+    plant_ids = rng.integers(1, n_plants + 1, n_queries)
+    results = {}
+    for name, limit in (('latest', 1), ('recent5', 5), ('recent20', 20)):
+        timings = []
+        for plant_id in plant_ids:
+            query = SensorReading.query.filter_by(plant_id=int(plant_id))\
+                .order_by(SensorReading.timestamp.desc())
+            started = time.perf_counter()
+            if limit == 1:
+                query.first()
+            else:
+                query.limit(limit).all()
+            timings.append((time.perf_counter() - started) * 1000)
+            db.session.expunge_all()
+        results[name] = float(np.median(timings))
+    return results
+
+
+def main():
+    args = parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    scratch_dir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch_dir = tempfile.mkdtemp(prefix='plant_bench_')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}"
+
+    from app import app, db, Plant, SensorReading, User, SENSOR_READINGS_PLANT_TIME_INDEX
+
+    print("=" * 70)
+    print("LATEST-READING QUERY BENCHMARK")
+    print("=" * 70)
+
+    with app.app_context():
+        db.create_all()
+        db.session.query(SensorReading).delete()
+        if not db.session.get(User, 1):
+            db.session.add(User(id=1, username='bench', email='bench@example.com', password_hash='x'))
+        existing_plants = {plant.id for plant in Plant.query.all()}
+        for plant_id in range(1, args.plants + 1):
+            if plant_id not in existing_plants:
+                db.session.add(Plant(id=plant_id, name=f'Bench {plant_id}', user_id=1,
+                                     sensor_id=f'bench-{plant_id}'))
+        db.session.commit()
+
+        print(f"Database: {db.engine.dialect.name}, plants: {args.plants}, "
+              f"queries per point: {args.queries}")
+        print(f"{'rows':>12} {'index':>6} {'latest ms':>10} {'recent5 ms':>11} {'recent20 ms':>12}")
+
+        rows = 0
+        for size in sizes:
+            started = time.perf_counter()
+            insert_readings(db, SensorReading, rows, size - rows, args.plants)
+            rows = size
+            print(f"   (filled to {rows:,} rows in {time.perf_counter() - started:.1f}s)")
+
+            for indexed in (True, False):
+                with db.engine.begin() as conn:
+                    SENSOR_READINGS_PLANT_TIME_INDEX.drop(conn, checkfirst=True)
+                    if indexed:
+                        SENSOR_READINGS_PLANT_TIME_INDEX.create(conn)
+                    if db.engine.dialect.name == 'postgresql':
+                        conn.exec_driver_sql('ANALYZE sensor_readings')
+                    else:
+                        conn.exec_driver_sql('ANALYZE')
+                timings = time_queries(db, SensorReading, args.plants,
+                                       args.queries if indexed else max(5, args.queries // 20))
+                print(f"{rows:>12,} {'yes' if indexed else 'no':>6} {timings['latest']:>10.3f} "
+                      f"{timings['recent5']:>11.3f} {timings['recent20']:>12.3f}")
+
+        # Leave the scratch database in its indexed state
+        with db.engine.begin() as conn:
+            SENSOR_READINGS_PLANT_TIME_INDEX.create(conn, checkfirst=True)
+
+    print("=" * 70)
+    if scratch_dir:
+        print(f"Scratch database left at {scratch_dir} (safe to delete)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Circuit breakers for upstream services (weather.gov, Nominatim).
+
+When an upstream is degraded every call used to wait for its full timeout, which
+ties up Flask workers. A CircuitBreaker watches a rolling window of recent calls
+to one upstream and trips when too many of them fail or are too slow:
+
+    CLOSED     calls go through; outcomes are recorded in the window
+    OPEN       calls fail immediately with CircuitOpenError (callers fall back to
+               cached data) until `open_seconds` have passed
+    HALF_OPEN  a limited number of probe calls go through; a successful probe
+               closes the breaker, a failed one re-opens it
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with rolling error-rate and slow-call windows.
+
+    Args:
+        name: Upstream name (used in errors, logs and metrics)
+        window_seconds: Length of the rolling window of recorded calls
+        min_calls: Calls needed in the window before the breaker may trip
+        error_rate_threshold: Trip when this share of calls in the window failed
+        slow_call_seconds: Calls slower than this count as slow
+        slow_rate_threshold: Trip when this share of calls in the window was slow
+        open_seconds: How long to fail fast before probing again
+        half_open_max_calls: Concurrent probe calls allowed while half-open
+    """
+
+    def __init__(self, name, window_seconds=60.0, min_calls=5, error_rate_threshold=0.5,
+                 slow_call_seconds=5.0, slow_rate_threshold=0.5, open_seconds=30.0, half_open_max_calls=1):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self._calls = deque()  # (finished_at, failed, slow)
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """
+        Ask permission for one call. Every allowed call must be followed by record().
+
+        Raises:
+            CircuitOpenError: If the breaker is open (or half-open with all probes busy)
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probes = 0
+                print(f'[BREAKER] {self.name}: half-open, probing')
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f'{self.name} circuit is open')
+
+    def record(self, failed, elapsed):
+        """Record the outcome of an allowed call."""
+        now = time.monotonic()
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    print(f'[BREAKER] {self.name}: closed')
+                return
+            if self.state == OPEN:
+                return  # A call that started before the breaker opened
+
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures / total >= self.error_rate_threshold or slow_calls / total >= self.slow_rate_threshold:
+                self._open(now)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; exceptions count as failures."""
+        self.allow()
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(True, time.monotonic() - started)
+            raise
+        self.record(False, time.monotonic() - started)
+        return result
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.times_opened += 1
+        print(f'[BREAKER] {self.name}: open for {self.open_seconds:g}s')
+
+    def _prune(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            total = len(self._calls)
+            return {
+                'state': self.state,
+                'window_calls': total,
+                'window_error_rate': round(sum(1 for c in self._calls if c[1]) / total, 3) if total else None,
+                'window_slow_rate': round(sum(1 for c in self._calls if c[2]) / total, 3) if total else None,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self.state == OPEN else None
+            }
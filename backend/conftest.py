@@ -0,0 +1,8 @@
+"""
+pytest configuration for the backend checks (run `python -m pytest` from backend/).
+
+test_chat_endpoint.py and test_openai.py are manual scripts that call the OpenAI
+API with a real key; they run on import, so pytest must not collect them.
+"""
+
+collect_ignore = ['test_chat_endpoint.py', 'test_openai.py']
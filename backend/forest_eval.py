@@ -0,0 +1,168 @@
+"""
+Flattened random forest evaluation in plain NumPy.
+
+scikit-learn's RandomForest*.predict() validates its input and dispatches every
+tree through joblib on each call, which costs milliseconds even for the single
+row an HTTP request needs. FlatForest copies a fitted forest into contiguous node
+arrays once (feature, threshold, left, right, leaf value) and evaluates all trees
+for all rows together: each step of the traversal is one gather pass over the
+node ids of every (tree, row) pair. This pays off for single rows and small
+batches (see FLAT_FOREST_MAX_ROWS and benchmark_forest_eval.py).
+
+Outputs are identical to scikit-learn's, not just close:
+- rows are cast to float32 like sklearn's tree code, and compared with `<=`
+  against the float64 thresholds (NaN follows the node's missing_go_to_left);
+- classifier leaves hold what DecisionTreeClassifier.predict_proba returns for
+  them (normalized the same way on scikit-learn < 1.4);
+- per-tree outputs are added up one tree at a time in estimator order and
+  divided by the number of trees, like the forest's accumulation with n_jobs=1.
+"""
+
+import numpy as np
+import sklearn
+
+# Since scikit-learn 1.4 classifier trees store class fractions in tree_.value and
+# predict_proba() returns them as-is; older versions stored weighted counts and
+# normalized them on every call
+_SKLEARN_VERSION = tuple(int(part) for part in sklearn.__version__.split('.')[:2] if part.isdigit())
+_NORMALIZE_LEAF_COUNTS = _SKLEARN_VERSION < (1, 4)
+
+# Up to this many rows per call FlatForest beats sklearn's predict(); larger
+# batches amortize sklearn's per-call overhead and use its worker threads
+FLAT_FOREST_MAX_ROWS = 512
+
+
+class FlatForest:
+    """
+    A fitted RandomForestRegressor or RandomForestClassifier as flat node arrays.
+
+    Leaves point to themselves, so every (tree, row) pair can take the same
+    number of steps (the deepest tree's depth) without masking finished ones.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 n_features, classes=None):
+        self.feature = feature            # (n_nodes,) int64, 0 for leaves
+        self.threshold = threshold        # (n_nodes,) float64, +inf for leaves
+        self.left = left                  # (n_nodes,) int64 global node ids
+        self.right = right
+        self.children = np.column_stack([left, right]).ravel()  # left, right, left, right, ...
+        self.missing_left = missing_left  # (n_nodes,) bool, NaN goes left
+        self.value = value                # (n_nodes,) or (n_nodes, n_classes) float64
+        self.roots = roots                # (n_trees,) int64
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes = classes            # None for regressors
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """
+        Flatten a fitted scikit-learn random forest.
+
+        Raises:
+            ValueError: For multi-output forests (not used by this app)
+        """
+        is_classifier = hasattr(forest, 'classes_')
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError('Only single-output forests can be flattened')
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+            missing.append(np.zeros(n_nodes, dtype=bool) if missing_go_to_left is None
+                           else np.asarray(missing_go_to_left, dtype=bool))
+
+            if is_classifier:
+                proba = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+                if _NORMALIZE_LEAF_COUNTS:
+                    normalizer = proba.sum(axis=1)
+                    normalizer[normalizer == 0.0] = 1.0
+                    proba = proba / normalizer[:, None]
+                values.append(proba)
+            else:
+                values.append(tree.value[:, 0, 0].astype(np.float64))
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int64),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+            classes=forest.classes_ if is_classifier else None
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _check_input(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f'Expected {self.n_features} features, got shape {X.shape}')
+        return X
+
+    def apply(self, X):
+        """
+        Leaf node ids reached by each row in each tree.
+
+        Returns:
+            np.ndarray: (n_rows, n_trees) global node ids
+        """
+        return self._leaves(self._check_input(X)).T
+
+    def _leaves(self, X):
+        """(n_trees, n_rows) leaf ids for a checked float32 X."""
+        n_rows = len(X)
+        has_nan = bool(np.isnan(X).any())
+        columns = np.ascontiguousarray(X.T).ravel()  # feature-major: columns[f * n_rows + row]
+        rows = np.tile(np.arange(n_rows, dtype=np.int64), self.n_trees)
+        nodes = np.repeat(self.roots, n_rows)  # tree-major (n_trees * n_rows,)
+        for _ in range(self.max_depth):
+            x = columns.take(self.feature.take(nodes) * n_rows + rows)
+            go_right = x > self.threshold.take(nodes)
+            if has_nan:
+                go_right = np.isnan(x) & ~self.missing_left.take(nodes) | go_right
+            # children holds (left, right) pairs, so one gather picks the branch
+            nodes = self.children.take(2 * nodes + go_right)
+        return nodes.reshape(self.n_trees, n_rows)
+
+    def _mean_over_trees(self, X):
+        leaves = self._leaves(self._check_input(X))
+        # Sum in estimator order, exactly as the forest accumulates tree outputs
+        total = np.zeros((leaves.shape[1],) + self.value.shape[1:])
+        for tree_leaves in leaves:
+            total += self.value.take(tree_leaves, axis=0)
+        return total / self.n_trees
+
+    def predict(self, X):
+        """Same as forest.predict(X): mean prediction (regressor) or most likely class (classifier)."""
+        if self.classes is None:
+            return self._mean_over_trees(X)
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_proba(self, X):
+        """Same as forest.predict_proba(X); classifiers only."""
+        if self.classes is None:
+            raise ValueError('predict_proba() needs a classifier')
+        return self._mean_over_trees(X)
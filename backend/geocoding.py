@@ -0,0 +1,246 @@
+"""
+Place name -> coordinates, with a local cache in front of Nominatim.
+
+Registration and location updates used to call Nominatim (OpenStreetMap) for
+every place name, even for the same few popular cities, and Nominatim's usage
+policy allows at most 1 request per second. Geocoder resolves a query in order:
+
+1. the offline gazetteer (data/gazetteer.csv, common US cities) - in memory;
+2. the result cache (memory, backed by a small SQLite file so restarts stay warm);
+3. Nominatim, spaced at least `min_interval` seconds apart across all threads.
+
+Queries are normalized first (case, whitespace, periods and comma spacing are
+folded), so "New York, NY", "new york,ny" and " New  York , N.Y." share one entry.
+Places Nominatim does not know are cached too, for a shorter time.
+"""
+
+import csv
+import re
+import sqlite3
+import threading
+import time
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+
+
+def normalize_query(query):
+    """Cache key for a place name, e.g. ' St. Louis ,MO ' -> 'st louis, mo'."""
+    folded = re.sub(r'\s+', ' ', str(query).casefold().replace('.', ''))
+    parts = [part.strip() for part in folded.split(',')]
+    return ', '.join(part for part in parts if part)
+
+
+def load_gazetteer(path):
+    """
+    Load the offline gazetteer CSV (city, state, state_code, latitude, longitude).
+
+    Each row is indexed under the spellings people type: "City, ST",
+    "City, State" and the same followed by ", USA"/", United States". Bare city
+    names are not indexed: many are ambiguous ("Manchester", "Cambridge",
+    "Athens", "Portland") and are left to Nominatim, whose answer is then cached.
+
+    Returns:
+        dict: normalized query -> (lat, lon)
+    """
+    entries = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            coords = (float(row['latitude']), float(row['longitude']))
+            city = row['city']
+            names = []
+            for region in (row['state_code'], row['state']):
+                names.append(f'{city}, {region}')
+                for country in ('USA', 'US', 'United States'):
+                    names.append(f'{city}, {region}, {country}')
+            for name in names:
+                entries.setdefault(normalize_query(name), coords)
+    return entries
+
+
+class RateLimiter:
+    """Thread-safe spacing of calls at least `min_interval` seconds apart."""
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """
+        Reserve the next free slot.
+
+        Returns:
+            float: Seconds the caller must sleep before calling, or None if the
+                   wait would exceed `max_wait` (no slot is reserved then)
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if max_wait is not None and slot - now > max_wait:
+                return None
+            self._next_slot = slot + self.min_interval
+            return slot - now
+
+
+class GeocodingCache:
+    """
+    Thread-safe TTL cache of geocoding results per normalized query.
+
+    Values are (lat, lon), or (None, None) for places the geocoder did not find.
+    """
+
+    def __init__(self, ttl=90 * 86400, negative_ttl=86400, path=None):
+        """
+        Args:
+            ttl: Lifetime of found places in seconds
+            negative_ttl: Lifetime of "not found" results in seconds
+            path: Optional SQLite file that persists entries across restarts
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.path = path
+        self._entries = {}  # key -> ((lat, lon), stored_at wall-clock seconds)
+        self._lock = threading.Lock()
+        if path:
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS geocode_cache '
+                             '(query TEXT PRIMARY KEY, latitude REAL, longitude REAL, stored_at REAL NOT NULL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """
+        Returns:
+            (lat, lon), (None, None) for a cached miss, or None if not cached/expired
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None and self.path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute('SELECT latitude, longitude, stored_at FROM geocode_cache WHERE query = ?',
+                                       (key,)).fetchone()
+                if row:
+                    cached = ((row[0], row[1]), row[2])
+                    with self._lock:
+                        self._entries[key] = cached
+            except sqlite3.Error as e:
+                print(f'Geocoding cache read error: {e}')
+
+        if cached is None:
+            return None
+        coords, stored_at = cached
+        ttl = self.ttl if coords[0] is not None else self.negative_ttl
+        return coords if time.time() - stored_at < ttl else None
+
+    def put(self, key, coords):
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (coords, stored_at)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('INSERT OR REPLACE INTO geocode_cache (query, latitude, longitude, stored_at) '
+                                 'VALUES (?, ?, ?, ?)', (key, coords[0], coords[1], stored_at))
+            except sqlite3.Error as e:
+                print(f'Geocoding cache write error: {e}')
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class Geocoder:
+    """
+    Place name geocoding through the gazetteer, the cache and Nominatim.
+
+    Args:
+        http_client: Shared HttpClient (see http_client.py)
+        headers: Headers for Nominatim requests (a real User-Agent is required)
+        cache: GeocodingCache
+        gazetteer: Optional dict from load_gazetteer()
+        min_interval: Minimum seconds between Nominatim requests
+        max_wait: Longest a caller queues for a Nominatim slot before giving up
+    """
+
+    def __init__(self, http_client, headers, cache, gazetteer=None, min_interval=1.0, max_wait=10.0):
+        self.http_client = http_client
+        self.headers = headers
+        self.cache = cache
+        self.gazetteer = gazetteer or {}
+        self.limiter = RateLimiter(min_interval)
+        self.max_wait = max_wait
+        self._stats_lock = threading.Lock()
+        self.gazetteer_hits = 0
+        self.cache_hits = 0
+        self.upstream_calls = 0
+        self.rate_limited = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def geocode(self, query):
+        """
+        Returns:
+            (lat, lon), or (None, None) if the place was not found
+
+        Raises:
+            Exception: If Nominatim could not be asked (error, circuit open, rate limit queue full)
+        """
+        key = normalize_query(query)
+        if not key:
+            return None, None
+
+        coords = self.gazetteer.get(key)
+        if coords is not None:
+            self._count('gazetteer_hits')
+            return coords
+        coords = self.cache.get(key)
+        if coords is not None:
+            self._count('cache_hits')
+            return coords
+
+        wait = self.limiter.reserve(self.max_wait)
+        if wait is None:
+            self._count('rate_limited')
+            raise Exception('Geocoding rate limit queue is full')
+        if wait > 0:
+            time.sleep(wait)
+            # Another request for the same place may have finished while we waited
+            coords = self.cache.get(key)
+            if coords is not None:
+                self._count('cache_hits')
+                return coords
+
+        self._count('upstream_calls')
+        coords = self.fetch(query)
+        self.cache.put(key, coords)
+        return coords
+
+    def fetch(self, query):
+        """Ask Nominatim for a place name; (None, None) if it has no match."""
+        params = {
+            'q': query,
+            'format': 'json',
+            'limit': 1
+        }
+        response = self.http_client.get(NOMINATIM_URL, params=params, headers=self.headers, timeout=10)
+        if not response.ok:
+            raise Exception(f'Nominatim returned HTTP {response.status_code}')
+        data = response.json()
+        if not data:
+            return None, None
+        return float(data[0].get('lat', 0)), float(data[0].get('lon', 0))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'gazetteer_size': len(self.gazetteer),
+                'cache_size': len(self.cache),
+                'gazetteer_hits': self.gazetteer_hits,
+                'cache_hits': self.cache_hits,
+                'upstream_calls': self.upstream_calls,
+                'rate_limited': self.rate_limited
+            }
@@ -10,6 +10,7 @@ import pickle
 import os
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
+from forest_eval import FLAT_FOREST_MAX_ROWS, FlatForest
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
 
@@ -40,6 +41,14 @@ class PlantHealthClassifier:
         'Excellent': (80, 100)
     }
     
+    # Categorical plant attribute encodings (unknown values encode as 0.5)
+    CARE_LEVELS = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
+    NATIVE_CLIMATES = {'arid': 0.0, 'temperate': 0.5, 'tropical': 1.0, 'subtropical': 0.75}
+    PLANT_TYPES = {'succulent': 0.0, 'cactus': 0.0, 'herb': 0.33, 'vegetable': 0.66, 'flower': 0.5, 'tree': 0.83}
+    
+    # Column order of the readings passed to extract_features_batch()
+    READING_COLUMNS = ('moisture', 'temperature', 'light')
+    
     def __init__(self, model_path=None):
         """
         Initialize the classifier.
@@ -52,6 +61,7 @@ class PlantHealthClassifier:
             os.path.dirname(__file__), 'health_model.pkl'
         )
         self.is_trained = False
+        self.flat_forest = None  # FlatForest copy of the trained model, for fast inference
         
         # Load existing model if available
         if os.path.exists(self.model_path):
@@ -220,18 +230,15 @@ class PlantHealthClassifier:
         features.append(watering_frequency_normalized)
         
         # Care level encoding (low=0, medium=0.5, high=1)
-        care_level_map = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
-        care_level = care_level_map.get(plant_data.get('care_level', 'medium') if plant_data else 'medium', 0.5)
+        care_level = self.CARE_LEVELS.get(plant_data.get('care_level', 'medium') if plant_data else 'medium', 0.5)
         features.append(care_level)
         
         # Native climate encoding (arid=0, temperate=0.5, tropical=1)
-        climate_map = {'arid': 0.0, 'temperate': 0.5, 'tropical': 1.0, 'subtropical': 0.75}
-        native_climate = climate_map.get(plant_data.get('native_climate', 'temperate') if plant_data else 'temperate', 0.5)
+        native_climate = self.NATIVE_CLIMATES.get(plant_data.get('native_climate', 'temperate') if plant_data else 'temperate', 0.5)
         features.append(native_climate)
         
         # Plant type encoding (succulent=0, herb=0.33, vegetable=0.66, other=1)
-        plant_type_map = {'succulent': 0.0, 'cactus': 0.0, 'herb': 0.33, 'vegetable': 0.66, 'flower': 0.5, 'tree': 0.83}
-        plant_type = plant_type_map.get(plant_data.get('plant_type', 'herb') if plant_data else 'herb', 0.5)
+        plant_type = self.PLANT_TYPES.get(plant_data.get('plant_type', 'herb') if plant_data else 'herb', 0.5)
         features.append(plant_type)
         
         # Optimal range compliance (how well current conditions match plant's optimal ranges)
@@ -279,6 +286,124 @@ class PlantHealthClassifier:
         
         return np.array(features)
     
+    def extract_features_batch(self, readings, weather, plant_attrs=None, counts=None):
+        """
+        Vectorized extract_features() for many plants at once.
+        
+        Row i of the result equals extract_features() for plant i, value for value.
+        
+        Args:
+            readings: (n_plants, window, 3) array of [moisture, temperature, light]
+                      (READING_COLUMNS), ordered as extract_features() receives them
+                      (index 0 is used as the current reading)
+            weather: (n_plants, 3) array of [temperature, humidity, precipitation];
+                     NaN means missing and uses the same default as extract_features()
+            plant_attrs: Optional dict of per-plant arrays keyed like plant_data
+                         ('age_days', 'optimal_moisture_min', ..., 'care_level',
+                         'native_climate', 'plant_type'); NaN/None entries and absent
+                         keys use the defaults
+            counts: Optional (n_plants,) number of valid readings per plant (the rest
+                    of the window is ignored); defaults to the full window
+        
+        Returns:
+            np.ndarray: (n_plants, 21) feature matrix, same columns as extract_features()
+        """
+        readings = np.asarray(readings, dtype=float)
+        if readings.ndim != 3 or readings.shape[2] != 3:
+            raise ValueError(f"Expected readings of shape (n_plants, window, 3), got {readings.shape}")
+        n_plants, window, _ = readings.shape
+        counts = np.full(n_plants, window) if counts is None else np.minimum(np.asarray(counts, dtype=int), window)
+        plant_attrs = plant_attrs or {}
+        
+        def attribute(key, default):
+            if plant_attrs.get(key) is None:
+                return np.full(n_plants, default)
+            values = np.asarray(plant_attrs[key], dtype=float)
+            return np.where(np.isnan(values), default, values)
+        
+        def encoded(key, mapping, default_key):
+            values = plant_attrs.get(key)
+            if values is None:
+                return np.full(n_plants, mapping.get(default_key, 0.5))
+            values = np.asarray(values, dtype=object)
+            codes = np.full(n_plants, 0.5)
+            for name, code in mapping.items():
+                codes[values == name] = code
+            codes[np.equal(values, None)] = mapping.get(default_key, 0.5)
+            return codes
+        
+        # Current sensor values (defaults without readings)
+        has_readings = counts > 0
+        current = np.where(has_readings[:, None], readings[:, 0, :] if window else 0.0, [50.0, 72.0, 500.0])
+        current_moisture, current_temp, current_light = current.T
+        
+        # Trends over up to 5 consecutive pairs, for plants with at least 3 readings. Plants
+        # are grouped by how many pairs they have, so each statistic runs over exactly
+        # the same values (in the same order) as the scalar version
+        moisture_trend = np.zeros(n_plants)
+        temp_stability = np.full(n_plants, 5.0)
+        light_consistency = np.full(n_plants, 100.0)
+        steps = np.minimum(5, counts - 1)
+        trending = counts >= 3
+        for n_steps in np.unique(steps[trending]):
+            rows = np.flatnonzero(trending & (steps == n_steps))
+            curr = readings[rows, :n_steps]
+            prev = readings[rows, 1:n_steps + 1]
+            moisture_trend[rows] = np.mean(curr[:, :, 0] - prev[:, :, 0], axis=1)
+            temp_stability[rows] = np.std(np.ascontiguousarray(curr[:, :, 1]), axis=1)
+            light_consistency[rows] = np.std(np.ascontiguousarray(curr[:, :, 2]), axis=1)
+        
+        # Current weather values
+        weather = np.asarray(weather, dtype=float).reshape(n_plants, 3)
+        weather = np.where(np.isnan(weather), [72.0, 60.0, 0.0], weather)
+        weather_temp, weather_humidity, weather_precip = weather.T
+        
+        # Optimal ranges (NaN = not set)
+        ranges = {name: (attribute(f'optimal_{name}_min', np.nan), attribute(f'optimal_{name}_max', np.nan))
+                  for name in ('moisture', 'temp', 'light')}
+        
+        def deviation(current_value, name, default_center):
+            low, high = ranges[name]
+            center = np.where(np.isnan(low) | np.isnan(high), default_center, (low + high) / 2)
+            return np.abs(current_value - center)
+        
+        def in_range(current_value, name):
+            low, high = ranges[name]
+            outside = ~(np.isnan(low) | np.isnan(high)) & ~((low <= current_value) & (current_value <= high))
+            distance = np.where(current_value < low, low - current_value, current_value - high)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                score = np.maximum(0.0, 1.0 - (distance / (high - low)))
+            return np.where(outside, score, 1.0)
+        
+        # Weather stress index (high temp + low humidity = stress)
+        temp_stress = np.where(weather_temp > 70, np.maximum(0, (weather_temp - 70) / 20), 0)
+        humidity_stress = np.where(weather_humidity < 40, np.maximum(0, (40 - weather_humidity) / 40), 0)
+        weather_stress = np.minimum(1.0, (temp_stress + humidity_stress) / 2)
+        
+        # Moisture status: 0 very dry (<30), 1 dry (<50), 2 optimal (<70), 3 wet
+        moisture_status = np.searchsorted([30, 50, 70], current_moisture, side='right').astype(float)
+        
+        optimal_compliance = (in_range(current_moisture, 'moisture') + in_range(current_temp, 'temp')
+                              + in_range(current_light, 'light')) / 3.0
+        
+        return np.column_stack([
+            current_moisture, current_temp, current_light,
+            weather_temp, weather_humidity, weather_precip,
+            moisture_trend, temp_stability, light_consistency,
+            deviation(current_moisture, 'moisture', 50.0),
+            deviation(current_temp, 'temp', 72.5),
+            deviation(current_light, 'light', 550.0),
+            weather_stress,
+            moisture_status,
+            np.minimum(1.0, attribute('age_days', 30) / 365.0),
+            np.minimum(1.0, attribute('days_since_last_watering', 3.0) / 14.0),
+            (attribute('watering_frequency_days', 3.0) - 1.0) / 6.0,
+            encoded('care_level', self.CARE_LEVELS, 'medium'),
+            encoded('native_climate', self.NATIVE_CLIMATES, 'temperate'),
+            encoded('plant_type', self.PLANT_TYPES, 'herb'),
+            optimal_compliance
+        ])
+    
     def score_to_category(self, score):
         """Convert numeric score (0-100) to category."""
         for category, (min_score, max_score) in self.CATEGORY_THRESHOLDS.items():
@@ -320,6 +445,7 @@ class PlantHealthClassifier:
         # Train model
         self.model.fit(X_train, y_train)
         self.is_trained = True
+        self._flatten_model()
         
         # Evaluate
         train_pred = self.model.predict(X_train)
@@ -388,11 +514,9 @@ class PlantHealthClassifier:
             # Fallback to rule-based prediction
             return self._rule_based_predict(features[0])
         
-        # Predict category
-        category = self.model.predict(features)[0]
-        
-        # Get probabilities
-        probabilities = self.model.predict_proba(features)[0]
+        # Get probabilities; the predicted category is the most likely class (as in sklearn's predict)
+        probabilities = self._forest_predict_proba(features)[0]
+        category = self.model.classes_[np.argmax(probabilities)]
         prob_dict = dict(zip(self.model.classes_, probabilities))
         
         # Confidence is the probability of the predicted category
@@ -409,6 +533,40 @@ class PlantHealthClassifier:
             'score_estimate': float(score_estimate)
         }
     
+    def predict_batch(self, X):
+        """
+        Vectorized predict() for a feature matrix: one predict_proba call for all rows.
+        
+        Args:
+            X: (n, n_features) feature matrix (see extract_features_batch)
+        
+        Returns:
+            list: One predict() result dict per row
+        """
+        X = np.asarray(X, dtype=float)
+        if not self.is_trained:
+            return [self._rule_based_predict(row) for row in X]
+        
+        probabilities = self._forest_predict_proba(X)
+        categories = self.model.classes_[np.argmax(probabilities, axis=1)]
+        results = []
+        for category, row_probabilities in zip(categories, probabilities):
+            prob_dict = dict(zip(self.model.classes_, row_probabilities))
+            min_score, max_score = self.CATEGORY_THRESHOLDS[category]
+            results.append({
+                'category': category,
+                'confidence': float(prob_dict.get(category, 0.5)),
+                'probabilities': prob_dict,
+                'score_estimate': float((min_score + max_score) / 2)
+            })
+        return results
+    
+    def _forest_predict_proba(self, X):
+        """Class probabilities from the trained forest for a 2D array (FlatForest for small inputs)."""
+        if self.flat_forest is not None and len(X) <= FLAT_FOREST_MAX_ROWS:
+            return self.flat_forest.predict_proba(X)
+        return self.model.predict_proba(X)
+    
     def _rule_based_predict(self, features):
         """Fallback rule-based prediction when model is not trained."""
         # Extract key features (handle variable feature count)
@@ -502,6 +660,15 @@ class PlantHealthClassifier:
         importances = self.model.feature_importances_
         return dict(zip(feature_names, importances))
     
+    def _flatten_model(self):
+        """Build the FlatForest used for inference; sklearn's predict() is the fallback."""
+        self.flat_forest = None
+        if self.is_trained:
+            try:
+                self.flat_forest = FlatForest.from_sklearn(self.model)
+            except Exception as e:
+                print(f"Could not flatten health model, using scikit-learn predict: {e}")
+    
     def save_model(self):
         """Save the trained model to disk."""
         try:
@@ -521,6 +688,7 @@ class PlantHealthClassifier:
             data = pickle.load(f)
             self.model = data['model']
             self.is_trained = data.get('is_trained', True)
+            self._flatten_model()
             if 'categories' in data:
                 self.CATEGORIES = data['categories']
         print(f"Health model loaded from {self.model_path}")
@@ -0,0 +1,215 @@
+"""
+Vectorized rule-based plant health scoring.
+
+The rule-based score (see calculate_plant_health_score() in app.py for the
+formula) is computed here as pure NumPy over an array of recent readings, so one
+call scores a single plant or a whole batch:
+
+    readings  (n_plants, window, 3)  [moisture, temperature, light], newest first
+    counts    (n_plants,)            valid readings per plant (the rest is ignored)
+
+Each sensor's bands are symmetric around an optimal range: lower edges are
+inclusive ("40 <= moisture") and upper edges exclusive of the value above them
+("moisture <= 70"). A band level (0 = poor ... 3 = optimal) is therefore two
+np.searchsorted lookups into the edge tables below, and points are read from a
+table by level. Results are identical to the original chain of comparisons,
+including NaN readings (scored as poor).
+"""
+
+import numpy as np
+
+READING_COLUMNS = ('moisture', 'temperature', 'light')
+
+# Per sensor: lower edges (poor|fair, fair|good, good|optimal), upper edges
+# (optimal|good, good|fair, fair|poor) and points per level
+SENSOR_BANDS = {
+    'moisture': (np.array([20.0, 30.0, 40.0]), np.array([70.0, 80.0, 90.0]), np.array([0, 10, 20, 30])),
+    'temperature': (np.array([55.0, 60.0, 65.0]), np.array([80.0, 85.0, 90.0]), np.array([0, 10, 18, 25])),
+    'light': (np.array([100.0, 200.0, 300.0]), np.array([800.0, 1000.0, 1500.0]), np.array([0, 10, 18, 25]))
+}
+
+# Trend penalties: average moisture change per reading below -5 / -2 costs 10 / 5
+# points, temperature stability (10 - average absolute change) below 5 costs 5
+MOISTURE_CHANGE_EDGES = np.array([-5.0, -2.0])
+MOISTURE_CHANGE_PENALTIES = np.array([10, 5, 0])
+TEMP_STABILITY_EDGES = np.array([5.0])
+TEMP_STABILITY_PENALTIES = np.array([5, 0])
+MAX_TREND_SCORE = 20
+MIN_TREND_READINGS = 3
+
+# Total score -> status: [0, 30) Critical, [30, 50) Poor, ... [80, 100] Excellent
+STATUS_EDGES = np.array([30, 50, 65, 80])
+STATUS_NAMES = np.array(['Critical', 'Poor', 'Fair', 'Good', 'Excellent'])
+
+# Feedback per sensor: prefix for "too low/high" (poor) and the message for fair
+FACTOR_LABELS = {
+    'moisture': ('Soil moisture is', 'Soil moisture is suboptimal'),
+    'temperature': ('Temperature is', 'Temperature is outside optimal range'),
+    'light': ('Light levels are', 'Light levels are suboptimal')
+}
+
+NO_DATA_RESULT = {
+    'score': 50,  # Default if no data
+    'status': 'Unknown',
+    'details': {
+        'moisture_score': 0,
+        'temperature_score': 0,
+        'light_score': 0,
+        'trend_score': 10
+    },
+    'factors': ['No sensor data available']
+}
+
+
+def stack_readings(rows_per_plant, window):
+    """
+    Readings of many plants as one array.
+
+    Args:
+        rows_per_plant: One list of readings per plant, newest first (anything with
+                        moisture/temperature/light attributes)
+        window: Readings kept per plant
+
+    Returns:
+        (readings, counts): (n_plants, window, 3) array, newest first, and (n_plants,) counts
+    """
+    readings = np.zeros((len(rows_per_plant), window, len(READING_COLUMNS)))
+    counts = np.zeros(len(rows_per_plant), dtype=int)
+    for i, rows in enumerate(rows_per_plant):
+        rows = rows[:window]
+        counts[i] = len(rows)
+        for j, row in enumerate(rows):
+            readings[i, j] = (row.moisture, row.temperature, row.light)
+    return readings, counts
+
+
+def oldest_first(readings, counts):
+    """Reverse each plant's valid readings in a newest-first array (padding stays at the end)."""
+    window = readings.shape[1]
+    positions = np.arange(window)
+    index = np.where(positions < counts[:, None], counts[:, None] - 1 - positions, positions)
+    return np.take_along_axis(readings, index[:, :, None], axis=1)
+
+
+def band_levels(values, sensor):
+    """Band level per value: 0 poor, 1 fair, 2 good, 3 optimal."""
+    lower_edges, upper_edges, _ = SENSOR_BANDS[sensor]
+    below = np.searchsorted(lower_edges, values, side='right')  # Lower edges reached (inclusive)
+    above = np.searchsorted(upper_edges, values, side='left')   # Upper edges passed (exclusive)
+    return np.minimum(below, len(upper_edges) - above)
+
+
+def trend_scores(readings, counts):
+    """
+    Trend score (0-20) per plant from consecutive readings.
+
+    Changes are summed in reading order, like the scalar loop, so averages match
+    it exactly; plants with fewer than 3 readings keep the full score.
+    """
+    n_plants, window, _ = readings.shape
+    moisture_total = np.zeros(n_plants)
+    temp_total = np.zeros(n_plants)
+    for i in range(window - 1):
+        pair_valid = i + 1 < counts
+        moisture_total += np.where(pair_valid, readings[:, i, 0] - readings[:, i + 1, 0], 0.0)
+        temp_total += np.where(pair_valid, np.abs(readings[:, i, 1] - readings[:, i + 1, 1]), 0.0)
+
+    n_changes = np.maximum(counts - 1, 1)
+    avg_moisture_change = moisture_total / n_changes
+    avg_temp_stability = 10 - temp_total / n_changes
+
+    penalty = (MOISTURE_CHANGE_PENALTIES[np.searchsorted(MOISTURE_CHANGE_EDGES, avg_moisture_change, side='right')]
+               + TEMP_STABILITY_PENALTIES[np.searchsorted(TEMP_STABILITY_EDGES, avg_temp_stability, side='right')])
+    trend = np.clip(MAX_TREND_SCORE - penalty, 0, MAX_TREND_SCORE)
+    return np.where(counts >= MIN_TREND_READINGS, trend, MAX_TREND_SCORE)
+
+
+def score_readings(readings, counts=None):
+    """
+    Rule-based health scores for a batch of plants.
+
+    Args:
+        readings: (n_plants, window, 3) [moisture, temperature, light], newest first
+        counts: Optional (n_plants,) valid readings per plant; defaults to the full window
+
+    Returns:
+        dict of (n_plants,) arrays: 'score', 'status', per-sensor '<sensor>_level' and
+        '<sensor>_score' (sensors as in READING_COLUMNS), 'trend_score', 'count' and
+        'current' ((n_plants, 3) latest reading). Rows with count 0 are meaningless
+        (see health_results()).
+    """
+    readings = np.asarray(readings, dtype=float)
+    n_plants, window, _ = readings.shape
+    counts = np.full(n_plants, window) if counts is None else np.minimum(np.asarray(counts, dtype=int), window)
+    current = readings[:, 0, :] if window else np.zeros((n_plants, len(READING_COLUMNS)))
+
+    scores = {'count': counts, 'current': current}
+    total = np.zeros(n_plants, dtype=int)
+    for column, sensor in enumerate(READING_COLUMNS):
+        levels = band_levels(current[:, column], sensor)
+        points = SENSOR_BANDS[sensor][2][levels]
+        scores[f'{sensor}_level'] = levels
+        scores[f'{sensor}_score'] = points
+        total += points
+
+    scores['trend_score'] = trend_scores(readings, counts)
+    total = np.clip(total + scores['trend_score'], 0, 100)
+    scores['score'] = total
+    scores['status'] = STATUS_NAMES[np.searchsorted(STATUS_EDGES, total, side='right')]
+    return scores
+
+
+def _factors(levels, values, trend_score):
+    """Feedback messages for one plant (levels and values indexed like READING_COLUMNS)."""
+    factors = []
+    for sensor, level, value in zip(READING_COLUMNS, levels, values):
+        prefix, suboptimal = FACTOR_LABELS[sensor]
+        if level == 0:
+            lowest_edge = SENSOR_BANDS[sensor][0][0]
+            factors.append(f'{prefix} too ' + ('low' if value < lowest_edge else 'high'))
+        elif level == 1:
+            factors.append(suboptimal)
+
+    if trend_score < 15:
+        factors.append('Recent readings show declining conditions')
+    if not factors:
+        factors.append('All conditions are optimal')
+    return factors
+
+
+def health_results(scores):
+    """
+    Per-plant result dicts (the /api/plant-health rule-based body) from score_readings().
+
+    Returns:
+        list: {'score', 'status', 'details', 'factors', 'current_values'} per plant,
+              or NO_DATA_RESULT for plants without readings
+    """
+    results = []
+    levels = np.column_stack([scores[f'{sensor}_level'] for sensor in READING_COLUMNS]).tolist()
+    points = np.column_stack([scores[f'{sensor}_score'] for sensor in READING_COLUMNS]).tolist()
+    current = scores['current'].tolist()
+    for i, (count, score, status, trend) in enumerate(zip(scores['count'].tolist(), scores['score'].tolist(),
+                                                          scores['status'].tolist(), scores['trend_score'].tolist())):
+        if count == 0:
+            results.append({**NO_DATA_RESULT, 'details': dict(NO_DATA_RESULT['details']),
+                            'factors': list(NO_DATA_RESULT['factors'])})
+            continue
+        moisture, temperature, light = current[i]
+        results.append({
+            'score': score,
+            'status': status,
+            'details': {
+                'moisture_score': points[i][0],
+                'temperature_score': points[i][1],
+                'light_score': points[i][2],
+                'trend_score': trend
+            },
+            'factors': _factors(levels[i], current[i], trend),
+            'current_values': {
+                'moisture': round(moisture, 1),
+                'temperature': round(temperature, 1),
+                'light': round(light, 1)
+            }
+        })
+    return results
@@ -0,0 +1,202 @@
+"""
+Shared outbound HTTP client for the backend.
+
+All calls to external services (weather.gov, nominatim.openstreetmap.org) go
+through one HttpClient so they reuse keep-alive connections instead of opening a
+new TCP + TLS connection per request:
+
+- one requests.Session whose adapter keeps a connection pool per host
+  (pool_maxsize connections each, shared by all Flask and worker threads);
+- retries of idempotent requests on connection errors, 429 and 5xx, with
+  full-jitter exponential backoff so clients do not retry in lockstep (read
+  timeouts are not retried by default: each attempt could wait the caller's
+  whole timeout again);
+- per-host metrics: request/error/retry counts, a latency histogram and the
+  connection reuse ratio reported by the urllib3 pools;
+- an optional circuit breaker per host (circuit_breaker.py): while it is open,
+  calls fail immediately with CircuitOpenError instead of waiting for timeouts.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class JitteredRetry(Retry):
+    """urllib3 Retry with full jitter: sleep a random time up to the exponential backoff."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+class HostMetrics:
+    """Counters and latency histogram for one upstream host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_codes = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total_ms = 0.0
+
+    def record(self, elapsed_ms, status_code=None, retries=0, error=False):
+        self.requests += 1
+        self.retries += retries
+        if error or status_code is None or status_code >= 500 or status_code == 429:
+            self.errors += 1
+        if status_code is not None:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.latency_total_ms += elapsed_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.latency_buckets[i] += 1
+                break
+        else:
+            self.latency_buckets[-1] += 1
+
+    def snapshot(self):
+        histogram = {f'le_{bound}ms': count for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_buckets)}
+        histogram['inf'] = self.latency_buckets[-1]
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'status_codes': {str(code): count for code, count in sorted(self.status_codes.items())},
+            'latency_avg_ms': round(self.latency_total_ms / self.requests, 2) if self.requests else None,
+            'latency_histogram': histogram
+        }
+
+
+class HttpClient:
+    """
+    Thread-safe pooled HTTP client with retries and per-host metrics.
+
+    Args:
+        pool_connections: Number of per-host pools kept alive
+        pool_maxsize: Keep-alive connections per host
+        max_retries: Retries for connection errors, 429 and 5xx (GET/HEAD only)
+        read_retries: Retries after a read error or read timeout (GET/HEAD only)
+        backoff_factor: Base of the exponential backoff (seconds); each sleep is
+                        a random value up to backoff_factor * 2 ** (retry - 1)
+        headers: Default headers sent with every request (e.g. User-Agent)
+        breaker_factory: Optional callable(host) -> CircuitBreaker, called once per host
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_connections=10, pool_maxsize=16, max_retries=2, read_retries=0, backoff_factor=0.5,
+                 headers=None, breaker_factory=None):
+        retry = JitteredRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=read_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            # Retry-After can ask for minutes; callers have deadlines, so use our own backoff
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.breaker_factory = breaker_factory
+        self._breakers = {}  # host -> CircuitBreaker
+        self._metrics = {}  # host -> HostMetrics
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        """The circuit breaker for a host, or None without a breaker_factory."""
+        if self.breaker_factory is None:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = self.breaker_factory(host)
+            return breaker
+
+    def request(self, method, url, **kwargs):
+        """
+        Same as requests.request(), through the shared session.
+
+        Raises:
+            CircuitOpenError: If the host's circuit breaker is open
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if breaker is not None:
+            breaker.allow()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:  # Any error must be recorded, or a half-open probe is never released
+            elapsed = time.perf_counter() - started
+            self._record(host, elapsed * 1000, error=True)
+            if breaker is not None:
+                breaker.record(True, elapsed)
+            raise
+        elapsed = time.perf_counter() - started
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', ()) or ()
+        self._record(host, elapsed * 1000, response.status_code, len(retries))
+        if breaker is not None:
+            breaker.record(response.status_code >= 500 or response.status_code == 429, elapsed)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def _record(self, host, elapsed_ms, status_code=None, retries=0, error=False):
+        with self._lock:
+            metrics = self._metrics.get(host)
+            if metrics is None:
+                metrics = self._metrics[host] = HostMetrics()
+            metrics.record(elapsed_ms, status_code, retries, error)
+
+    def _pool_counters(self):
+        """host -> (connections opened, requests sent) from the live urllib3 pools."""
+        counters = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f'{pool.host}:{pool.port}'
+            opened, sent = counters.get(host, (0, 0))
+            counters[host] = (opened + pool.num_connections, sent + pool.num_requests)
+        return counters
+
+    def metrics(self):
+        """
+        Returns:
+            dict: host -> metrics snapshot, including 'connections_opened' and
+                  'reuse_ratio' (share of requests sent on an existing connection)
+        """
+        with self._lock:
+            snapshot = {host: metrics.snapshot() for host, metrics in self._metrics.items()}
+        for host, (opened, sent) in self._pool_counters().items():
+            entry = snapshot.setdefault(host, HostMetrics().snapshot())
+            entry['connections_opened'] = opened
+            entry['reuse_ratio'] = round(1 - opened / sent, 3) if sent else None
+        for host, breaker_state in self.breaker_states().items():
+            snapshot.setdefault(host, HostMetrics().snapshot())['breaker'] = breaker_state
+        return snapshot
+
+    def breaker_states(self):
+        """host -> circuit breaker snapshot"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
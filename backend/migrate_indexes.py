@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Create missing indexes on an existing database without downtime.
+
+`db.create_all()` only creates indexes together with new tables, so databases
+created before an index was added to a model need this migration.
+
+- Postgres (Neon): CREATE INDEX CONCURRENTLY, which does not block inserts from
+  the Raspberry Pi or dashboard reads. Invalid leftovers from an interrupted
+  concurrent build are dropped and rebuilt.
+- Postgres partitioned tables (SENSOR_READINGS_PARTITIONED, see partitions.py):
+  CONCURRENTLY is not supported on the parent, so the index is created ON ONLY
+  the parent, built concurrently on each partition and attached.
+- SQLite: plain CREATE INDEX IF NOT EXISTS (SQLite has no concurrent builds, but
+  the table lock is short for local development databases).
+
+Usage:
+    python migrate_indexes.py           # create missing indexes
+    python migrate_indexes.py --check   # only report which indexes are missing
+"""
+
+import argparse
+import sys
+import os
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+
+def _model_indexes(db):
+    """All indexes declared on the models, as (table_name, Index) pairs."""
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            yield table.name, index
+
+
+def _invalid_postgres_index(conn, index_name):
+    """True if a previous CONCURRENTLY build left an invalid index behind."""
+    result = conn.execute(text("""
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+    """), {'name': index_name}).scalar()
+    return bool(result)
+
+
+def _postgres_partitions(conn, table_name):
+    """Partition names of a partitioned table, or None for a plain table."""
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :name"),
+                           {'name': table_name}).scalar()
+    if relkind != 'p':
+        return None
+    return conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :name
+        ORDER BY child.relname
+    """), {'name': table_name}).scalars().all()
+
+
+def _create_partitioned_index(conn, table_name, index, ddl, partitions):
+    """Build an index on a partitioned table without blocking writes to it."""
+    conn.execute(text(ddl.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1)
+                      .replace(f' ON {table_name} ', f' ON ONLY {table_name} ', 1)))
+    attached = set(conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :name
+    """), {'name': index.name}).scalars().all())
+    suffix = index.name.removeprefix(f'ix_{table_name}_')
+    for partition in partitions:
+        child_name = f'{partition}_{suffix}_idx'[:63]
+        if child_name in attached:
+            continue
+        print(f"     ...on partition {partition}")
+        conn.execute(text(ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS', 1)
+                          .replace(index.name, child_name, 1)
+                          .replace(f' ON {table_name} ', f' ON {partition} ', 1)))
+        conn.execute(text(f'ALTER INDEX {index.name} ATTACH PARTITION {child_name}'))
+
+
+def migrate_indexes(db, check_only=False):
+    """
+    Create every model index that is missing from the database.
+
+    Args:
+        db: Flask-SQLAlchemy instance (inside an app context)
+        check_only: Report missing indexes without creating them
+
+    Returns:
+        list: Names of indexes that were missing
+    """
+    engine = db.engine
+    dialect = engine.dialect.name
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table_name, index in _model_indexes(db):
+            if table_name not in existing_tables:
+                # Table will be created (with its indexes) by db.create_all()
+                continue
+
+            existing = {ix['name'] for ix in inspect(conn).get_indexes(table_name)}
+            rebuild = dialect == 'postgresql' and index.name in existing and _invalid_postgres_index(conn, index.name)
+            if index.name in existing and not rebuild:
+                print(f"   ✓ {index.name} already exists")
+                continue
+
+            missing.append(index.name)
+            if check_only:
+                print(f"   ✗ {index.name} missing{' (invalid)' if rebuild else ''}")
+                continue
+
+            ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+            partitions = _postgres_partitions(conn, table_name) if dialect == 'postgresql' else None
+            if partitions is not None:
+                # An invalid partitioned index just has partitions left to attach
+                print(f"   Creating {index.name} on {len(partitions)} partition(s)...")
+                _create_partitioned_index(conn, table_name, index, ddl, partitions)
+                print(f"   ✅ {index.name} created")
+                continue
+            if dialect == 'postgresql':
+                if rebuild:
+                    print(f"   Dropping invalid index {index.name}...")
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {index.name}'))
+                ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS', 1)
+            else:
+                ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1)
+
+            print(f"   Creating {index.name}...")
+            print(f"     {ddl}")
+            conn.execute(text(ddl))
+            print(f"   ✅ {index.name} created")
+
+        if dialect == 'postgresql' and missing and not check_only:
+            # Refresh planner statistics so the new index is used right away
+            for table_name in sorted({t for t, ix in _model_indexes(db) if ix.name in missing}):
+                conn.execute(text(f'ANALYZE {table_name}'))
+
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create missing database indexes')
+    parser.add_argument('--check', action='store_true', help='Only report missing indexes')
+    args = parser.parse_args()
+
+    from app import app, db
+
+    print("=" * 70)
+    print("DATABASE INDEX MIGRATION")
+    print("=" * 70)
+
+    with app.app_context():
+        print(f"Database: {db.engine.dialect.name}")
+        missing = migrate_indexes(db, check_only=args.check)
+
+    print("=" * 70)
+    if args.check:
+        print(f"{len(missing)} index(es) missing")
+    else:
+        print(f"Done - {len(missing)} index(es) created")
+    print("=" * 70)
+
+    return 1 if args.check and missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,7 @@ import pickle
 import os
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
+from forest_eval import FLAT_FOREST_MAX_ROWS, FlatForest
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 
@@ -41,6 +42,7 @@ class WateringPredictionModel:
             os.path.dirname(__file__), 'watering_model.pkl'
         )
         self.is_trained = False
+        self.flat_forest = None  # FlatForest copy of the trained model, for fast inference
         
         # Load existing model if available
         if os.path.exists(self.model_path):
@@ -90,6 +92,7 @@ class WateringPredictionModel:
         # Train model
         self.model.fit(X_train, y_train)
         self.is_trained = True
+        self._flatten_model()
         
         # Evaluate
         train_pred = self.model.predict(X_train)
@@ -187,7 +190,7 @@ class WateringPredictionModel:
                         features = features.reshape(1, -1)
                     
                     # Predict hours until watering
-                    hours = self.model.predict(features)[0]
+                    hours = self._forest_predict(features)[0]
                     
                     # Clamp between 6 and 168 hours (1 week max)
                     hours = max(6, min(168, hours))
@@ -214,7 +217,7 @@ class WateringPredictionModel:
                         features = features.reshape(1, -1)
                     
                     # Predict frequency
-                    frequency = self.model.predict(features)[0]
+                    frequency = self._forest_predict(features)[0]
                     # Clamp between 1 and 7 days
                     frequency = max(1.0, min(7.0, frequency))
                     return float(frequency)
@@ -227,6 +230,68 @@ class WateringPredictionModel:
                 result = self._weather_based_predict(temperature, humidity, precipitation, None)
                 return result.get('frequency_days')
     
+    def predict_batch(self, X):
+        """
+        Vectorized predict() for many rows at once (e.g. a fleet-wide recompute).
+        
+        Args:
+            X: Array-like of shape (n, 4) [moisture, temperature, humidity, precipitation]
+               or (n, 3) [temperature, humidity, precipitation]
+        
+        Returns:
+            np.ndarray: (n,) hours until watering (clamped 6-168) for 4 columns, or
+                        watering frequency in days (clamped 1-7) for 3 columns - the
+                        same values predict() returns row by row
+        """
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] not in (3, 4):
+            raise ValueError(f"Expected an (n, 3) or (n, 4) array, got shape {X.shape}")
+        use_moisture = X.shape[1] == 4
+        if len(X) == 0:
+            return np.empty(0)
+        
+        # The forest is only used when it was trained on the same feature set
+        if self.is_trained and getattr(self.model, 'n_features_in_', None) == X.shape[1]:
+            predictions = self._forest_predict(X)
+            if use_moisture:
+                return np.clip(predictions, 6, 168)
+            return np.clip(predictions, 1.0, 7.0)
+        
+        if use_moisture:
+            _, hours = self._weather_based_predict_batch(X[:, 1], X[:, 2], X[:, 3], X[:, 0])
+            return hours
+        frequency_days, _ = self._weather_based_predict_batch(X[:, 0], X[:, 1], X[:, 2])
+        return frequency_days
+    
+    def _forest_predict(self, X):
+        """Trained forest predictions for a 2D array (FlatForest for small inputs)."""
+        if self.flat_forest is not None and len(X) <= FLAT_FOREST_MAX_ROWS:
+            return self.flat_forest.predict(X)
+        return self.model.predict(X)
+    
+    def _weather_based_predict_batch(self, temperature, humidity, precipitation, moisture=None):
+        """
+        Vectorized _weather_based_predict() over arrays of conditions.
+        
+        Returns:
+            tuple: (frequency_days, hours_until) arrays; hours_until is None without moisture
+        """
+        temp_factor = np.clip((temperature - 60) / 30, 0, 1)
+        humidity_factor = np.clip((100 - humidity) / 70, 0, 1)
+        et_rate = 0.6 * temp_factor + 0.4 * humidity_factor
+        
+        base_days = 1.0 + (1.0 - et_rate) * 4.0
+        precip_adjustment = 1.0 + (precipitation / 100) * 0.5
+        frequency_days = np.clip(base_days * precip_adjustment, 1.0, 7.0)
+        
+        if moisture is None:
+            return frequency_days, None
+        
+        # Same moisture bands as the scalar version: the drier the soil, the sooner
+        moisture_scale = np.select([moisture < 30, moisture < 40, moisture < 50], [0.3, 0.5, 0.7], 1.0)
+        hours = np.clip(frequency_days * 24 * moisture_scale, 6, 168)
+        return frequency_days, hours
+    
     def _weather_based_predict(self, temperature, humidity, precipitation, moisture=None):
         """
         Predict watering frequency based on weather conditions using evapotranspiration.
@@ -317,6 +382,15 @@ class WateringPredictionModel:
         
         return dict(zip(feature_names, importances))
     
+    def _flatten_model(self):
+        """Build the FlatForest used for inference; sklearn's predict() is the fallback."""
+        self.flat_forest = None
+        if self.is_trained:
+            try:
+                self.flat_forest = FlatForest.from_sklearn(self.model)
+            except Exception as e:
+                print(f"Could not flatten model, using scikit-learn predict: {e}")
+    
     def save_model(self):
         """Save the trained model to disk."""
         try:
@@ -335,6 +409,7 @@ class WateringPredictionModel:
             data = pickle.load(f)
             self.model = data['model']
             self.is_trained = data.get('is_trained', True)
+            self._flatten_model()
         print(f"Model loaded from {self.model_path}")
 
 
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Monthly range partitions for sensor_readings on Postgres.
+
+With SENSOR_READINGS_PARTITIONED=1 the sensor_readings table is created as
+`PARTITION BY RANGE (timestamp)` with one partition per calendar month:
+
+    sensor_readings_y2024m01  FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')
+    ...
+    sensor_readings_default   DEFAULT  (rows outside every month partition)
+
+The primary key becomes (id, timestamp) because Postgres requires the partition
+key in every unique constraint. ix_sensor_readings_plant_id_timestamp is created
+on the parent and cloned onto each partition. Queries with a timestamp range are
+pruned to the months they cover; plain "latest N readings for a plant" queries
+have no timestamp bound, so Postgres reads the top of that index in every
+partition (a Merge Append) - cheap per partition, but it grows with retention.
+
+The server creates upcoming partitions at startup and daily after that. Expired
+months are archived and dropped as a whole by archive_old_readings() in app.py
+instead of being deleted row by row. SQLite always uses a single table.
+
+Usage:
+    python partitions.py status             # list partitions and row estimates
+    python partitions.py ensure [--ahead 3] # create partitions through N months ahead
+    python partitions.py migrate            # convert an existing table (maintenance window)
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+PARENT_TABLE = 'sensor_readings'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', 3))
+
+_PARTITION_NAME = re.compile(rf'^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def partition_name(year, month):
+    return f'{PARENT_TABLE}_y{year:04d}m{month:02d}'
+
+
+def add_months(year, month, months):
+    """(year, month) shifted by `months` calendar months."""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def is_partitioned(conn):
+    """True if sensor_readings exists and is a partitioned table."""
+    relkind = conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE relname = :name AND relnamespace = 'public'::regnamespace"
+    ), {'name': PARENT_TABLE}).scalar()
+    return relkind == 'p'
+
+
+def list_partitions(conn):
+    """Monthly partitions as sorted (year, month, name) tuples (the default partition is excluded)."""
+    names = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {'parent': PARENT_TABLE}).scalars().all()
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((int(match.group(1)), int(match.group(2)), name))
+    return sorted(partitions)
+
+
+def ensure_partitions(conn, months_ahead=PARTITION_MONTHS_AHEAD, start=None):
+    """
+    Create any missing monthly partitions from `start` through `months_ahead` months past now.
+
+    A month whose rows already landed in the DEFAULT partition cannot be attached
+    (Postgres rejects the new partition while DEFAULT holds rows for its range). Each
+    partition is created in its own savepoint, so such a month is reported and
+    skipped and the rest are still created; move its rows out of DEFAULT to fix it.
+
+    Args:
+        conn: Connection inside a transaction
+        months_ahead: Future months to create in advance
+        start: Earliest datetime to cover (default: the current month)
+
+    Returns:
+        list: Names of the partitions that were created
+    """
+    now = datetime.utcnow()
+    year, month = (start or now).year, (start or now).month
+    last = add_months(now.year, now.month, months_ahead)
+    existing = {(y, m) for y, m, _ in list_partitions(conn)}
+
+    created = []
+    while (year, month) <= last:
+        if (year, month) not in existing:
+            name = partition_name(year, month)
+            next_year, next_month = add_months(year, month, 1)
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                        f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{next_year:04d}-{next_month:02d}-01')"
+                    ))
+                created.append(name)
+            except DBAPIError as e:
+                print(f'⚠️  Could not create partition {name}: {e.orig}')
+        year, month = add_months(year, month, 1)
+
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT'))
+    return created
+
+
+def expired_partitions(conn, cutoff):
+    """Names of monthly partitions that hold only timestamps before `cutoff`, oldest first."""
+    expired = []
+    for year, month, name in list_partitions(conn):
+        next_year, next_month = add_months(year, month, 1)
+        if datetime(next_year, next_month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def drop_partition(conn, name, keep_ids=()):
+    """
+    Detach and drop one monthly partition.
+
+    Rows listed in `keep_ids` are re-inserted after the detach; their month no
+    longer has a partition, so they land in the default partition.
+    """
+    conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}'))
+    if keep_ids:
+        conn.execute(text(
+            f'INSERT INTO {PARENT_TABLE} (id, plant_id, light, moisture, temperature, timestamp) '
+            f'SELECT id, plant_id, light, moisture, temperature, timestamp FROM {name} '
+            f'WHERE id = ANY(:ids)'
+        ), {'ids': list(keep_ids)})
+    conn.execute(text(f'DROP TABLE {name}'))
+
+
+def migrate_to_partitioned(db, SensorReading, months_ahead=PARTITION_MONTHS_AHEAD,
+                           batch_size=100000, keep_legacy=False):
+    """
+    Convert a plain sensor_readings table into the partitioned layout.
+
+    Runs in one transaction holding an exclusive lock on the old table, so
+    writers wait until it commits - run it in a maintenance window (the Raspberry
+    Pi spools readings locally while the database is unavailable). Ids and the id
+    sequence are preserved.
+
+    Returns:
+        int: Number of rows copied
+    """
+    from reading_listener import NOTIFY_TRIGGER_SQL
+
+    legacy = f'{PARENT_TABLE}_legacy'
+    with db.engine.begin() as conn:
+        if is_partitioned(conn):
+            print(f"   ✓ {PARENT_TABLE} is already partitioned")
+            return 0
+
+        conn.execute(text(f'LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE'))
+        oldest = conn.execute(text(f'SELECT min(timestamp) FROM {PARENT_TABLE}')).scalar()
+
+        # Free the names the new table will use
+        conn.execute(text(f'ALTER TABLE {PARENT_TABLE} RENAME TO {legacy}'))
+        conn.execute(text(f'ALTER TABLE {legacy} RENAME CONSTRAINT {PARENT_TABLE}_pkey TO {legacy}_pkey'))
+        conn.execute(text(f'ALTER SEQUENCE IF EXISTS {PARENT_TABLE}_id_seq RENAME TO {legacy}_id_seq'))
+        for index in SensorReading.__table__.indexes:
+            legacy_index = index.name.replace(PARENT_TABLE, legacy, 1)
+            conn.execute(text(f'ALTER INDEX IF EXISTS {index.name} RENAME TO {legacy_index}'))
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {PARENT_TABLE}_notify ON {legacy}'))
+
+        SensorReading.__table__.create(conn)
+        created = ensure_partitions(conn, months_ahead, start=oldest)
+        print(f"   Created {PARENT_TABLE} (partitioned) with {len(created)} monthly partition(s)")
+
+        copied, last_id = 0, 0
+        while True:
+            result = conn.execute(text(f"""
+                INSERT INTO {PARENT_TABLE} (id, plant_id, light, moisture, temperature, timestamp)
+                SELECT id, plant_id, light, moisture, temperature, timestamp FROM {legacy}
+                WHERE id > :last_id ORDER BY id LIMIT :batch_size
+                RETURNING id
+            """), {'last_id': last_id, 'batch_size': batch_size}).scalars().all()
+            if not result:
+                break
+            copied += len(result)
+            last_id = max(result)
+            print(f"   Copied {copied:,} row(s)...")
+
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{PARENT_TABLE}', 'id'), "
+            f"(SELECT COALESCE(max(id), 0) + 1 FROM {PARENT_TABLE}), false)"
+        ))
+        conn.exec_driver_sql(NOTIFY_TRIGGER_SQL)
+        if not keep_legacy:
+            conn.execute(text(f'DROP TABLE {legacy}'))
+        conn.execute(text(f'ANALYZE {PARENT_TABLE}'))
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage monthly sensor_readings partitions (Postgres)')
+    parser.add_argument('command', choices=['status', 'ensure', 'migrate'])
+    parser.add_argument('--ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help='Months of future partitions to create')
+    parser.add_argument('--batch-size', type=int, default=100000, help='Rows copied per statement (migrate)')
+    parser.add_argument('--keep-legacy', action='store_true',
+                        help='Keep the old table as sensor_readings_legacy after migrating')
+    args = parser.parse_args()
+
+    from app import app, db, SensorReading, SENSOR_READINGS_PARTITIONED
+
+    print("=" * 70)
+    print("SENSOR READING PARTITIONS")
+    print("=" * 70)
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("❌ Partitioning is only supported on Postgres (SQLite uses a single table)")
+            return 1
+        if args.command != 'status' and not SENSOR_READINGS_PARTITIONED:
+            print("❌ Set SENSOR_READINGS_PARTITIONED=1 so the app uses the partitioned schema")
+            return 1
+
+        if args.command == 'migrate':
+            copied = migrate_to_partitioned(db, SensorReading, args.ahead, args.batch_size, args.keep_legacy)
+            print(f"✅ Migrated {copied:,} row(s)")
+        elif args.command == 'ensure':
+            with db.engine.begin() as conn:
+                if not is_partitioned(conn):
+                    print(f"❌ {PARENT_TABLE} is not partitioned - run `python partitions.py migrate` first")
+                    return 1
+                created = ensure_partitions(conn, args.ahead)
+            print(f"✅ Created {len(created)} partition(s): {', '.join(created) or 'none needed'}")
+        else:
+            with db.engine.connect() as conn:
+                if not is_partitioned(conn):
+                    print(f"{PARENT_TABLE} is not partitioned")
+                    return 0
+                for year, month, name in list_partitions(conn) + [(None, None, DEFAULT_PARTITION)]:
+                    rows = conn.execute(text(
+                        'SELECT reltuples::bigint FROM pg_class WHERE relname = :name'
+                    ), {'name': name}).scalar()
+                    print(f"   {name:<32} ~{max(rows or 0, 0):,} row(s)")
+
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
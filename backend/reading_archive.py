@@ -0,0 +1,165 @@
+"""
+Columnar archive files for raw sensor readings past the retention window.
+
+archive_old_readings() in app.py moves raw rows older than SENSOR_RETENTION_DAYS
+out of sensor_readings into one compressed NumPy file per plant per month:
+
+    <ARCHIVE_DIR>/plant_<plant_id>/<YYYY-MM>.npz
+
+Each file holds parallel arrays sorted by (timestamp, id):
+    'id'          int64
+    'timestamp'   datetime64[us] (naive UTC)
+    'light', 'moisture', 'temperature'   float64
+
+The hourly/daily rollups are never archived, so bucketed history keeps covering
+the whole lifetime of a plant; these files serve raw-resolution history and
+model training over old ranges.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+ARCHIVE_FIELDS = ('id', 'timestamp', 'light', 'moisture', 'temperature')
+
+_MONTH_FILE = re.compile(r'^(\d{4})-(\d{2})\.npz$')
+
+
+def plant_archive_dir(archive_dir, plant_id):
+    return os.path.join(archive_dir, f'plant_{plant_id}')
+
+
+def archive_path(archive_dir, plant_id, year, month):
+    return os.path.join(plant_archive_dir(archive_dir, plant_id), f'{year:04d}-{month:02d}.npz')
+
+
+def read_archive(path):
+    """Load one month file as a dict of arrays (see module docstring)."""
+    with np.load(path) as data:
+        return {field: data[field] for field in ARCHIVE_FIELDS}
+
+
+def append_to_archive(archive_dir, plant_id, year, month, ids, timestamps, light, moisture, temperature):
+    """
+    Add readings to a plant's month file, creating it if needed.
+
+    Rows already in the file (same id) are not duplicated, so re-running an
+    archival batch that was interrupted before its DELETE committed is safe. The
+    file is replaced atomically.
+
+    Returns:
+        int: Number of rows in the file afterwards
+    """
+    columns = {
+        'id': np.asarray(ids, dtype=np.int64),
+        'timestamp': np.asarray(timestamps, dtype='datetime64[us]'),
+        'light': np.asarray(light, dtype=np.float64),
+        'moisture': np.asarray(moisture, dtype=np.float64),
+        'temperature': np.asarray(temperature, dtype=np.float64)
+    }
+    path = archive_path(archive_dir, plant_id, year, month)
+    if os.path.exists(path):
+        existing = read_archive(path)
+        columns = {field: np.concatenate([existing[field], columns[field]]) for field in ARCHIVE_FIELDS}
+        _, unique = np.unique(columns['id'], return_index=True)
+        columns = {field: values[unique] for field, values in columns.items()}
+
+    order = np.lexsort((columns['id'], columns['timestamp']))
+    columns = {field: values[order] for field, values in columns.items()}
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(columns['id'])
+
+
+def archived_months(archive_dir, plant_id):
+    """Sorted (year, month) pairs that have an archive file for the plant."""
+    directory = plant_archive_dir(archive_dir, plant_id)
+    if not os.path.isdir(directory):
+        return []
+    months = []
+    for name in os.listdir(directory):
+        match = _MONTH_FILE.match(name)
+        if match:
+            months.append((int(match.group(1)), int(match.group(2))))
+    return sorted(months)
+
+
+def load_archived_readings(archive_dir, plant_id, start=None, end=None):
+    """
+    Archived readings of a plant with start <= timestamp < end, as arrays.
+
+    Only the month files overlapping the range are opened. Intended for bulk
+    consumers such as model training.
+
+    Returns:
+        dict: Arrays keyed by ARCHIVE_FIELDS, sorted by (timestamp, id)
+    """
+    start64 = np.datetime64(start, 'us') if start is not None else None
+    end64 = np.datetime64(end, 'us') if end is not None else None
+    parts = []
+    for year, month in archived_months(archive_dir, plant_id):
+        month_start = datetime(year, month, 1)
+        month_end = datetime(year + month // 12, month % 12 + 1, 1)
+        if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+            continue
+        data = read_archive(archive_path(archive_dir, plant_id, year, month))
+        mask = np.ones(len(data['id']), dtype=bool)
+        if start64 is not None:
+            mask &= data['timestamp'] >= start64
+        if end64 is not None:
+            mask &= data['timestamp'] < end64
+        parts.append({field: values[mask] for field, values in data.items()})
+
+    if not parts:
+        return {
+            'id': np.empty(0, dtype=np.int64),
+            'timestamp': np.empty(0, dtype='datetime64[us]'),
+            'light': np.empty(0),
+            'moisture': np.empty(0),
+            'temperature': np.empty(0)
+        }
+    return {field: np.concatenate([part[field] for part in parts]) for field in ARCHIVE_FIELDS}
+
+
+def iter_archived_readings(archive_dir, plant_id, start=None, end=None):
+    """
+    Stream archived readings of a plant, oldest first, one month file at a time.
+
+    Yields:
+        dict: {'id', 'plant_id', 'light', 'moisture', 'temperature', 'timestamp'}
+              shaped like reading_snapshot(), with 'timestamp' as a naive UTC datetime
+    """
+    for year, month in archived_months(archive_dir, plant_id):
+        month_start = datetime(year, month, 1)
+        month_end = datetime(year + month // 12, month % 12 + 1, 1)
+        if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+            continue
+        data = load_archived_readings(archive_dir, plant_id, max(month_start, start or month_start),
+                                      min(month_end, end or month_end))
+        timestamps = data['timestamp'].tolist()
+        for i in range(len(data['id'])):
+            yield {
+                'id': int(data['id'][i]),
+                'plant_id': plant_id,
+                'light': float(data['light'][i]),
+                'moisture': float(data['moisture'][i]),
+                'temperature': float(data['temperature'][i]),
+                'timestamp': timestamps[i]
+            }
+
+
+def delete_plant_archive(archive_dir, plant_id):
+    """Remove every archive file of a plant (after the plant is deleted)."""
+    shutil.rmtree(plant_archive_dir(archive_dir, plant_id), ignore_errors=True)
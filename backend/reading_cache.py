@@ -0,0 +1,143 @@
+"""
+In-process cache of the latest sensor reading per plant.
+
+The dashboard polls the current reading every few seconds per open tab, while a
+plant only gets a new reading every ~10 seconds. This cache keeps the newest
+reading for each plant in memory so those polls do not touch the database.
+
+Entries are filled write-through by the ingest endpoints and by the Postgres
+LISTEN/NOTIFY listener (reading_listener.py) for rows written directly by the
+Raspberry Pi. The cache is bounded and evicts least-recently-used plants.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+def reading_snapshot(reading):
+    """
+    Convert a SensorReading (or a dict with the same fields) to a cache entry.
+
+    Returns:
+        dict: {'id', 'plant_id', 'light', 'moisture', 'temperature', 'timestamp'}
+              with 'timestamp' as a naive UTC datetime
+    """
+    if isinstance(reading, dict):
+        timestamp = reading['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return {
+            'id': reading.get('id'),
+            'plant_id': reading['plant_id'],
+            'light': reading['light'],
+            'moisture': reading['moisture'],
+            'temperature': reading['temperature'],
+            'timestamp': timestamp
+        }
+    return {
+        'id': reading.id,
+        'plant_id': reading.plant_id,
+        'light': reading.light,
+        'moisture': reading.moisture,
+        'temperature': reading.temperature,
+        'timestamp': reading.timestamp
+    }
+
+
+class LatestReadingCache:
+    """
+    Thread-safe, bounded LRU map of plant_id -> latest reading snapshot.
+
+    A plant with no readings is cached as None so "no data yet" polls are served
+    from memory too. update() never replaces a reading with an older one, which
+    makes concurrent fills from the database and from notifications safe.
+
+    If `ttl` is set, entries older than `ttl` seconds are treated as misses. The
+    app uses this as a safety net when no change notifications are available
+    (SQLite, or while the Postgres listener is reconnecting).
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_size=10000, ttl=None):
+        """
+        Args:
+            max_size: Maximum number of plants kept in memory
+            ttl: Optional entry lifetime in seconds (None = valid until replaced)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # plant_id -> (snapshot or None, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, plant_id, default=_MISSING):
+        """
+        Look up the latest reading for a plant.
+
+        Returns:
+            The snapshot dict, None if the plant is known to have no readings, or
+            `default` (LatestReadingCache.MISSING) on a cache miss.
+        """
+        with self._lock:
+            entry = self._entries.get(plant_id)
+            if entry is not None:
+                snapshot, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(plant_id)
+                    self.hits += 1
+                    return snapshot
+                del self._entries[plant_id]
+            self.misses += 1
+            return default
+
+    def update(self, plant_id, snapshot):
+        """
+        Store a reading if it is at least as new as the cached one.
+
+        Args:
+            plant_id: Plant the reading belongs to
+            snapshot: Snapshot dict from reading_snapshot(), or None for "no readings"
+
+        Returns:
+            bool: True if the cache entry was replaced
+        """
+        with self._lock:
+            entry = self._entries.get(plant_id)
+            if entry is not None and entry[0] is not None:
+                current = entry[0]
+                if snapshot is None or (snapshot['timestamp'], snapshot['id'] or 0) < \
+                        (current['timestamp'], current['id'] or 0):
+                    self._entries.move_to_end(plant_id)
+                    return False
+            self._entries[plant_id] = (snapshot, time.monotonic())
+            self._entries.move_to_end(plant_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, plant_id):
+        """Drop a plant's entry (e.g. after the plant is deleted)."""
+        with self._lock:
+            self._entries.pop(plant_id, None)
+
+    def clear(self):
+        """Drop every entry (e.g. after missing change notifications)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+LatestReadingCache.MISSING = LatestReadingCache._MISSING
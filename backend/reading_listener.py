@@ -0,0 +1,110 @@
+"""
+Postgres LISTEN/NOTIFY listener for new sensor readings.
+
+The Raspberry Pi writes readings straight into Neon, bypassing the Flask API,
+so the backend has no write path of its own to hook for those rows. A trigger on
+sensor_readings publishes every inserted row on the `sensor_readings` channel and
+this listener thread forwards each one to a callback (the latest-reading cache).
+"""
+
+import json
+import select
+import threading
+import time
+
+NOTIFY_CHANNEL = 'sensor_readings'
+
+NOTIFY_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_sensor_reading() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object(
+        'id', NEW.id,
+        'plant_id', NEW.plant_id,
+        'light', NEW.light,
+        'moisture', NEW.moisture,
+        'temperature', NEW.temperature,
+        'timestamp', NEW.timestamp
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER sensor_readings_notify
+    AFTER INSERT ON sensor_readings
+    FOR EACH ROW EXECUTE FUNCTION notify_sensor_reading();
+"""
+
+
+def install_notify_trigger(engine):
+    """Create (or replace) the sensor_readings NOTIFY trigger. Postgres only."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(NOTIFY_TRIGGER_SQL)
+
+
+class ReadingListener(threading.Thread):
+    """
+    Background thread that LISTENs for new readings and reconnects on failure.
+
+    Callbacks:
+        on_reading(payload): Called with the decoded row dict for every insert
+        on_connect(): Called after LISTEN is (re-)established
+        on_disconnect(): Called when the connection is lost - notifications may
+                         have been missed, so callers should invalidate caches
+    """
+
+    def __init__(self, database_url, on_reading, on_connect=None, on_disconnect=None,
+                 max_backoff=60.0):
+        super().__init__(name='reading-listener', daemon=True)
+        self.database_url = database_url
+        self.on_reading = on_reading
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.max_backoff = max_backoff
+        self.stopping = threading.Event()
+        self.connected = False
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self):
+        import psycopg2
+
+        backoff = 1.0
+        while not self.stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.database_url)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                self.connected = True
+                backoff = 1.0
+                print(f'✅ Listening for new sensor readings on channel "{NOTIFY_CHANNEL}"')
+                if self.on_connect:
+                    self.on_connect()
+
+                while not self.stopping.is_set():
+                    # Wake up periodically so stop() is honoured
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.on_reading(json.loads(notify.payload))
+                        except Exception as e:
+                            print(f'Error handling reading notification: {e}')
+            except Exception as e:
+                print(f'⚠️  Reading listener disconnected: {e}. Retrying in {backoff:.0f}s')
+            finally:
+                if self.connected:
+                    self.connected = False
+                    if self.on_disconnect:
+                        self.on_disconnect()
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self.stopping.wait(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
@@ -0,0 +1,115 @@
+"""
+Vectorized aggregation helpers for sensor reading rollups.
+
+Rollup tables hold per-plant, per-bucket (hourly / daily) min, max, avg and
+count of light, moisture and temperature. These helpers aggregate a batch of raw
+readings into buckets with NumPy and merge partial aggregates, so the rollup job
+only ever touches the raw rows added since its last run.
+
+Aggregates are dicts of parallel arrays:
+    'plant_id'     (k,)   int64
+    'bucket_start' (k,)   int64 Unix seconds, aligned to the bucket size
+    'count'        (k,)   int64
+    'min', 'max', 'avg'   (k, 3) float64 - columns are SENSOR_FIELDS
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+SENSOR_FIELDS = ('light', 'moisture', 'temperature')
+
+
+def to_epoch_seconds(timestamps):
+    """Naive UTC datetimes -> int64 Unix seconds."""
+    return np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+
+
+def from_epoch_seconds(seconds):
+    """Unix seconds -> naive UTC datetime."""
+    return datetime.fromtimestamp(int(seconds), timezone.utc).replace(tzinfo=None)
+
+
+def empty_aggregate():
+    return {
+        'plant_id': np.empty(0, dtype=np.int64),
+        'bucket_start': np.empty(0, dtype=np.int64),
+        'count': np.empty(0, dtype=np.int64),
+        'min': np.empty((0, 3)),
+        'max': np.empty((0, 3)),
+        'avg': np.empty((0, 3))
+    }
+
+
+def aggregate_readings(plant_ids, epochs, values, bucket_seconds):
+    """
+    Group raw readings into (plant_id, bucket) aggregates.
+
+    Args:
+        plant_ids: (n,) plant id per reading
+        epochs: (n,) reading timestamps as Unix seconds
+        values: (n, 3) light, moisture, temperature per reading
+        bucket_seconds: Bucket size (e.g. 3600 for hourly)
+
+    Returns:
+        dict: Aggregate arrays sorted by (plant_id, bucket_start)
+    """
+    plant_ids = np.asarray(plant_ids, dtype=np.int64)
+    if plant_ids.size == 0:
+        return empty_aggregate()
+    buckets = np.asarray(epochs, dtype=np.int64) // bucket_seconds * bucket_seconds
+    values = np.asarray(values, dtype=np.float64)
+
+    order = np.lexsort((buckets, plant_ids))
+    plant_ids, buckets, values = plant_ids[order], buckets[order], values[order]
+
+    # Index of the first reading of every (plant_id, bucket) group
+    new_group = np.ones(plant_ids.size, dtype=bool)
+    new_group[1:] = (plant_ids[1:] != plant_ids[:-1]) | (buckets[1:] != buckets[:-1])
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, plant_ids.size))
+
+    return {
+        'plant_id': plant_ids[starts],
+        'bucket_start': buckets[starts],
+        'count': counts.astype(np.int64),
+        'min': np.minimum.reduceat(values, starts, axis=0),
+        'max': np.maximum.reduceat(values, starts, axis=0),
+        'avg': np.add.reduceat(values, starts, axis=0) / counts[:, None]
+    }
+
+
+def merge_aggregates(first, second):
+    """
+    Combine two aggregates into one, merging groups with the same key.
+
+    Counts add, min/max combine, and averages are count-weighted, so merging a
+    stored rollup with the aggregate of newly arrived readings gives the same
+    result as aggregating all the raw readings at once.
+    """
+    plant_ids = np.concatenate([first['plant_id'], second['plant_id']])
+    if plant_ids.size == 0:
+        return empty_aggregate()
+    buckets = np.concatenate([first['bucket_start'], second['bucket_start']])
+    counts = np.concatenate([first['count'], second['count']])
+    mins = np.concatenate([first['min'], second['min']])
+    maxs = np.concatenate([first['max'], second['max']])
+    sums = np.concatenate([first['avg'], second['avg']]) * counts[:, None]
+
+    order = np.lexsort((buckets, plant_ids))
+    plant_ids, buckets, counts = plant_ids[order], buckets[order], counts[order]
+    mins, maxs, sums = mins[order], maxs[order], sums[order]
+
+    new_group = np.ones(plant_ids.size, dtype=bool)
+    new_group[1:] = (plant_ids[1:] != plant_ids[:-1]) | (buckets[1:] != buckets[:-1])
+    starts = np.flatnonzero(new_group)
+    merged_counts = np.add.reduceat(counts, starts)
+
+    return {
+        'plant_id': plant_ids[starts],
+        'bucket_start': buckets[starts],
+        'count': merged_counts,
+        'min': np.minimum.reduceat(mins, starts, axis=0),
+        'max': np.maximum.reduceat(maxs, starts, axis=0),
+        'avg': np.add.reduceat(sums, starts, axis=0) / merged_counts[:, None]
+    }
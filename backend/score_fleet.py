@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Recompute the health snapshot of every plant (plant_health_snapshots).
+
+Plants are scored in batches: the recent readings of a batch come from one query
+(an indexed LIMIT per plant through JOIN LATERAL on Postgres), weather is looked up once per user location, and the health
+model runs once per batch instead of once per plant. The server can run the same
+job every HEALTH_SCORING_INTERVAL_SECONDS; this script runs it by hand or from cron.
+
+Usage:
+    python score_fleet.py                    # score all plants once
+    python score_fleet.py --loop 900         # keep running, every 900 seconds
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score the health of every plant')
+    parser.add_argument('--loop', type=float, default=None, metavar='SECONDS',
+                        help='Repeat every SECONDS instead of running once')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Plants scored per transaction')
+    args = parser.parse_args()
+
+    from app import app, db, score_plant_health_fleet, HEALTH_SCORING_BATCH_SIZE
+
+    with app.app_context():
+        db.create_all()
+
+    while True:
+        started = time.perf_counter()
+        with app.app_context():
+            scored = score_plant_health_fleet(args.batch_size or HEALTH_SCORING_BATCH_SIZE)
+        print(f"✅ Scored {scored} plant(s) in {time.perf_counter() - started:.2f}s")
+        if args.loop is None:
+            return 0
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Fan-out hub for the live sensor reading stream (Server-Sent Events).
+
+Every open dashboard subscribes to its plant through GET /api/sensor-data/stream.
+New readings reach the hub from exactly one source, so one upstream event
+serves every subscriber of a plant:
+
+- Postgres: the LISTEN/NOTIFY listener calls publish() for each inserted row.
+- Otherwise: a single poller thread runs one query per interval for all plants
+  that currently have subscribers. Ingest endpoints call wake() so readings
+  posted through the API are delivered without waiting for the next poll.
+"""
+
+import queue
+import threading
+
+
+class Subscription:
+    """One connected client: a bounded queue of readings for a single plant."""
+
+    def __init__(self, plant_id, last_id, max_queue=100):
+        self.plant_id = plant_id
+        self.last_id = last_id or 0
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def offer(self, snapshot):
+        """Queue a reading; a client that falls too far behind is disconnected."""
+        if self.closed or (snapshot.get('id') or 0) <= self.last_id:
+            return
+        try:
+            self.queue.put_nowait(snapshot)
+        except queue.Full:
+            # The client reconnects with Last-Event-ID and catches up from the database
+            self.close()
+
+    def next(self, timeout):
+        """
+        Wait for the next reading.
+
+        Returns:
+            The snapshot dict, or None on timeout or when the subscription is closed
+        """
+        try:
+            snapshot = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if snapshot is None:
+            return None
+        self.last_id = max(self.last_id, snapshot.get('id') or 0)
+        return snapshot
+
+    def close(self):
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)  # Unblock a waiting next()
+        except queue.Full:
+            pass
+
+
+class SensorStreamHub:
+    """
+    Tracks stream subscribers per plant and delivers each new reading to all of them.
+
+    Args:
+        fetch_new_readings: Callable({plant_id: last_id}) -> list of snapshots with
+                            id > last_id for each plant, oldest first. Used by the
+                            poller when notifications are not available.
+        poll_interval: Seconds between poller queries
+        max_queue: Readings buffered per subscriber before it is disconnected
+    """
+
+    def __init__(self, fetch_new_readings, poll_interval=2.0, max_queue=100):
+        self.fetch_new_readings = fetch_new_readings
+        self.poll_interval = poll_interval
+        self.max_queue = max_queue
+        self.notifications_active = False
+        self._subscribers = {}  # plant_id -> set of Subscription
+        self._cursors = {}      # plant_id -> last reading id the poller has seen
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._poller = None
+
+    def subscribe(self, plant_id, last_id):
+        """
+        Register a client that has already received readings up to `last_id`.
+
+        The plant's poll cursor moves back to `last_id` if it is lower, so new
+        clients must pass their latest reading id, not 0.
+
+        Returns:
+            Subscription
+        """
+        subscription = Subscription(plant_id, last_id, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(plant_id, set()).add(subscription)
+            cursor = self._cursors.get(plant_id)
+            self._cursors[plant_id] = subscription.last_id if cursor is None else min(cursor, subscription.last_id)
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll_loop, name='sensor-stream-poller', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.plant_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.plant_id]
+                    self._cursors.pop(subscription.plant_id, None)
+
+    def publish(self, snapshot):
+        """Deliver a new reading to every subscriber of its plant."""
+        plant_id = snapshot['plant_id']
+        with self._lock:
+            subscribers = list(self._subscribers.get(plant_id, ()))
+            if plant_id in self._cursors:
+                self._cursors[plant_id] = max(self._cursors[plant_id], snapshot.get('id') or 0)
+        for subscription in subscribers:
+            subscription.offer(snapshot)
+
+    def wake(self):
+        """Ask the poller to check for new readings now (no-op with notifications)."""
+        self._wakeup.set()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _poll_loop(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+                cursors = dict(self._cursors)
+            if self.notifications_active:
+                continue
+            try:
+                snapshots = self.fetch_new_readings(cursors)
+            except Exception as e:
+                print(f'Sensor stream poll error: {e}')
+                continue
+            for snapshot in snapshots:
+                self.publish(snapshot)
@@ -0,0 +1,74 @@
+"""
+FlatForest must reproduce scikit-learn's forest outputs exactly, not just closely.
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from forest_eval import FlatForest
+
+
+def training_data(rng, n=600, n_features=5, with_nan=False):
+    X = rng.normal(size=(n, n_features)) * rng.uniform(0.1, 100, n_features)
+    if with_nan:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    y = np.nan_to_num(X[:, 0]) - 2 * np.nan_to_num(X[:, 1]) + rng.normal(size=n)
+    return X, y
+
+
+def inputs(rng, X_train, n=300):
+    """Random rows plus rows sitting exactly on training values (the split thresholds lie between them)."""
+    X = rng.normal(size=(n, X_train.shape[1])) * np.nanstd(X_train, axis=0)
+    X[: n // 3] = X_train[rng.integers(len(X_train), size=n // 3)]
+    return X
+
+
+@pytest.mark.parametrize('with_nan', [False, True])
+def test_regressor_matches_sklearn(with_nan):
+    rng = np.random.default_rng(1)
+    X_train, y = training_data(rng, with_nan=with_nan)
+    forest = RandomForestRegressor(n_estimators=25, max_depth=8, random_state=0, n_jobs=1).fit(X_train, y)
+    flat = FlatForest.from_sklearn(forest)
+
+    X = inputs(rng, X_train)
+    if with_nan:
+        X[rng.random(X.shape) < 0.2] = np.nan
+    np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+    np.testing.assert_array_equal(flat.predict(X[:1]), forest.predict(X[:1]))
+
+
+@pytest.mark.parametrize('with_nan', [False, True])
+def test_classifier_matches_sklearn(with_nan):
+    rng = np.random.default_rng(2)
+    X_train, y = training_data(rng, with_nan=with_nan)
+    categories = np.array(['Critical', 'Poor', 'Fair', 'Good', 'Excellent'])
+    labels = categories[np.digitize(y, np.quantile(y, [0.2, 0.4, 0.6, 0.8]))]
+    forest = RandomForestClassifier(n_estimators=25, max_depth=10, random_state=0, n_jobs=1,
+                                    class_weight='balanced').fit(X_train, labels)
+    flat = FlatForest.from_sklearn(forest)
+
+    X = inputs(rng, X_train)
+    if with_nan:
+        X[rng.random(X.shape) < 0.2] = np.nan
+    np.testing.assert_array_equal(flat.predict_proba(X), forest.predict_proba(X))
+    np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+
+
+def test_apply_matches_sklearn_leaves():
+    rng = np.random.default_rng(3)
+    X_train, y = training_data(rng)
+    forest = RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=1).fit(X_train, y)
+    flat = FlatForest.from_sklearn(forest)
+
+    X = inputs(rng, X_train)
+    offsets = np.array(flat.roots)
+    np.testing.assert_array_equal(flat.apply(X), forest.apply(X) + offsets)
+
+
+def test_rejects_wrong_feature_count():
+    rng = np.random.default_rng(4)
+    X_train, y = training_data(rng, n=50)
+    flat = FlatForest.from_sklearn(RandomForestRegressor(n_estimators=2, random_state=0).fit(X_train, y))
+    with pytest.raises(ValueError):
+        flat.predict(np.zeros((2, 4)))
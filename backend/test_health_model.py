@@ -0,0 +1,85 @@
+"""
+PlantHealthClassifier.extract_features_batch() must equal extract_features() row by row.
+"""
+
+import numpy as np
+import pytest
+
+from health_model import PlantHealthClassifier
+
+RANGE_KEYS = ('moisture', 'temp', 'light')
+NUMERIC_ATTRS = ('age_days', 'days_since_last_watering', 'watering_frequency_days')
+CATEGORICAL_ATTRS = {
+    'care_level': ['low', 'medium', 'high', 'unknown', None],
+    'native_climate': ['arid', 'temperate', 'tropical', 'subtropical', 'polar', None],
+    'plant_type': ['succulent', 'cactus', 'herb', 'vegetable', 'flower', 'tree', 'fern', None]
+}
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    return PlantHealthClassifier(model_path=str(tmp_path / 'health_model.pkl'))
+
+
+def random_fleet(rng, n_plants=400, window=8):
+    readings = np.column_stack([rng.uniform(0, 100, n_plants * window), rng.uniform(40, 100, n_plants * window),
+                                rng.uniform(0, 2000, n_plants * window)]).reshape(n_plants, window, 3)
+    # Exact band edges (moisture status, weather stress) must land in the same band
+    readings[:6, 0, 0] = [29.999, 30.0, 49.999, 50.0, 69.999, 70.0]
+    counts = rng.integers(0, window + 1, n_plants)
+
+    weather = np.column_stack([rng.uniform(40, 100, n_plants), rng.uniform(0, 100, n_plants),
+                               rng.uniform(0, 100, n_plants)])
+    weather[:4] = [[70.0, 40.0, 0.0], [70.001, 39.999, 5.0], [90.0, 0.0, 100.0], [110.0, 0.0, 0.0]]
+    weather[rng.random(weather.shape) < 0.15] = np.nan
+
+    attrs = {}
+    for key, (low, high) in zip(RANGE_KEYS, [(0, 100), (40, 100), (0, 2000)]):
+        bounds = np.sort(rng.uniform(low, high, (n_plants, 2)), axis=1)
+        bounds[rng.random(n_plants) < 0.3] = np.nan
+        attrs[f'optimal_{key}_min'], attrs[f'optimal_{key}_max'] = bounds.T
+    for key in NUMERIC_ATTRS:
+        values = rng.uniform(0, 400, n_plants)
+        values[rng.random(n_plants) < 0.3] = np.nan
+        attrs[key] = values
+    for key, choices in CATEGORICAL_ATTRS.items():
+        attrs[key] = [choices[i] for i in rng.integers(len(choices), size=n_plants)]
+    return readings, counts, weather, attrs
+
+
+def scalar_inputs(readings, count, weather, attrs, i):
+    """The arguments extract_features() gets for plant i (missing values left out, not None)."""
+    sensor_readings = [{'moisture': m, 'temperature': t, 'light': l} for m, t, l in readings[:count].tolist()]
+    weather_data = {key: value for key, value in zip(('temperature', 'humidity', 'precipitation'), weather.tolist())
+                    if not np.isnan(value)}
+    plant_data = {}
+    for key, values in attrs.items():
+        value = values[i]
+        if value is not None and not (isinstance(value, float) and np.isnan(value)):
+            plant_data[key] = value
+    return sensor_readings, weather_data, plant_data or None
+
+
+def test_batch_matches_extract_features(classifier):
+    readings, counts, weather, attrs = random_fleet(np.random.default_rng(1))
+    batch = classifier.extract_features_batch(readings, weather, attrs, counts)
+
+    expected = np.array([classifier.extract_features(*scalar_inputs(readings[i], counts[i], weather[i], attrs, i))
+                         for i in range(len(readings))])
+    assert batch.shape == expected.shape
+    np.testing.assert_array_equal(batch, expected)
+
+
+def test_batch_without_plant_attrs_or_counts(classifier):
+    rng = np.random.default_rng(2)
+    readings, _, weather, _ = random_fleet(rng, n_plants=50, window=6)
+    batch = classifier.extract_features_batch(readings, weather)
+
+    expected = np.array([classifier.extract_features(*scalar_inputs(readings[i], 6, weather[i], {}, i))
+                         for i in range(len(readings))])
+    np.testing.assert_array_equal(batch, expected)
+
+
+def test_rejects_wrong_reading_shape(classifier):
+    with pytest.raises(ValueError):
+        classifier.extract_features_batch(np.zeros((2, 5)), np.zeros((2, 3)))
@@ -0,0 +1,165 @@
+"""
+health_rules must score exactly like the original chain of comparisons in
+calculate_plant_health_score(), band edges and NaN readings included.
+"""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from health_rules import health_results, score_readings, stack_readings
+
+
+def reference_score(readings):
+    """The scalar scorer health_rules replaced, kept verbatim apart from layout."""
+    if not readings:
+        return {'score': 50, 'status': 'Unknown',
+                'details': {'moisture_score': 0, 'temperature_score': 0, 'light_score': 0, 'trend_score': 10},
+                'factors': ['No sensor data available']}
+    latest = readings[0]
+
+    moisture = latest.moisture
+    if 40 <= moisture <= 70:
+        moisture_score, moisture_status = 30, 'optimal'
+    elif 30 <= moisture < 40 or 70 < moisture <= 80:
+        moisture_score, moisture_status = 20, 'good'
+    elif 20 <= moisture < 30 or 80 < moisture <= 90:
+        moisture_score, moisture_status = 10, 'fair'
+    else:
+        moisture_score, moisture_status = 0, 'poor'
+
+    temp = latest.temperature
+    if 65 <= temp <= 80:
+        temp_score, temp_status = 25, 'optimal'
+    elif 60 <= temp < 65 or 80 < temp <= 85:
+        temp_score, temp_status = 18, 'good'
+    elif 55 <= temp < 60 or 85 < temp <= 90:
+        temp_score, temp_status = 10, 'fair'
+    else:
+        temp_score, temp_status = 0, 'poor'
+
+    light = latest.light
+    if 300 <= light <= 800:
+        light_score, light_status = 25, 'optimal'
+    elif 200 <= light < 300 or 800 < light <= 1000:
+        light_score, light_status = 18, 'good'
+    elif 100 <= light < 200 or 1000 < light <= 1500:
+        light_score, light_status = 10, 'fair'
+    else:
+        light_score, light_status = 0, 'poor'
+
+    trend_score = 20
+    if len(readings) >= 3:
+        moisture_changes, temp_changes = [], []
+        for i in range(len(readings) - 1):
+            prev, curr = readings[i + 1], readings[i]
+            moisture_changes.append(curr.moisture - prev.moisture)
+            temp_changes.append(abs(curr.temperature - prev.temperature))
+        avg_moisture_change = sum(moisture_changes) / len(moisture_changes)
+        avg_temp_stability = 10 - (sum(temp_changes) / len(temp_changes))
+        if avg_moisture_change < -5:
+            trend_score -= 10
+        elif avg_moisture_change < -2:
+            trend_score -= 5
+        if avg_temp_stability < 5:
+            trend_score -= 5
+        trend_score = max(0, min(20, trend_score))
+
+    total_score = max(0, min(100, moisture_score + temp_score + light_score + trend_score))
+    if total_score >= 80:
+        status = 'Excellent'
+    elif total_score >= 65:
+        status = 'Good'
+    elif total_score >= 50:
+        status = 'Fair'
+    elif total_score >= 30:
+        status = 'Poor'
+    else:
+        status = 'Critical'
+
+    factors = []
+    if moisture_status == 'poor':
+        factors.append('Soil moisture is too ' + ('low' if moisture < 20 else 'high'))
+    elif moisture_status == 'fair':
+        factors.append('Soil moisture is suboptimal')
+    if temp_status == 'poor':
+        factors.append('Temperature is too ' + ('low' if temp < 55 else 'high'))
+    elif temp_status == 'fair':
+        factors.append('Temperature is outside optimal range')
+    if light_status == 'poor':
+        factors.append('Light levels are too ' + ('low' if light < 100 else 'high'))
+    elif light_status == 'fair':
+        factors.append('Light levels are suboptimal')
+    if trend_score < 15:
+        factors.append('Recent readings show declining conditions')
+    if not factors:
+        factors.append('All conditions are optimal')
+
+    return {
+        'score': round(total_score, 1),
+        'status': status,
+        'details': {'moisture_score': round(moisture_score, 1), 'temperature_score': round(temp_score, 1),
+                    'light_score': round(light_score, 1), 'trend_score': round(trend_score, 1)},
+        'factors': factors,
+        'current_values': {'moisture': round(moisture, 1), 'temperature': round(temp, 1), 'light': round(light, 1)}
+    }
+
+
+def reading(moisture, temperature, light):
+    return SimpleNamespace(moisture=moisture, temperature=temperature, light=light)
+
+
+def assert_same_results(plants, window):
+    readings, counts = stack_readings(plants, window)
+    results = health_results(score_readings(readings, counts))
+    # JSON text compares NaN current values as equal
+    assert [json.dumps(r, sort_keys=True) for r in results] == \
+        [json.dumps(reference_score(rows[:window]), sort_keys=True) for rows in plants]
+
+
+def edge_values(edges):
+    """Every band edge, its neighbours one ulp away, and NaN/inf."""
+    values = [np.nextafter(edge, -np.inf) for edge in edges] + list(edges) + \
+        [np.nextafter(edge, np.inf) for edge in edges]
+    return [float(v) for v in values] + [float('nan'), float('inf'), float('-inf'), -1.0, 1e6]
+
+
+def test_band_edges_match_comparisons():
+    plants = []
+    for moisture in edge_values([20, 30, 40, 70, 80, 90]):
+        plants.append([reading(moisture, 72.0, 500.0)])
+    for temperature in edge_values([55, 60, 65, 80, 85, 90]):
+        plants.append([reading(50.0, temperature, 500.0)])
+    for light in edge_values([100, 200, 300, 800, 1000, 1500]):
+        plants.append([reading(50.0, 72.0, light)])
+    assert_same_results(plants, 5)
+
+
+@pytest.mark.parametrize('moisture_step, temperature_step', [
+    (5.0, 0.0), (5.000001, 0.0), (2.0, 0.0), (1.999999, 0.0),  # Average change exactly at -5 / -2
+    (0.0, 5.0), (0.0, 4.999999), (0.0, 5.000001),              # Temperature stability exactly 5
+    (float('nan'), 0.0), (0.0, float('nan'))
+])
+def test_trend_edges_match_comparisons(moisture_step, temperature_step):
+    # Newest first: moisture drops by moisture_step per reading, temperature alternates
+    plants = [[reading(50.0 - moisture_step * (n - 1 - i), 70.0 + temperature_step * (i % 2), 500.0)
+               for i in range(n)] for n in range(0, 6)]
+    assert_same_results(plants, 5)
+
+
+@pytest.mark.parametrize('window', [5, 8])
+def test_random_readings_match_comparisons(window):
+    rng = np.random.default_rng(window)
+    plants = []
+    for _ in range(500):
+        n = int(rng.integers(0, window + 3))  # Some plants have more readings than the window
+        rows = [reading(float(rng.choice([rng.uniform(0, 100), rng.integers(15, 95)])),
+                        float(rng.choice([rng.uniform(40, 100), rng.integers(50, 95)])),
+                        float(rng.choice([rng.uniform(0, 2000), rng.integers(0, 30) * 50])))
+                for _ in range(n)]
+        if rows and rng.random() < 0.05:
+            rows[int(rng.integers(len(rows)))].moisture = float('nan')
+        plants.append(rows)
+    assert_same_results(plants, window)
@@ -0,0 +1,40 @@
+"""
+WateringPredictionModel.predict_batch() must return what predict() returns row by row.
+"""
+
+import numpy as np
+import pytest
+
+from ml_model import WateringPredictionModel
+
+
+def random_conditions(rng, n, with_moisture):
+    columns = [rng.uniform(30, 100, n), rng.uniform(0, 100, n), rng.uniform(0, 100, n)]
+    if with_moisture:
+        # Include the moisture band edges (30, 40, 50) exactly
+        moisture = np.concatenate([[29.999, 30.0, 39.999, 40.0, 49.999, 50.0], rng.uniform(0, 100, n - 6)])
+        columns.insert(0, moisture)
+    return np.column_stack(columns)
+
+
+@pytest.mark.parametrize('with_moisture', [False, True])
+def test_weather_based_batch_matches_predict(tmp_path, with_moisture):
+    model = WateringPredictionModel(model_path=str(tmp_path / 'watering_model.pkl'))
+    X = random_conditions(np.random.default_rng(1), 300, with_moisture)
+
+    expected = [model.predict(list(row)) for row in X]
+    np.testing.assert_array_equal(model.predict_batch(X), expected)
+
+
+@pytest.mark.parametrize('with_moisture', [False, True])
+def test_trained_batch_matches_predict(tmp_path, with_moisture):
+    rng = np.random.default_rng(2)
+    model = WateringPredictionModel(model_path=str(tmp_path / 'watering_model.pkl'))
+    model.model.set_params(n_estimators=20, n_jobs=1)
+    X_train = random_conditions(rng, 400, with_moisture)
+    y_train = rng.uniform(6, 168, 400) if with_moisture else rng.uniform(1, 7, 400)
+    model.train(X_train, y_train, verbose=False)
+
+    X = random_conditions(rng, 200, with_moisture)
+    expected = [model.predict(row) for row in X]
+    np.testing.assert_array_equal(model.predict_batch(X), expected)
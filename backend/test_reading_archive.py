@@ -0,0 +1,83 @@
+"""
+Archive files must give back exactly the rows written to them, once each.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from reading_archive import (append_to_archive, archive_path, archived_months, iter_archived_readings,
+                             load_archived_readings, read_archive)
+
+
+def make_rows(rng, first_id, n, start):
+    ids = np.arange(first_id, first_id + n)
+    timestamps = [start + timedelta(seconds=int(s), microseconds=int(us))
+                  for s, us in zip(rng.integers(0, 20 * 86400, n), rng.integers(0, 1_000_000, n))]
+    return {
+        'id': ids,
+        'timestamp': timestamps,
+        'light': rng.uniform(0, 2000, n),
+        'moisture': rng.uniform(0, 100, n),
+        'temperature': rng.uniform(40, 100, n)
+    }
+
+
+def append(archive_dir, plant_id, rows):
+    months = {}
+    for i, timestamp in enumerate(rows['timestamp']):
+        months.setdefault((timestamp.year, timestamp.month), []).append(i)
+    for (year, month), index in months.items():
+        append_to_archive(archive_dir, plant_id, year, month, rows['id'][index],
+                          [rows['timestamp'][i] for i in index], rows['light'][index],
+                          rows['moisture'][index], rows['temperature'][index])
+
+
+def test_round_trip_returns_the_same_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    rows = make_rows(rng, 1, 500, datetime(2024, 1, 20))  # Spans January and February
+    append(tmp_path, 7, rows)
+
+    assert archived_months(tmp_path, 7) == [(2024, 1), (2024, 2)]
+    expected = sorted(zip(rows['timestamp'], rows['id'].tolist(), rows['light'].tolist(),
+                          rows['moisture'].tolist(), rows['temperature'].tolist()))
+    archived = [(r['timestamp'], r['id'], r['light'], r['moisture'], r['temperature'])
+                for r in iter_archived_readings(tmp_path, 7)]
+    assert archived == expected
+    assert all(r['plant_id'] == 7 for r in iter_archived_readings(tmp_path, 7))
+
+    loaded = load_archived_readings(tmp_path, 7)
+    assert loaded['id'].tolist() == [row[1] for row in expected]
+    assert loaded['timestamp'].tolist() == [row[0] for row in expected]
+
+
+def test_reappending_skips_duplicate_ids(tmp_path):
+    rng = np.random.default_rng(2)
+    rows = make_rows(rng, 1, 300, datetime(2024, 5, 3))
+    append(tmp_path, 1, rows)
+    before = read_archive(archive_path(tmp_path, 1, 2024, 5))
+
+    # An interrupted batch archived again, overlapping with newer rows
+    append(tmp_path, 1, {field: values[100:] for field, values in rows.items()})
+    more = make_rows(rng, 301, 50, datetime(2024, 5, 3))
+    append(tmp_path, 1, more)
+
+    after = read_archive(archive_path(tmp_path, 1, 2024, 5))
+    assert len(after['id']) == len(np.unique(after['id'])) == 350
+    keep = np.isin(after['id'], before['id'])
+    for field, values in before.items():
+        np.testing.assert_array_equal(after[field][keep], values)
+    order = np.lexsort((after['id'], after['timestamp']))
+    np.testing.assert_array_equal(order, np.arange(350))
+
+
+def test_range_reads_are_half_open(tmp_path):
+    rng = np.random.default_rng(3)
+    rows = make_rows(rng, 1, 400, datetime(2024, 1, 20))
+    append(tmp_path, 2, rows)
+    start, end = datetime(2024, 1, 25, 12), datetime(2024, 2, 3)
+
+    expected = sorted((t, i) for t, i in zip(rows['timestamp'], rows['id'].tolist()) if start <= t < end)
+    assert [(r['timestamp'], r['id']) for r in iter_archived_readings(tmp_path, 2, start, end)] == expected
+    assert load_archived_readings(tmp_path, 2, start, end)['id'].tolist() == [i for _, i in expected]
+    assert list(iter_archived_readings(tmp_path, 3)) == []
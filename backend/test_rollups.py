@@ -0,0 +1,113 @@
+"""
+Rollups merged batch by batch must equal an aggregate of all raw readings at once.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from rollups import aggregate_readings, merge_aggregates, to_epoch_seconds
+
+
+def random_readings(rng, n, n_plants=4, days=3):
+    plant_ids = rng.integers(1, n_plants + 1, n)
+    epochs = 1_700_000_000 + rng.integers(0, days * 86400, n)
+    values = np.column_stack([rng.uniform(0, 2000, n), rng.uniform(0, 100, n), rng.uniform(40, 100, n)])
+    return plant_ids, epochs, values
+
+
+def reference_aggregate(plant_ids, epochs, values, bucket_seconds):
+    """Plain-Python group-by, the definition the vectorized code has to match."""
+    groups = {}
+    for plant_id, epoch, row in zip(plant_ids, epochs, values):
+        groups.setdefault((int(plant_id), int(epoch) // bucket_seconds * bucket_seconds), []).append(row)
+    return {key: (len(rows), np.min(rows, axis=0), np.max(rows, axis=0), np.mean(rows, axis=0))
+            for key, rows in groups.items()}
+
+
+def assert_same_aggregate(aggregate, expected):
+    keys = list(zip(aggregate['plant_id'].tolist(), aggregate['bucket_start'].tolist()))
+    assert keys == sorted(expected)
+    for i, key in enumerate(keys):
+        count, mins, maxs, avgs = expected[key]
+        assert aggregate['count'][i] == count
+        np.testing.assert_array_equal(aggregate['min'][i], mins)
+        np.testing.assert_array_equal(aggregate['max'][i], maxs)
+        np.testing.assert_allclose(aggregate['avg'][i], avgs, rtol=1e-12)
+
+
+@pytest.mark.parametrize('bucket_seconds', [3600, 86400])
+def test_aggregate_matches_reference(bucket_seconds):
+    plant_ids, epochs, values = random_readings(np.random.default_rng(1), 2000)
+    assert_same_aggregate(aggregate_readings(plant_ids, epochs, values, bucket_seconds),
+                          reference_aggregate(plant_ids, epochs, values, bucket_seconds))
+
+
+@pytest.mark.parametrize('bucket_seconds', [3600, 86400])
+def test_merged_batches_equal_from_scratch(bucket_seconds):
+    rng = np.random.default_rng(2)
+    plant_ids, epochs, values = random_readings(rng, 3000)
+    splits = np.sort(rng.choice(np.arange(1, 3000), 5, replace=False))
+
+    merged = aggregate_readings([], [], np.empty((0, 3)), bucket_seconds)
+    for batch in zip(np.split(plant_ids, splits), np.split(epochs, splits), np.split(values, splits)):
+        merged = merge_aggregates(merged, aggregate_readings(*batch, bucket_seconds))
+
+    from_scratch = aggregate_readings(plant_ids, epochs, values, bucket_seconds)
+    for field in ('plant_id', 'bucket_start', 'count', 'min', 'max'):
+        np.testing.assert_array_equal(merged[field], from_scratch[field])
+    np.testing.assert_allclose(merged['avg'], from_scratch['avg'], rtol=1e-12)
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('rollups') / 'rollups.db'}"
+    import app
+    with app.app.app_context():
+        app.db.create_all()
+    return app
+
+
+def test_update_sensor_rollups_matches_raw_readings(app_module):
+    app, db = app_module, app_module.db
+    rng = np.random.default_rng(3)
+    start = datetime(2024, 3, 1)
+    with app.app.app_context():
+        user = app.User(username='rollups', email='rollups@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        plants = [app.Plant(name=f'plant {i}', user_id=user.id, sensor_id=f'rollup-{i}') for i in range(3)]
+        db.session.add_all(plants)
+        db.session.commit()
+
+        # Three runs, each folding readings that land in buckets earlier runs already wrote
+        for _ in range(3):
+            db.session.add_all([app.SensorReading(
+                plant_id=plants[int(rng.integers(3))].id,
+                light=round(float(rng.uniform(0, 2000)), 2),
+                moisture=round(float(rng.uniform(0, 100)), 2),
+                temperature=round(float(rng.uniform(40, 100)), 2),
+                timestamp=start + timedelta(seconds=int(rng.integers(0, 2 * 86400)))
+            ) for _ in range(400)])
+            db.session.commit()
+            app.update_sensor_rollups(batch_size=150)
+
+        rows = db.session.query(
+            app.SensorReading.plant_id, app.SensorReading.timestamp, app.SensorReading.light,
+            app.SensorReading.moisture, app.SensorReading.temperature
+        ).all()
+        plant_ids, timestamps, light, moisture, temperature = zip(*rows)
+        values = np.column_stack([light, moisture, temperature])
+        for model in app.ROLLUP_MODELS:
+            expected = reference_aggregate(plant_ids, to_epoch_seconds(timestamps), values, model.BUCKET_SECONDS)
+            stored = model.query.order_by(model.plant_id, model.bucket_start).all()
+            assert_same_aggregate({
+                'plant_id': np.array([row.plant_id for row in stored]),
+                'bucket_start': to_epoch_seconds([row.bucket_start for row in stored]),
+                'count': np.array([row.count for row in stored]),
+                'min': np.array([[row.light_min, row.moisture_min, row.temperature_min] for row in stored]),
+                'max': np.array([[row.light_max, row.moisture_max, row.temperature_max] for row in stored]),
+                'avg': np.array([[row.light_avg, row.moisture_avg, row.temperature_avg] for row in stored])
+            }, expected)
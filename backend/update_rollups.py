@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Fold new sensor readings into the hourly and daily rollup tables.
+
+The server does this in a background thread every ROLLUP_INTERVAL_SECONDS. This
+script runs the same incremental job by hand or from cron (e.g. when the server
+runs with ROLLUP_INTERVAL_SECONDS=0). The first run backfills every existing
+reading; later runs only read rows added since the stored watermark.
+
+Usage:
+    python update_rollups.py                 # process all pending readings once
+    python update_rollups.py --loop 300      # keep running, every 300 seconds
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update sensor reading rollups')
+    parser.add_argument('--loop', type=float, default=None, metavar='SECONDS',
+                        help='Repeat every SECONDS instead of running once')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Raw readings processed per transaction')
+    args = parser.parse_args()
+
+    from app import app, db, update_sensor_rollups, ROLLUP_BATCH_SIZE
+
+    with app.app_context():
+        db.create_all()
+
+    while True:
+        started = time.perf_counter()
+        with app.app_context():
+            processed = update_sensor_rollups(args.batch_size or ROLLUP_BATCH_SIZE)
+        print(f"✅ Folded {processed} reading(s) into rollups in {time.perf_counter() - started:.2f}s")
+        if args.loop is None:
+            return 0
+        time.sleep(args.loop)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Caches for National Weather Service (api.weather.gov) lookups.
+
+Every weather request used to start with GET /points/{lat},{lon} to find the
+forecast office grid cell, then list the observation stations for that cell. Both
+answers are effectively static for a location, so GridPointCache keeps them in
+memory (and optionally in a small SQLite file, so restarts stay warm) keyed by the
+coordinates rounded to 4 decimals - the precision NWS itself accepts.
+
+Forecasts (per grid cell) and latest observations (per station) change about
+hourly and are the same for every user in the cell. StaleWhileRevalidateCache
+shares one upstream fetch between all of them: fresh entries are served directly,
+expired ones are served immediately while a background worker refreshes them, and
+there is never more than one fetch in flight per key.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def grid_point_key(lat, lon):
+    """Cache key for a location: lat/lon rounded to 4 decimals (~11 m)."""
+    return f'{round(float(lat), 4):.4f},{round(float(lon), 4):.4f}'
+
+
+class GridPointCache:
+    """
+    Thread-safe TTL cache of NWS grid point metadata per location.
+
+    Entries are dicts such as:
+        {'grid_id': 'OKX', 'grid_x': 33, 'grid_y': 35,
+         'forecast_url': ..., 'observation_stations_url': ...,
+         'stations': ['KNYC', 'KLGA', ...]}
+    """
+
+    def __init__(self, ttl=30 * 86400, path=None):
+        """
+        Args:
+            ttl: Entry lifetime in seconds
+            path: Optional SQLite file that persists entries across restarts
+        """
+        self.ttl = ttl
+        self.path = path
+        self._entries = {}  # key -> (entry, stored_at wall-clock seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS grid_points '
+                             '(key TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, lat, lon):
+        """
+        Returns:
+            The cached entry dict, or None if missing or expired
+        """
+        key = grid_point_key(lat, lon)
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None and self.path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute('SELECT data, stored_at FROM grid_points WHERE key = ?', (key,)).fetchone()
+                if row:
+                    cached = (json.loads(row[0]), row[1])
+                    with self._lock:
+                        self._entries[key] = cached
+            except sqlite3.Error as e:
+                print(f'Grid point cache read error: {e}')
+
+        with self._lock:
+            if cached is not None and now - cached[1] < self.ttl:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            return None
+
+    def put(self, lat, lon, entry):
+        key = grid_point_key(lat, lon)
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (entry, stored_at)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('INSERT OR REPLACE INTO grid_points (key, data, stored_at) VALUES (?, ?, ?)',
+                                 (key, json.dumps(entry), stored_at))
+            except sqlite3.Error as e:
+                print(f'Grid point cache write error: {e}')
+
+    def get_or_fetch(self, lat, lon, fetch):
+        """
+        Return the cached entry for a location, calling fetch(lat, lon) on a miss.
+
+        Failed fetches raise and are not cached.
+        """
+        entry = self.get(lat, lon)
+        if entry is None:
+            entry = fetch(lat, lon)
+            self.put(lat, lon, entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'ttl': self.ttl,
+                'persistent': bool(self.path),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def grid_cell_key(grid_point):
+    """Cache key for a forecast grid cell, e.g. 'OKX/33,35'."""
+    if grid_point.get('grid_id') is None:
+        return grid_point['forecast_url']
+    return f"{grid_point['grid_id']}/{grid_point['grid_x']},{grid_point['grid_y']}"
+
+
+class StaleWhileRevalidateCache:
+    """
+    Thread-safe cache that serves stale values while refreshing them in the background.
+
+    get(key, fetch) returns:
+    - a fresh value (younger than `ttl`) straight from memory;
+    - a stale value (younger than `max_stale`) straight from memory, scheduling
+      a background refresh;
+    - otherwise the result of fetch(), run synchronously. If that fetch fails
+      (e.g. the upstream's circuit breaker is open) and any older value exists,
+      the old value is served rather than an error (stale-if-error).
+
+    Concurrent misses for the same key wait for a single fetch (single-flight),
+    and a key is never refreshed twice at the same time.
+    """
+
+    def __init__(self, name, ttl, max_stale, refresh_workers=4):
+        """
+        Args:
+            name: Label used in logs and stats
+            ttl: Seconds a value is served without refreshing
+            max_stale: Seconds a value may still be served while a refresh runs
+            refresh_workers: Background refresh threads
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}   # key -> (value, fetched_at monotonic seconds)
+        self._inflight = {}  # key -> Future of the running fetch
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix=f'{name}-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def get(self, key, fetch):
+        """
+        Args:
+            key: Cache key
+            fetch: Zero-argument callable returning the value; exceptions propagate
+                   to callers only when no usable cached value exists
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[1] if entry else None
+            if entry is not None and age < self.ttl:
+                self.hits += 1
+                return entry[0]
+            if entry is not None and age < self.max_stale:
+                self.stale_hits += 1
+                self._refresh_locked(key, fetch)
+                return entry[0]
+            self.misses += 1
+            future, owner = self._claim(key)
+        if owner:
+            # Synchronous misses run on the caller's thread; other callers wait on the future
+            self._run_fetch(key, fetch, future)
+        try:
+            return future.result()
+        except Exception:
+            if entry is None:
+                raise
+            with self._lock:
+                self.stale_hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """
+        Returns:
+            (value, age_seconds) of the cached entry regardless of freshness, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return (entry[0], time.monotonic() - entry[1]) if entry else None
+
+    def age(self, key):
+        """Seconds since the key was last fetched, or None if it was never fetched."""
+        cached = self.peek(key)
+        return cached[1] if cached else None
+
+    def refresh(self, key, fetch):
+        """
+        Refetch a key in the background now (joins the fetch already running, if any).
+
+        Returns:
+            Future of the fetch
+        """
+        with self._lock:
+            return self._refresh_locked(key, fetch)
+
+    def _claim(self, key):
+        """(future, owner): the in-flight fetch for `key`, or a new one the caller must run."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        return future, True
+
+    def _refresh_locked(self, key, fetch):
+        future, owner = self._claim(key)
+        if owner:
+            self.refreshes += 1
+            self._executor.submit(self._run_fetch, key, fetch, future)
+        return future
+
+    def _run_fetch(self, key, fetch, future):
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            print(f'[{self.name}] Refresh of {key} failed: {e}')
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'ttl': self.ttl,
+                'max_stale': self.max_stale,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'errors': self.errors,
+                'inflight': len(self._inflight)
+            }
@@ -0,0 +1,175 @@
+"""
+Background weather prefetching for locations with recent activity.
+
+Users in the same NWS grid cell share forecasts through the caches in
+weather_cache.py, but the first request after an entry expires still waits for
+weather.gov. WeatherPrefetcher remembers which locations were asked for recently
+(touch()), groups them into distinct grid cells, and refreshes each cell's
+forecast and observation shortly before they expire, so user-facing requests
+find a warm cache.
+
+To stay gentle on weather.gov:
+- at most `max_concurrency` cells are refreshed at a time;
+- the refreshes due in a pass are spread over a random offset of up to
+  `jitter_seconds`, and the pass interval itself is jittered, so cells that
+  expire together are not all refreshed in the same instant (the offset is
+  waited out on a timer, so a waiting cell does not hold a worker);
+- cells whose grid point is not cached yet are skipped (the request path
+  resolves them), and a cell still refreshing from the last pass is not queued again.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from weather_cache import grid_cell_key, grid_point_key
+
+
+class WeatherPrefetcher:
+    """
+    Keeps weather for active grid cells warm.
+
+    Args:
+        weather_service: WeatherService whose caches are refreshed
+        interval_seconds: Time between scheduling passes (jittered ±20%)
+        active_seconds: A location counts as active this long after its last touch()
+        lead_seconds: Refresh entries this long before their TTL runs out
+        max_concurrency: Cells refreshed at the same time
+        jitter_seconds: Refreshes due in one pass start at random offsets up to this
+    """
+
+    def __init__(self, weather_service, interval_seconds=60, active_seconds=3600, lead_seconds=120,
+                 max_concurrency=2, jitter_seconds=30):
+        self.weather_service = weather_service
+        self.interval_seconds = interval_seconds
+        self.active_seconds = active_seconds
+        self.lead_seconds = lead_seconds
+        self.max_concurrency = max_concurrency
+        self.jitter_seconds = jitter_seconds
+        self._locations = {}  # location key -> (lat, lon, last touched monotonic)
+        self._pending = set()  # grid cell keys queued or refreshing
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='weather-prefetch')
+        self._thread = None
+        self.passes = 0
+        self.prefetched = 0
+        self.errors = 0
+
+    def touch(self, lat, lon):
+        """Record activity at a location (cheap; called on every weather lookup)."""
+        if lat is None or lon is None:
+            return
+        with self._lock:
+            self._locations[grid_point_key(lat, lon)] = (float(lat), float(lon), time.monotonic())
+
+    def active_cells(self):
+        """
+        Distinct grid cells of recently active locations (forgets inactive ones).
+
+        Returns:
+            dict: grid cell key -> (lat, lon, grid_point) of one location in the cell
+        """
+        cutoff = time.monotonic() - self.active_seconds
+        with self._lock:
+            for key in [key for key, (_, _, touched) in self._locations.items() if touched < cutoff]:
+                del self._locations[key]
+            locations = list(self._locations.values())
+
+        cells = {}
+        for lat, lon, _ in locations:
+            grid_point = self.weather_service.grid_points.get(lat, lon)
+            if grid_point is not None:
+                cells.setdefault(grid_cell_key(grid_point), (lat, lon, grid_point))
+        return cells
+
+    def _expiring(self, cache, key):
+        age = cache.age(key)
+        return age is None or age >= cache.ttl - self.lead_seconds
+
+    def due_cells(self):
+        """Active cells whose forecast or observation expires within lead_seconds."""
+        service = self.weather_service
+        due = {}
+        for cell, (lat, lon, grid_point) in self.active_cells().items():
+            stations = grid_point['stations']
+            if (self._expiring(service.forecasts, cell)
+                    or (stations and self._expiring(service.observations, stations[0]))):
+                due[cell] = (lat, lon, grid_point)
+        return due
+
+    def run_once(self):
+        """
+        Schedule one pass of refreshes.
+
+        Returns:
+            int: Cells queued for refreshing
+        """
+        due = self.due_cells()
+        with self._lock:
+            queued = [(cell, value) for cell, value in due.items() if cell not in self._pending]
+            self._pending.update(cell for cell, _ in queued)
+            self.passes += 1
+        for cell, (lat, lon, grid_point) in queued:
+            delay = random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0
+            if delay:
+                timer = threading.Timer(delay, self._submit, (cell, lat, lon, grid_point))
+                timer.daemon = True
+                timer.start()
+            else:
+                self._submit(cell, lat, lon, grid_point)
+        return len(queued)
+
+    def _submit(self, cell, lat, lon, grid_point):
+        """Hand a due cell to the worker pool (runs when its jitter offset has passed)."""
+        try:
+            self._executor.submit(self._prefetch, cell, lat, lon, grid_point)
+        except RuntimeError as e:  # Executor shut down
+            with self._lock:
+                self._pending.discard(cell)
+            print(f'[PREFETCH] Could not queue {cell}: {e}')
+
+    def _prefetch(self, cell, lat, lon, grid_point):
+        try:
+            futures = [self.weather_service.refresh_forecast(grid_point),
+                       self.weather_service.refresh_observation(grid_point)]
+            for future in futures:
+                if future is not None:
+                    future.result()
+            # Rebuild the cell's snapshot from the warm caches (no network calls)
+            self.weather_service.current_weather(lat, lon)
+            with self._lock:
+                self.prefetched += 1
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f'[PREFETCH] Refresh of {cell} failed: {e}')
+        finally:
+            with self._lock:
+                self._pending.discard(cell)
+
+    def _loop(self):
+        while True:
+            try:
+                queued = self.run_once()
+                if queued:
+                    print(f'[PREFETCH] Refreshing weather for {queued} active grid cell(s)')
+            except Exception as e:
+                print(f'Error prefetching weather: {e}')
+            time.sleep(self.interval_seconds * random.uniform(0.8, 1.2))
+
+    def start(self):
+        """Run passes in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='weather-prefetch', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_locations': len(self._locations),
+                'pending': len(self._pending),
+                'passes': self.passes,
+                'prefetched': self.prefetched,
+                'errors': self.errors
+            }
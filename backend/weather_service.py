@@ -0,0 +1,284 @@
+"""
+Weather service layer: the single way the backend gets weather data.
+
+/api/weather, /api/plant-health and /api/predict all ask this service for the
+current conditions at a location. It resolves the NWS grid point (cached),
+fetches the forecast and latest observation concurrently through the shared
+stale-while-revalidate caches, and normalizes the result into a snapshot:
+
+    {'temperature': °F, 'humidity': %, 'precipitation': % chance, 'windSpeed': mph}
+
+Snapshots are also kept per grid cell, so callers that only need recent
+conditions (health scoring, predictions) are answered from memory without
+touching the network while a snapshot is fresh enough.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime
+
+from weather_cache import grid_cell_key, grid_point_key
+
+NWS_API_URL = 'https://api.weather.gov'
+
+
+def parse_wind_speed(wind_string):
+    """Parse wind speed from NWS format (e.g., '5 to 10 mph', '5-10 mph', 'Calm', '8 mph')"""
+    try:
+        # Handle "Calm" or empty
+        if not wind_string or wind_string.lower() in ['calm', 'none', '']:
+            return 0.0
+
+        # Convert to string if not already
+        wind_str = str(wind_string).strip()
+
+        # Extract numbers from string like "5 to 10 mph", "5-10 mph", or "8 mph"
+        numbers = re.findall(r'\d+(?:\.\d+)?', wind_str)
+        if numbers:
+            # If range like "5 to 10" or "5-10", take the average
+            if len(numbers) >= 2:
+                avg = (float(numbers[0]) + float(numbers[1])) / 2
+                print(f'Parsed wind range {wind_str} -> average: {avg} mph')
+                return avg
+            else:
+                value = float(numbers[0])
+                print(f'Parsed wind speed {wind_str} -> {value} mph')
+                return value
+    except Exception as e:
+        print(f'Error parsing wind speed: {e}, string: {wind_string}')
+    print(f'Using default wind speed 5.0 mph for: {wind_string}')
+    return 5.0  # Default reasonable wind speed
+
+
+class WeatherService:
+    """
+    Current weather for a location, backed by the NWS API and shared caches.
+
+    Args:
+        http_client: Shared HttpClient (see http_client.py)
+        headers: Headers for NWS requests (User-Agent is required by NWS)
+        grid_points: GridPointCache
+        forecasts: StaleWhileRevalidateCache for forecast periods, keyed by grid cell
+        observations: StaleWhileRevalidateCache for latest observations, keyed by station
+        executor: Thread pool running the forecast and observation branches
+        deadline_seconds: Overall time budget for one current_weather() call
+    """
+
+    def __init__(self, http_client, headers, grid_points, forecasts, observations, executor, deadline_seconds=8.0):
+        self.http_client = http_client
+        self.headers = headers
+        self.grid_points = grid_points
+        self.forecasts = forecasts
+        self.observations = observations
+        self.executor = executor
+        self.deadline_seconds = deadline_seconds
+        self._snapshots = {}  # grid cell key -> (weather dict, monotonic time)
+        self._lock = threading.Lock()
+
+    # Upstream fetches
+
+    def fetch_grid_point(self, lat, lon):
+        """
+        Look up the NWS grid cell and observation stations for a location (2 requests).
+
+        Returns:
+            dict: Grid point cache entry (see weather_cache.GridPointCache)
+        """
+        grid_response = self.http_client.get(f'{NWS_API_URL}/points/{grid_point_key(lat, lon)}',
+                                             headers=self.headers, timeout=10)
+        if not grid_response.ok:
+            raise Exception('Failed to get grid point')
+        properties = grid_response.json()['properties']
+
+        stations = []
+        try:
+            stations_response = self.http_client.get(properties['observationStations'],
+                                                     headers=self.headers, timeout=10)
+            if stations_response.ok:
+                stations = [feature['properties']['stationIdentifier']
+                            for feature in stations_response.json().get('features', [])]
+        except Exception as e:
+            print(f'Could not fetch observation stations: {e}')
+
+        return {
+            'grid_id': properties.get('gridId'),
+            'grid_x': properties.get('gridX'),
+            'grid_y': properties.get('gridY'),
+            'forecast_url': properties['forecast'],
+            'observation_stations_url': properties.get('observationStations'),
+            'stations': stations
+        }
+
+    def fetch_forecast_periods(self, forecast_url):
+        """Forecast periods for a grid cell, current period first"""
+        forecast_response = self.http_client.get(forecast_url, headers=self.headers, timeout=10)
+        if not forecast_response.ok:
+            raise Exception('Failed to get forecast')
+        periods = forecast_response.json().get('properties', {}).get('periods', [])
+        if not periods:
+            raise Exception('Forecast has no periods')
+        return periods
+
+    def fetch_latest_observation(self, station_id):
+        """Properties of a station's latest observation"""
+        obs_response = self.http_client.get(f'{NWS_API_URL}/stations/{station_id}/observations/latest',
+                                            headers=self.headers, timeout=10)
+        if not obs_response.ok:
+            raise Exception(f'Failed to get observation for {station_id}')
+        return obs_response.json().get('properties')
+
+    # Cached lookups
+
+    def grid_point(self, lat, lon):
+        """Cached NWS grid point metadata for a location"""
+        return self.grid_points.get_or_fetch(lat, lon, self.fetch_grid_point)
+
+    def forecast_periods(self, grid_point):
+        """Cached forecast periods for a grid point"""
+        forecast_url = grid_point['forecast_url']
+        return self.forecasts.get(grid_cell_key(grid_point), lambda: self.fetch_forecast_periods(forecast_url))
+
+    def latest_observation(self, grid_point):
+        """Cached latest observation from the grid point's nearest station, or None"""
+        if not grid_point['stations']:
+            return None
+        station_id = grid_point['stations'][0]
+        return self.observations.get(station_id, lambda: self.fetch_latest_observation(station_id))
+
+    def refresh_forecast(self, grid_point):
+        """Refetch a grid point's forecast in the background; returns the Future"""
+        forecast_url = grid_point['forecast_url']
+        return self.forecasts.refresh(grid_cell_key(grid_point), lambda: self.fetch_forecast_periods(forecast_url))
+
+    def refresh_observation(self, grid_point):
+        """Refetch the nearest station's latest observation in the background; returns the Future or None"""
+        if not grid_point['stations']:
+            return None
+        station_id = grid_point['stations'][0]
+        return self.observations.refresh(station_id, lambda: self.fetch_latest_observation(station_id))
+
+    # Normalized weather
+
+    def current_weather(self, lat, lon):
+        """
+        Current conditions at a location.
+
+        The grid point lookup (two requests on a cold cache) and the forecast and
+        observation branches, which run concurrently, share one deadline; if the
+        observation misses it, the forecast-only result is returned with
+        'partial': True. Fetches that miss the deadline keep running and warm the
+        caches for the next call. If no forecast can be obtained (NWS down, circuit
+        breaker open) the grid cell's last snapshot is served with 'stale': True.
+
+        Returns:
+            dict: temperature, humidity, precipitation, windSpeed, forecast,
+                  description, timestamp, partial, stale
+
+        Raises:
+            Exception: If no forecast could be obtained and nothing is cached
+        """
+        try:
+            return self._current_weather(lat, lon)
+        except Exception as e:
+            cached = self._last_snapshot(lat, lon)
+            if cached is None:
+                raise
+            print(f'[WEATHER] Serving last snapshot for {grid_point_key(lat, lon)}: {e}')
+            return dict(cached, stale=True)
+
+    def _last_snapshot(self, lat, lon):
+        """Last complete weather for a location's grid cell, or None (never fetches)"""
+        grid_point = self.grid_points.get(lat, lon)
+        if grid_point is None:
+            return None
+        with self._lock:
+            cached = self._snapshots.get(grid_cell_key(grid_point))
+        return cached[0] if cached else None
+
+    def _current_weather(self, lat, lon):
+        deadline = time.monotonic() + self.deadline_seconds
+        grid_future = self.executor.submit(self.grid_point, lat, lon)
+        try:
+            grid_point = grid_future.result(timeout=max(0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            raise Exception(f'Grid point lookup missed the {self.deadline_seconds:g}s deadline')
+        forecast_future = self.executor.submit(self.forecast_periods, grid_point)
+        observation_future = self.executor.submit(self.latest_observation, grid_point)
+
+        try:
+            current_period = forecast_future.result(timeout=max(0, deadline - time.monotonic()))[0]
+        except FuturesTimeoutError:
+            raise Exception(f'Forecast missed the {self.deadline_seconds:g}s deadline')
+
+        observation = None
+        partial = False
+        try:
+            observation = observation_future.result(timeout=max(0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            partial = True
+            print(f'[WEATHER] Observation missed the {self.deadline_seconds:g}s deadline, returning forecast only')
+        except Exception as e:
+            print(f'Could not fetch observations: {e}')
+
+        temp = current_period['temperature']  # Fahrenheit unless temperatureUnit says otherwise
+        if current_period.get('temperatureUnit') == 'C':
+            temp = (temp * 9/5) + 32
+        humidity = (current_period.get('relativeHumidity') or {}).get('value')  # Try forecast first
+
+        # Get more accurate data from observations if available
+        if observation:
+            if observation.get('temperature') and observation['temperature'].get('value') is not None:
+                # NWS observation temperature is in Celsius, convert to Fahrenheit
+                temp = (observation['temperature']['value'] * 9/5) + 32
+            # Prefer observation humidity if available
+            if observation.get('relativeHumidity') and observation['relativeHumidity'].get('value') is not None:
+                humidity = observation['relativeHumidity']['value']
+
+        # Wind speed always comes from the forecast ("5 to 10 mph" or "8 mph") - observation
+        # wind can be inaccurate or from a different time
+        forecast_wind_str = current_period.get('windSpeed', '5 mph')
+        wind_speed = parse_wind_speed(forecast_wind_str)
+        print(f'[WEATHER] Using forecast wind: "{forecast_wind_str}" -> {wind_speed} mph')
+
+        weather = {
+            'temperature': round(temp, 1),
+            # Missing humidity stays None (no fake fallback); the frontend handles it
+            'humidity': round(humidity, 1) if humidity is not None else None,
+            'precipitation': (current_period.get('probabilityOfPrecipitation') or {}).get('value') or 0,
+            'windSpeed': round(wind_speed, 1),
+            'forecast': current_period.get('shortForecast', 'Unknown'),
+            'description': current_period.get('detailedForecast', ''),
+            'timestamp': datetime.now().isoformat(),
+            'partial': partial,  # True when observation data missed the deadline
+            'stale': False
+        }
+        if not partial:
+            with self._lock:
+                self._snapshots[grid_cell_key(grid_point)] = (weather, time.monotonic())
+        return weather
+
+    def snapshot(self, lat, lon, max_age):
+        """
+        Normalized {temperature, humidity, precipitation, windSpeed} for a location.
+
+        Served from memory without any network call when the grid cell has a
+        snapshot younger than `max_age` seconds; otherwise computed through
+        current_weather() (which itself mostly hits the shared caches, and bounds
+        the grid point lookup by its deadline).
+        """
+        grid_point = self.grid_points.get(lat, lon)
+        cached = None
+        if grid_point is not None:
+            with self._lock:
+                cached = self._snapshots.get(grid_cell_key(grid_point))
+        if cached is not None and time.monotonic() - cached[1] < max_age:
+            weather = cached[0]
+        else:
+            weather = self.current_weather(lat, lon)
+        return {key: weather[key] for key in ('temperature', 'humidity', 'precipitation', 'windSpeed')}
+
+    def stats(self):
+        with self._lock:
+            return {'snapshots': len(self._snapshots)}
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import {
   fetchSensorData,
@@ -8,7 +8,8 @@ import {
   createPlant,
   deletePlant,
   getSensorHistory,
-  getPlantHealth
+  getPlantHealth,
+  openSensorStream
 } from '../services/api';
 import SensorDashboard from './SensorDashboard';
 import WeatherSection from './WeatherSection';
@@ -36,6 +37,11 @@ const Dashboard = () => {
   const [healthData, setHealthData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const weatherRef = useRef(null);
+
+  useEffect(() => {
+    weatherRef.current = weatherData;
+  }, [weatherData]);
 
   useEffect(() => {
     loadPlants();
@@ -52,11 +58,54 @@ const Dashboard = () => {
       // Reset prediction history when switching plants
       setPredictionHistory([]);
       loadData();
-      const interval = setInterval(loadData, 5000);
-      return () => clearInterval(interval);
+
+      // New readings are pushed by the server; poll only if SSE is unavailable
+      if (typeof window.EventSource === 'undefined') {
+        const interval = setInterval(loadData, 5000);
+        return () => clearInterval(interval);
+      }
+      const stream = openSensorStream(selectedPlantId, handleReading);
+      return () => stream.close();
     }
   }, [selectedPlantId]);
 
+  const handleReading = (reading) => {
+    setSensorData(reading);
+    setHistory(prev => {
+      const timestamp = new Date(reading.timestamp);
+      const prevLatest = prev.length > 0 ? prev[prev.length - 1]?.timestamp?.getTime() : null;
+      if (prevLatest !== null && timestamp.getTime() <= prevLatest) {
+        return prev; // Already have this reading (initial load or resumed stream)
+      }
+      const entry = {
+        light: reading.light,
+        moisture: reading.moisture,
+        temperature: reading.temperature,
+        timestamp,
+        prediction: null
+      };
+      return [...prev, entry].slice(-20);
+    });
+    refreshDerived(reading);
+  };
+
+  // Prediction and health depend on the latest reading - refresh them when it changes
+  const refreshDerived = async (sensor) => {
+    const weather = weatherRef.current;
+    if (weather) {
+      try {
+        setPrediction(await fetchPrediction(sensor || {}, weather));
+      } catch (err) {
+        console.error('Error fetching prediction:', err);
+      }
+    }
+    try {
+      setHealthData(await getPlantHealth(sensor.plant_id));
+    } catch (err) {
+      setHealthData(null);
+    }
+  };
+
   useEffect(() => {
     // Weather will be loaded with user's saved location or geolocation
     updateWeather();
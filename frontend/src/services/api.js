@@ -68,13 +68,44 @@ export const updateSensorData = async (data) => {
   return response.data;
 };
 
-export const getSensorHistory = async (plantId, limit = 20) => {
+// Pass sinceId to fetch only readings newer than the last one you have.
+// Responses carry an ETag, so the browser revalidates idle polls with a 304.
+export const getSensorHistory = async (plantId, limit = 20, sinceId = null) => {
+  const params = { plant_id: plantId, limit };
+  if (sinceId !== null) {
+    params.since_id = sinceId;
+  }
+  const response = await api.get('/sensor-data/history', { params });
+  return response.data;
+};
+
+// Downsampled history for long ranges: one row per bucket (e.g. '1m', '1h', '1d') with
+// the mean as light/moisture/temperature plus *_min, *_max and count
+export const getSensorHistoryBuckets = async (plantId, start, end, bucket) => {
   const response = await api.get('/sensor-data/history', {
-    params: { plant_id: plantId, limit }
+    params: {
+      plant_id: plantId,
+      start: start instanceof Date ? start.toISOString() : start,
+      end: end instanceof Date ? end.toISOString() : end,
+      bucket
+    }
   });
   return response.data;
 };
 
+// Live sensor readings (Server-Sent Events). EventSource reconnects on its own and
+// resumes from the last received reading via Last-Event-ID.
+export const openSensorStream = (plantId, onReading) => {
+  const source = new EventSource(
+    `${API_BASE_URL}/sensor-data/stream?plant_id=${encodeURIComponent(plantId)}`,
+    { withCredentials: true }
+  );
+  source.addEventListener('reading', (event) => {
+    onReading(JSON.parse(event.data));
+  });
+  return source;
+};
+
 // Weather
 export const fetchWeather = async (lat = null, lon = null) => {
   try {
@@ -2,13 +2,20 @@
 """
 Continuous Sensor Data Sender - Real Hardware Sensors
 Reads from AHT20, BH1750, and Arduino I2C sensors
-Sends data to Neon Postgres database every 10 seconds
+Samples every 10 seconds and writes batches to Neon Postgres over one
+long-lived connection
 """
 
 import psycopg2
+import psycopg2.extras
+import math
 import os
+import random
+import sqlite3
 import sys
+import threading
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
@@ -24,6 +31,17 @@ except ImportError:
 DATABASE_URL = os.environ.get('DATABASE_URL')
 PLANT_ID = int(os.environ.get('PLANT_ID', 1))
 
+# Write buffering - readings are queued locally and flushed as one multi-row INSERT
+FLUSH_EVERY_N = int(os.environ.get('FLUSH_EVERY_N', 3))                     # Flush after N samples...
+FLUSH_INTERVAL_SECONDS = float(os.environ.get('FLUSH_INTERVAL_SECONDS', 30))  # ...or after T seconds
+BUFFER_MAX_READINGS = int(os.environ.get('BUFFER_MAX_READINGS', 1000))      # Oldest readings dropped beyond this
+
+# Offline spool - readings that could not be written are kept on disk and replayed later
+SPOOL_PATH = os.environ.get('SPOOL_PATH', str(Path(__file__).parent / 'reading_spool.db'))
+SPOOL_MAX_MB = float(os.environ.get('SPOOL_MAX_MB', 50))            # Oldest readings evicted beyond this
+SPOOL_DRAIN_BATCH = int(os.environ.get('SPOOL_DRAIN_BATCH', 500))   # Readings replayed per INSERT
+SPOOL_MAX_BACKOFF_SECONDS = float(os.environ.get('SPOOL_MAX_BACKOFF_SECONDS', 300))
+
 if not DATABASE_URL:
     print("❌ ERROR: DATABASE_URL environment variable not set")
     sys.exit(1)
@@ -161,47 +179,426 @@ def read_sensor_data():
         return None
 
 
-def send_sensor_reading(plant_id, moisture, temperature, light):
+INSERT_READINGS_SQL = """
+    INSERT INTO sensor_readings (plant_id, moisture, temperature, light, timestamp)
+    VALUES %s
+"""
+
+
+class DatabaseConnection:
     """
-    Send sensor reading to Neon Postgres database.
+    Long-lived connection to the Neon Postgres database.
     
-    Args:
-        plant_id: ID of the plant (must exist in database)
-        moisture: Soil moisture percentage (0-100) or None
-        temperature: Temperature in Fahrenheit
-        light: Light level in lux
+    Opening a connection costs a full TCP + TLS handshake, which dominated each
+    10-second cycle. The connection is opened lazily, reused for every flush and
+    re-established after a connection-level failure.
+    """
     
-    Returns:
-        bool: True if successful, False otherwise
+    def __init__(self, database_url):
+        self.database_url = database_url
+        self.conn = None
+    
+    def get(self):
+        """Return an open connection, reconnecting if needed."""
+        if self.conn is None or self.conn.closed:
+            self.conn = psycopg2.connect(self.database_url, connect_timeout=10,
+                                         keepalives=1, keepalives_idle=30)
+            print("🔌 Connected to database")
+        return self.conn
+    
+    def reset(self):
+        """Drop the current connection so the next get() reconnects."""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+    
+    def close(self):
+        self.reset()
+
+
+class ReadingBuffer:
     """
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cursor = conn.cursor()
-        
-        # Insert sensor reading
-        # Note: moisture can be None if sensor fails
-        cursor.execute("""
-            INSERT INTO sensor_readings (plant_id, moisture, temperature, light, timestamp)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
+    Bounded in-memory queue of readings waiting to be written.
+    
+    Readings stay queued until they are written, so short network outages do not
+    lose data. When the buffer is full the oldest readings are dropped; readings
+    the database rejects (constraint or data errors) are dropped instead of retried.
+    """
+    
+    def __init__(self, max_readings=BUFFER_MAX_READINGS):
+        self.readings = deque(maxlen=max_readings)
+        self.last_flush = time.monotonic()
+        self.dropped = 0
+        self.rejected = 0
+    
+    def __len__(self):
+        return len(self.readings)
+    
+    def add(self, plant_id, moisture, temperature, light, timestamp=None):
+        values = [value for value in (moisture, temperature, light) if value is not None]
+        if not all(math.isfinite(value) for value in values):
+            # NaN/inf from a glitching sensor would be stored as-is by Postgres
+            self.rejected += 1
+            print(f"⚠️  Skipping reading with non-finite values: {moisture}, {temperature}, {light}")
+            return
+        if len(self.readings) == self.readings.maxlen:
+            self.dropped += 1
+            print(f"⚠️  Buffer full ({self.readings.maxlen} readings), dropping oldest reading")
+        self.readings.append((
             plant_id,
             float(moisture) if moisture is not None else None,
             float(temperature),
             float(light),
-            datetime.now()
+            timestamp or datetime.now()
         ))
+    
+    def take_all(self):
+        """Remove and return every buffered reading."""
+        rows = list(self.readings)
+        self.readings.clear()
+        self.last_flush = time.monotonic()
+        return rows
+    
+    def should_flush(self):
+        if not self.readings:
+            return False
+        return (len(self.readings) >= FLUSH_EVERY_N or
+                time.monotonic() - self.last_flush >= FLUSH_INTERVAL_SECONDS)
+    
+    def flush(self, db):
+        """
+        Write all buffered readings as one multi-row INSERT.
+        
+        Readings leave the buffer once committed (or rejected by the database), even
+        if the flush fails part-way through the row-by-row fallback, so a retry
+        never sends them twice.
         
+        Returns:
+            int: Number of readings written
+        
+        Raises:
+            psycopg2.Error: Connection-level failure; unwritten readings stay buffered
+        """
+        if not self.readings:
+            return 0
+        
+        rows = list(self.readings)
+        done = set()
+        
+        def reject(index, error):
+            done.add(index)
+            self.rejected += 1
+        
+        try:
+            written = write_rows(db, rows, on_written=done.update, on_rejected=reject)
+        finally:
+            if done:
+                remaining = [row for index, row in enumerate(rows) if index not in done]
+                self.readings.clear()
+                self.readings.extend(remaining)
+        self.last_flush = time.monotonic()
+        return written
+
+
+def insert_readings(db, rows):
+    """
+    Insert readings with a single multi-row INSERT on the shared connection.
+    
+    Args:
+        db: DatabaseConnection
+        rows: List of (plant_id, moisture, temperature, light, timestamp) tuples
+    
+    Returns:
+        int: Number of rows written
+    
+    Raises:
+        psycopg2.IntegrityError: A row violates a constraint (connection is kept)
+        psycopg2.DataError: A value is invalid for its column (connection is kept)
+        psycopg2.Error: Connection-level failure (connection is reset for reconnect)
+    """
+    conn = db.get()
+    try:
+        with conn.cursor() as cursor:
+            psycopg2.extras.execute_values(cursor, INSERT_READINGS_SQL, rows, page_size=500)
         conn.commit()
-        cursor.close()
-        conn.close()
-        return True
-    except psycopg2.IntegrityError as e:
-        print(f"❌ Database integrity error: {e}")
+        return len(rows)
+    except (psycopg2.IntegrityError, psycopg2.DataError):
+        conn.rollback()
+        raise
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        db.reset()
+        raise
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            db.reset()
+        raise
+
+
+# Errors caused by the rows themselves - retrying them can never succeed
+REJECTED_ROW_ERRORS = (psycopg2.IntegrityError, psycopg2.DataError)
+
+
+def write_rows(db, rows, on_written=None, on_rejected=None):
+    """
+    Write rows in one statement, isolating rows the database rejects.
+    
+    One bad row (e.g. NULL moisture, unknown plant_id or an out-of-range value)
+    fails the whole statement, so on IntegrityError/DataError the batch is
+    retried row by row. Each row is reported as soon as it commits, and rows
+    that fail again are reported as rejected instead of being retried. Callers
+    remove reported rows from their queue, so a connection failure part-way
+    through never re-sends rows that are already in the database.
+    
+    Args:
+        db: DatabaseConnection
+        rows: List of (plant_id, moisture, temperature, light, timestamp) tuples
+        on_written: Optional callback(indexes) for rows (indexes into `rows`) that were committed
+        on_rejected: Optional callback(index, error) for rows the database refused
+    
+    Returns:
+        int: Number of rows written
+    
+    Raises:
+        psycopg2.Error: Connection-level failure (rows reported so far are committed)
+    """
+    try:
+        written = insert_readings(db, rows)
+    except REJECTED_ROW_ERRORS as e:
+        print(f"❌ Database rejected the batch: {e}")
         print("   Check that plant_id exists in the database")
-        return False
-    except psycopg2.OperationalError as e:
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                written += insert_readings(db, [row])
+            except REJECTED_ROW_ERRORS as row_error:
+                print(f"   Dropping invalid reading {row}: {row_error}")
+                if on_rejected is not None:
+                    on_rejected(index, row_error)
+                continue
+            if on_written is not None:
+                on_written([index])
+        return written
+    if on_written is not None:
+        on_written(range(len(rows)))
+    return written
+
+
+class ReadingSpool:
+    """
+    Append-only on-disk spool for readings that could not be sent.
+    
+    Backed by a SQLite database in WAL mode so appends survive crashes and power
+    loss. Readings are replayed oldest-first by SpoolDrainer. Readings the database
+    rejects are moved to a `quarantine` table (kept for inspection, never retried)
+    so one bad row cannot block the readings behind it. The file is capped at
+    SPOOL_MAX_MB; when the cap is reached the oldest readings are evicted so the
+    SD card cannot fill up.
+    """
+    
+    def __init__(self, path=SPOOL_PATH, max_mb=SPOOL_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.evicted = 0
+        self.quarantined = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                plant_id INTEGER NOT NULL,
+                moisture REAL,
+                temperature REAL NOT NULL,
+                light REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS quarantine (
+                seq INTEGER PRIMARY KEY,
+                plant_id INTEGER NOT NULL,
+                moisture REAL,
+                temperature REAL NOT NULL,
+                light REAL NOT NULL,
+                timestamp TEXT NOT NULL,
+                error TEXT NOT NULL,
+                quarantined_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+    
+    def pending(self):
+        """Number of readings waiting to be replayed."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+    
+    def append(self, rows):
+        """Durably append (plant_id, moisture, temperature, light, timestamp) rows."""
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO spool (plant_id, moisture, temperature, light, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(plant_id, moisture, temperature, light, timestamp.isoformat())
+                 for plant_id, moisture, temperature, light, timestamp in rows]
+            )
+            self.conn.commit()
+            self._enforce_size_cap()
+    
+    def peek(self, limit):
+        """
+        Return the oldest spooled readings without removing them.
+        
+        Returns:
+            tuple: (seqs, rows) - pass the seqs of written rows to remove()
+        """
+        with self.lock:
+            records = self.conn.execute(
+                "SELECT seq, plant_id, moisture, temperature, light, timestamp FROM spool ORDER BY seq LIMIT ?",
+                (limit,)
+            ).fetchall()
+        seqs = [record[0] for record in records]
+        rows = [(plant_id, moisture, temperature, light, datetime.fromisoformat(timestamp))
+                for _, plant_id, moisture, temperature, light, timestamp in records]
+        return seqs, rows
+    
+    def remove(self, seqs):
+        """Remove written readings by seq."""
+        with self.lock:
+            self.conn.executemany("DELETE FROM spool WHERE seq = ?", [(seq,) for seq in seqs])
+            self.conn.commit()
+    
+    def quarantine(self, seq, error):
+        """Move a reading the database rejected out of the replay queue."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO quarantine "
+                "SELECT seq, plant_id, moisture, temperature, light, timestamp, ?, ? FROM spool WHERE seq = ?",
+                (str(error).strip(), datetime.now().isoformat(), seq)
+            )
+            self.conn.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+            self.conn.commit()
+            self.quarantined += 1
+    
+    def _used_bytes(self):
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+    
+    def _enforce_size_cap(self):
+        """Evict the oldest 10% of readings until the spool fits under the cap."""
+        while self._used_bytes() > self.max_bytes:
+            total = self.conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+            if total == 0:
+                break
+            evict = max(1, total // 10)
+            self.conn.execute(
+                "DELETE FROM spool WHERE seq IN (SELECT seq FROM spool ORDER BY seq LIMIT ?)", (evict,)
+            )
+            self.conn.commit()
+            self.evicted += evict
+            print(f"⚠️  Spool over {self.max_bytes / (1024 * 1024):g} MB, evicted {evict} oldest reading(s)")
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SpoolDrainer(threading.Thread):
+    """
+    Background thread that replays the spool to the database in large batches.
+    
+    Uses its own database connection. Each reading is removed from the spool as
+    soon as it is committed (so an interrupted replay never writes it twice) and
+    readings the database rejects are quarantined. After a failed attempt it waits
+    with jittered exponential backoff (capped at SPOOL_MAX_BACKOFF_SECONDS) before
+    retrying, so an outage does not turn into a reconnect storm.
+    """
+    
+    def __init__(self, spool, database_url):
+        super().__init__(name='spool-drainer', daemon=True)
+        self.spool = spool
+        self.db = DatabaseConnection(database_url)
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.backoff = 1.0
+    
+    def notify(self):
+        """Wake the drainer after new readings were spooled."""
+        self.wakeup.set()
+    
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+    
+    def run(self):
+        while not self.stopping.is_set():
+            seqs, rows = self.spool.peek(SPOOL_DRAIN_BATCH)
+            if not rows:
+                self.db.close()  # No backlog - don't hold a second connection open
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            
+            try:
+                written = write_rows(
+                    self.db, rows,
+                    on_written=lambda indexes: self.spool.remove([seqs[index] for index in indexes]),
+                    on_rejected=lambda index, error: self.spool.quarantine(seqs[index], error)
+                )
+                self.backoff = 1.0
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 📤 Replayed {written} spooled reading(s)")
+            except Exception as e:
+                delay = self.backoff * random.uniform(0.5, 1.5)
+                print(f"⚠️  Spool replay failed ({e.__class__.__name__}), retrying in {delay:.0f}s")
+                self.backoff = min(SPOOL_MAX_BACKOFF_SECONDS, self.backoff * 2)
+                self.stopping.wait(delay)
+        self.db.close()
+
+
+def flush_buffer(db, buffer, spool=None, drainer=None):
+    """
+    Flush the buffer to the database, spooling readings to disk on failure.
+    
+    While the spool still has a backlog (an outage is ongoing or being replayed),
+    new readings are appended to the spool directly so sampling is never blocked
+    on connection timeouts. They are safely on disk and in order, so this counts
+    as success.
+    
+    Returns:
+        bool: True if the buffer was written or queued behind the spool backlog,
+              False if the write failed (readings spooled or kept for retry)
+    """
+    if spool is not None and spool.pending():
+        rows = buffer.take_all()
+        spool.append(rows)
+        if drainer is not None:
+            drainer.notify()
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 💾 Spooled {len(rows)} reading(s) behind backlog")
+        return True
+    
+    try:
+        written = buffer.flush(db)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 📤 Flushed {written} reading(s) to database")
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
         print(f"❌ Database connection error: {e}")
         print("   Check your DATABASE_URL and network connection")
+        if spool is not None:
+            rows = buffer.take_all()
+            spool.append(rows)
+            if drainer is not None:
+                drainer.notify()
+            print(f"   {len(rows)} reading(s) saved to spool for replay")
+        else:
+            print(f"   {len(buffer)} reading(s) kept in buffer for retry")
         return False
     except Exception as e:
         print(f"❌ Error sending sensor data: {e}")
@@ -210,6 +607,31 @@ def send_sensor_reading(plant_id, moisture, temperature, light):
         return False
 
 
+def send_sensor_reading(plant_id, moisture, temperature, light, db=None):
+    """
+    Send a single sensor reading to Neon Postgres database immediately.
+    
+    Args:
+        plant_id: ID of the plant (must exist in database)
+        moisture: Soil moisture percentage (0-100) or None
+        temperature: Temperature in Fahrenheit
+        light: Light level in lux
+        db: Optional DatabaseConnection to reuse (a temporary one is used otherwise)
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    owns_connection = db is None
+    db = db or DatabaseConnection(DATABASE_URL)
+    buffer = ReadingBuffer()
+    buffer.add(plant_id, moisture, temperature, light)
+    try:
+        return flush_buffer(db, buffer) and len(buffer) == 0
+    finally:
+        if owns_connection:
+            db.close()
+
+
 def main():
     """Main loop - reads sensors and sends data every 10 seconds"""
     print("=" * 60)
@@ -217,6 +639,7 @@ def main():
     print("=" * 60)
     print(f"Plant ID: {PLANT_ID}")
     print(f"Interval: 10 seconds")
+    print(f"Flush: every {FLUSH_EVERY_N} readings or {FLUSH_INTERVAL_SECONDS:.0f} seconds")
     print("Sensors:")
     print("  - AHT20: Temperature & Humidity")
     print("  - BH1750: Light")
@@ -227,6 +650,15 @@ def main():
     
     count = 0
     error_count = 0
+    db = DatabaseConnection(DATABASE_URL)
+    buffer = ReadingBuffer()
+    spool = ReadingSpool()
+    drainer = SpoolDrainer(spool, DATABASE_URL)
+    drainer.start()
+    
+    backlog = spool.pending()
+    if backlog:
+        print(f"💾 {backlog} reading(s) in spool from a previous run, replaying in background")
     
     try:
         while True:
@@ -243,17 +675,19 @@ def main():
             
             moisture, temperature, light = sensor_result
             
-            # Send to Neon database
-            success = send_sensor_reading(PLANT_ID, moisture, temperature, light)
+            # Queue the reading; it is written with the next batch
+            buffer.add(PLANT_ID, moisture, temperature, light)
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            moisture_str = f"{moisture:.1f}%" if moisture is not None else "N/A"
+            print(f"[{timestamp}] #{count} 📥 Queued: {moisture_str} moisture, {temperature:.1f}°F, {light:.1f}lux")
             
-            if success:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                moisture_str = f"{moisture:.1f}%" if moisture is not None else "N/A"
-                print(f"[{timestamp}] #{count} ✅ Sent: {moisture_str} moisture, {temperature:.1f}°F, {light:.1f}lux")
-                error_count = 0  # Reset error count on success
-            else:
-                error_count += 1
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] #{count} ❌ Failed to send to database")
+            # Send buffered readings to Neon database
+            if buffer.should_flush():
+                if flush_buffer(db, buffer, spool, drainer):
+                    error_count = 0  # Reset error count on success
+                else:
+                    error_count += 1
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] #{count} ❌ Failed to send to database")
             
             # If too many errors, warn user
             if error_count >= 5:
@@ -264,7 +698,20 @@ def main():
             
     except KeyboardInterrupt:
         print("\n\nStopping sensor data collection...")
-        print(f"Total readings sent: {count}")
+        if len(buffer):
+            print(f"Flushing {len(buffer)} buffered reading(s)...")
+            flush_buffer(db, buffer, spool)
+        drainer.stop()
+        db.close()
+        remaining = spool.pending()
+        spool.close()
+        print(f"Total readings taken: {count}")
+        print(f"Readings dropped (buffer full): {buffer.dropped}")
+        print(f"Readings rejected (invalid data): {buffer.rejected}")
+        print(f"Readings evicted (spool full): {spool.evicted}")
+        print(f"Readings quarantined (rejected on replay): {spool.quarantined}")
+        if remaining:
+            print(f"Readings left in spool for next run: {remaining}")
         print(f"Errors encountered: {error_count}")
         sys.exit(0)
     except Exception as e: